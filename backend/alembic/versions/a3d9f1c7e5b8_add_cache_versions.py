@@ -0,0 +1,33 @@
+"""Add cache_versions for ETags on read endpoints
+
+Revision ID: a3d9f1c7e5b8
+Revises: f7c1e5a9b3d2
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3d9f1c7e5b8"
+down_revision: Union[str, None] = "f7c1e5a9b3d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cache_versions",
+        sa.Column("scope", sa.String(length=16), nullable=False),
+        sa.Column("scope_id", sa.Uuid(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("scope", "scope_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("cache_versions")
@@ -0,0 +1,46 @@
+"""Add assignment_reminders ledger and roster_events date index
+
+Revision ID: a7d3e9c1f5b2
+Revises: f2c6d8a4b7e3
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7d3e9c1f5b2"
+down_revision: Union[str, None] = "f2c6d8a4b7e3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "assignment_reminders",
+        sa.Column("event_assignment_id", sa.Uuid(), nullable=False),
+        sa.Column("lead_days", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["event_assignment_id"], ["event_assignments.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "event_assignment_id",
+            "lead_days",
+            name="uq_assignment_reminders_event_assignment_id_lead_days",
+        ),
+    )
+    # The reminder scheduler's range scan over upcoming events
+    op.create_index("ix_roster_events_date", "roster_events", ["date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_roster_events_date", table_name="roster_events")
+    op.drop_table("assignment_reminders")
@@ -0,0 +1,30 @@
+"""Add digest_key to outbox_messages
+
+Revision ID: b8e4f2a6c3d1
+Revises: a7d3e9c1f5b2
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b8e4f2a6c3d1"
+down_revision: Union[str, None] = "a7d3e9c1f5b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "outbox_messages",
+        sa.Column("digest_key", sa.String(length=50), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("outbox_messages", "digest_key")
@@ -0,0 +1,30 @@
+"""Add notifications type, reference_id index for conflict deduplication
+
+Revision ID: b8e4f2a6c9d1
+Revises: a3d9f1c7e5b8
+Create Date: 2026-10-19 23:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b8e4f2a6c9d1"
+down_revision: Union[str, None] = "a3d9f1c7e5b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_notifications_type_reference_id",
+        "notifications",
+        ["type", "reference_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_type_reference_id", table_name="notifications")
@@ -0,0 +1,26 @@
+"""Add invites email, accepted_at index for pending invites on the home screen
+
+Revision ID: c1f7a3d9e5b2
+Revises: b8e4f2a6c9d1
+Create Date: 2026-10-19 23:45:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c1f7a3d9e5b2"
+down_revision: Union[str, None] = "b8e4f2a6c9d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_invites_email_accepted_at", "invites", ["email", "accepted_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_invites_email_accepted_at", table_name="invites")
@@ -0,0 +1,45 @@
+"""Add delivery health columns to push_subscriptions
+
+Revision ID: c3f7a1d9e5b8
+Revises: b8e4f2a6c3d1
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c3f7a1d9e5b8"
+down_revision: Union[str, None] = "b8e4f2a6c3d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "push_subscriptions",
+        sa.Column("last_success_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "push_subscriptions",
+        sa.Column("last_failure_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "push_subscriptions",
+        sa.Column("failure_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "push_subscriptions",
+        sa.Column("retry_after", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("push_subscriptions", "retry_after")
+    op.drop_column("push_subscriptions", "failure_count")
+    op.drop_column("push_subscriptions", "last_failure_at")
+    op.drop_column("push_subscriptions", "last_success_at")
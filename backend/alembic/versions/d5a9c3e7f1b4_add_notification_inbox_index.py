@@ -0,0 +1,30 @@
+"""Add notifications index for keyset-paginated inbox
+
+Revision ID: d5a9c3e7f1b4
+Revises: c3f7a1d9e5b8
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d5a9c3e7f1b4"
+down_revision: Union[str, None] = "c3f7a1d9e5b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_notifications_user_id_created_at_id",
+        "notifications",
+        ["user_id", "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_user_id_created_at_id", table_name="notifications")
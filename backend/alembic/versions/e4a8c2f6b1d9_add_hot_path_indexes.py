@@ -0,0 +1,56 @@
+"""Add composite indexes for hot service queries
+
+Revision ID: e4a8c2f6b1d9
+Revises: a3b7c9d1e5f2
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e4a8c2f6b1d9"
+down_revision: Union[str, None] = "a3b7c9d1e5f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns) - each matches a filter used by the services
+INDEXES = [
+    # RosterService.get_roster_events / generate_more_events
+    ("ix_roster_events_roster_id_date", "roster_events", ["roster_id", "date"]),
+    # RosterService.get_user_event_assignments
+    ("ix_event_assignments_user_id", "event_assignments", ["user_id"]),
+    # Filled-slot counts and per-event assignment listings
+    (
+        "ix_event_assignments_event_id_status",
+        "event_assignments",
+        ["event_id", "status"],
+    ),
+    # AvailabilityService lookups by user and date range
+    ("ix_unavailabilities_user_id_date", "unavailabilities", ["user_id", "date"]),
+    # Inbox listing and unread filtering
+    (
+        "ix_notifications_user_id_read_at_created_at",
+        "notifications",
+        ["user_id", "read_at", "created_at"],
+    ),
+    # RosterService.get_team_rosters and team event joins
+    ("ix_rosters_team_id", "rosters", ["team_id"]),
+    # TeamService.has_active_invite / get_member_invite_status
+    ("ix_invites_team_id_user_id", "invites", ["team_id", "user_id"]),
+    # TeamService.get_members - the primary key leads with user_id
+    ("ix_team_members_team_id", "team_members", ["team_id"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,26 @@
+"""Add notifications created_at index for retention purges
+
+Revision ID: e6b2d8f4a1c7
+Revises: d5a9c3e7f1b4
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e6b2d8f4a1c7"
+down_revision: Union[str, None] = "d5a9c3e7f1b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_notifications_created_at", "notifications", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_created_at", table_name="notifications")
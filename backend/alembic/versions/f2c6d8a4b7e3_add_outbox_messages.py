@@ -0,0 +1,58 @@
+"""Add outbox_messages for queued email and push delivery
+
+Revision ID: f2c6d8a4b7e3
+Revises: e4a8c2f6b1d9
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f2c6d8a4b7e3"
+down_revision: Union[str, None] = "e4a8c2f6b1d9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "outbox_messages",
+        sa.Column(
+            "channel", sa.Enum("EMAIL", "PUSH", name="outboxchannel"), nullable=False
+        ),
+        sa.Column("user_id", sa.Uuid(), nullable=True),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum("PENDING", "SENT", "DEAD", name="outboxstatus"),
+            nullable=False,
+        ),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_outbox_messages_status_next_attempt_at",
+        "outbox_messages",
+        ["status", "next_attempt_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_outbox_messages_status_next_attempt_at", table_name="outbox_messages"
+    )
+    op.drop_table("outbox_messages")
+    sa.Enum(name="outboxstatus").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="outboxchannel").drop(op.get_bind(), checkfirst=True)
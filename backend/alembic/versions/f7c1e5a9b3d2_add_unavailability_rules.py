@@ -0,0 +1,60 @@
+"""Add unavailability_rules for date ranges and recurring unavailability
+
+Revision ID: f7c1e5a9b3d2
+Revises: e6b2d8f4a1c7
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f7c1e5a9b3d2"
+down_revision: Union[str, None] = "e6b2d8f4a1c7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "unavailability_rules",
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column(
+            "kind",
+            sa.Enum(
+                "RANGE",
+                "WEEKLY",
+                "MONTHLY_NTH_WEEKDAY",
+                name="unavailabilityrulekind",
+            ),
+            nullable=False,
+        ),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("end_date", sa.Date(), nullable=True),
+        sa.Column("weekday", sa.Integer(), nullable=True),
+        sa.Column("week_number", sa.Integer(), nullable=True),
+        sa.Column("reason", sa.String(length=500), nullable=True),
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_unavailability_rules_user_id_start_date",
+        "unavailability_rules",
+        ["user_id", "start_date"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_unavailability_rules_user_id_start_date",
+        table_name="unavailability_rules",
+    )
+    op.drop_table("unavailability_rules")
+    sa.Enum(name="unavailabilityrulekind").drop(op.get_bind(), checkfirst=True)
@@ -3,7 +3,8 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 
-from app.api.deps import CurrentUser, DbSession
+from app.api.deps import DbSession, ReadCurrentUser, ReadDbSession
+from app.core.database import primary_pins
 from app.schemas.user import UserCreate, UserResponse, Token
 from app.services.auth import AuthService
 
@@ -65,6 +66,10 @@ async def register(user_data: UserCreate, db: DbSession) -> UserResponse:
             except Exception:
                 pass
 
+    # The request carries no token yet, so pin the new account explicitly
+    # to keep its first reads off a replica that may not have it
+    primary_pins.pin(str(user.id))
+
     roles = await auth_service.get_user_roles(user.id)
     user_response = UserResponse.model_validate(user)
     user_response.roles = roles
@@ -92,7 +97,9 @@ async def login(
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user(current_user: CurrentUser, db: DbSession) -> UserResponse:
+async def get_current_user(
+    current_user: ReadCurrentUser, db: ReadDbSession
+) -> UserResponse:
     """Get current authenticated user."""
     auth_service = AuthService(db)
     roles = await auth_service.get_user_roles(current_user.id)
@@ -1,15 +1,21 @@
 import uuid
 from datetime import date
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, HTTPException, status
 
-from app.api.deps import CurrentUser, DbSession
+from app.api.deps import CurrentUser, DbSession, ReadCurrentUser, ReadDbSession
 from app.schemas.availability import (
     ConflictResponse,
     UnavailabilityCreate,
     UnavailabilityResponse,
+    UnavailabilityRuleBulkCreate,
+    UnavailabilityRuleBulkDelete,
+    UnavailabilityRuleBulkDeleteResponse,
+    UnavailabilityRuleResponse,
 )
 from app.services.availability import AvailabilityService
+from app.services.notification import NotificationService
+from app.services.team import TeamService
 
 router = APIRouter(prefix="/availability", tags=["availability"])
 
@@ -22,18 +28,24 @@ async def mark_unavailable(
     current_user: CurrentUser,
     db: DbSession,
 ) -> UnavailabilityResponse:
-    """Mark a date as unavailable for the current user."""
+    """Mark a date as unavailable for the current user.
+
+    The user is notified if they are already assigned on that date.
+    """
     service = AvailabilityService(db)
     unavailability = await service.mark_unavailable(current_user.id, data)
+    await NotificationService(db).notify_new_conflicts(
+        unavailable=[(current_user.id, data.date, data.date)]
+    )
     return UnavailabilityResponse.model_validate(unavailability)
 
 
 @router.get("/me", response_model=list[UnavailabilityResponse])
 async def list_my_unavailabilities(
-    current_user: CurrentUser,
-    db: DbSession,
-    start_date: date | None = Query(None),
-    end_date: date | None = Query(None),
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
+    start_date: date | None = None,
+    end_date: date | None = None,
 ) -> list[UnavailabilityResponse]:
     """List all unavailabilities for the current user."""
     service = AvailabilityService(db)
@@ -43,6 +55,74 @@ async def list_my_unavailabilities(
     return [UnavailabilityResponse.model_validate(u) for u in unavailabilities]
 
 
+@router.post(
+    "/rules",
+    response_model=list[UnavailabilityRuleResponse],
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_rules(
+    data: UnavailabilityRuleBulkCreate,
+    current_user: CurrentUser,
+    db: DbSession,
+) -> list[UnavailabilityRuleResponse]:
+    """Mark date ranges or recurring dates as unavailable for the current user.
+
+    For example ``{"kind": "range", "start_date": "2026-07-01", "end_date":
+    "2026-08-15"}`` or ``{"kind": "monthly_nth_weekday", "weekday": 0,
+    "week_number": 2, "start_date": "2026-01-01"}`` (every 2nd Sunday).
+    The user is notified of assignments already on those dates.
+    """
+    service = AvailabilityService(db)
+    rules = await service.create_rules(current_user.id, data.rules)
+    await NotificationService(db).notify_new_conflicts(
+        unavailable=[(current_user.id, r.start_date, r.end_date) for r in rules]
+    )
+    return [UnavailabilityRuleResponse.model_validate(r) for r in rules]
+
+
+@router.get("/rules/me", response_model=list[UnavailabilityRuleResponse])
+async def list_my_rules(
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> list[UnavailabilityRuleResponse]:
+    """List the current user's unavailability rules overlapping a date range."""
+    service = AvailabilityService(db)
+    rules = await service.get_user_rules(current_user.id, start_date, end_date)
+    return [UnavailabilityRuleResponse.model_validate(r) for r in rules]
+
+
+@router.post("/rules/delete", response_model=UnavailabilityRuleBulkDeleteResponse)
+async def delete_rules(
+    data: UnavailabilityRuleBulkDelete,
+    current_user: CurrentUser,
+    db: DbSession,
+) -> UnavailabilityRuleBulkDeleteResponse:
+    """Delete several of the current user's unavailability rules.
+
+    Ids that do not exist or belong to someone else are ignored.
+    """
+    service = AvailabilityService(db)
+    deleted = await service.delete_rules(current_user.id, data.ids)
+    return UnavailabilityRuleBulkDeleteResponse(deleted=deleted)
+
+
+@router.delete("/rules/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_rule(
+    rule_id: uuid.UUID,
+    current_user: CurrentUser,
+    db: DbSession,
+) -> None:
+    """Delete an unavailability rule. User can only delete their own."""
+    service = AvailabilityService(db)
+    if not await service.delete_rule(current_user.id, rule_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unavailability rule not found or not authorized",
+        )
+
+
 @router.delete("/{unavailability_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_unavailability(
     unavailability_id: uuid.UUID,
@@ -65,23 +145,33 @@ async def delete_unavailability(
 
 @router.get("/conflicts", response_model=list[ConflictResponse])
 async def check_conflicts(
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
 ) -> list[ConflictResponse]:
-    """Check for conflicts between assignments and unavailabilities."""
+    """List upcoming assignments on dates the current user is unavailable."""
     service = AvailabilityService(db)
-    conflicts = await service.check_user_conflicts(current_user.id)
-
-    return [
-        ConflictResponse(
-            assignment_id=assignment.id,
-            unavailability_id=unavailability.id,
-            date=assignment.date,
-            roster_name=assignment.roster.name if assignment.roster else "Unknown",
-            team_name=assignment.roster.team.name
-            if assignment.roster and assignment.roster.team
-            else "Unknown",
-            reason=unavailability.reason,
+    return await service.check_user_conflicts(current_user.id)
+
+
+@router.get("/teams/{team_id}/conflicts", response_model=list[ConflictResponse])
+async def check_team_conflicts(
+    team_id: uuid.UUID,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
+) -> list[ConflictResponse]:
+    """List a team's upcoming scheduling conflicts. Team lead or org admin only."""
+    team_service = TeamService(db)
+    team = await team_service.get_team(team_id)
+    if not team:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Team not found",
+        )
+    if not await team_service.can_manage_team(current_user.id, team):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view team conflicts",
         )
-        for assignment, unavailability in conflicts
-    ]
+
+    service = AvailabilityService(db)
+    return await service.check_team_conflicts(team_id)
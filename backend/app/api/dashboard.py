@@ -1,24 +1,94 @@
+import calendar
 import uuid
 from datetime import date, timedelta
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from sqlalchemy import Select, select
 
-from app.api.deps import CurrentUser, DbSession
+from app.api.deps import ReadCurrentUser, ReadDbSession, check_not_modified
+from app.core.config import get_settings
+from app.core.middleware import ServerTiming
+from app.models.team import TeamMember
 from app.schemas.dashboard import (
     CalendarDay,
+    EventCalendar,
+    HomeSummary,
+    TeamAvailabilityMatrix,
     TeamMemberAvailability,
     UpcomingAssignment,
 )
+from app.schemas.notification import NotificationResponse
 from app.services.dashboard import DashboardService
+from app.services.notification import NotificationService
 from app.services.team import TeamService
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
+# Longest ranges the event calendar (a leap year) and the availability
+# matrix (a quarter) cover
+MAX_CALENDAR_DAYS = 366
+MAX_MATRIX_DAYS = 92
+# How far ahead the home screen looks for unfilled events
+HOME_UNFILLED_DAYS = 28
+
+
+def _member_team_ids(user_id: uuid.UUID) -> Select:
+    """Select the IDs of the teams a user belongs to."""
+    return select(TeamMember.team_id).where(TeamMember.user_id == user_id)
+
+
+@router.get("/home", response_model=HomeSummary)
+async def get_home(
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
+    response: Response,
+    notification_limit: int = Query(20, ge=1, le=100),
+) -> HomeSummary:
+    """Get everything the home screen shows in one request.
+
+    Replaces the separate assignments, notifications, invites, teams and
+    per-team unfilled events requests, each of which authenticated and
+    resolved memberships again. In debug mode a ``Server-Timing`` header
+    gives each section's duration and query count.
+    """
+    today = date.today()
+    service = DashboardService(db)
+    notification_service = NotificationService(db)
+    timing = ServerTiming()
+
+    with timing.section("teams"):
+        teams = await service.get_home_teams(current_user.id)
+    with timing.section("assignments"):
+        assignments = await service.get_home_assignments(current_user, today)
+    with timing.section("unfilled"):
+        unfilled_events = await service.get_home_unfilled_events(
+            teams, today, today + timedelta(days=HOME_UNFILLED_DAYS)
+        )
+    with timing.section("notifications"):
+        notifications = await notification_service.get_user_notifications(
+            current_user.id, limit=notification_limit
+        )
+        unread_count = await notification_service.count_unread(current_user.id)
+    with timing.section("invites"):
+        pending_invites = await service.get_home_invites(current_user.email)
+
+    if get_settings().debug:
+        response.headers["Server-Timing"] = timing.header()
+
+    return HomeSummary(
+        assignments=assignments,
+        unfilled_events=unfilled_events,
+        notifications=[NotificationResponse.model_validate(n) for n in notifications],
+        unread_count=unread_count,
+        pending_invites=pending_invites,
+        teams=teams,
+    )
+
 
 @router.get("/assignments", response_model=list[UpcomingAssignment])
 async def get_upcoming_assignments(
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
     days: int = Query(30, ge=1, le=365),
 ) -> list[UpcomingAssignment]:
     """Get upcoming assignments for the current user."""
@@ -28,12 +98,17 @@ async def get_upcoming_assignments(
 
 @router.get("/calendar", response_model=list[CalendarDay])
 async def get_calendar_view(
-    current_user: CurrentUser,
-    db: DbSession,
-    start_date: date = Query(None),
-    end_date: date = Query(None),
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
+    request: Request,
+    response: Response,
+    start_date: date | None = None,
+    end_date: date | None = None,
 ) -> list[CalendarDay]:
     """Get calendar view with assignments grouped by date."""
+    await check_not_modified(
+        request, response, db, current_user, _member_team_ids(current_user.id)
+    )
     # Default to current month if no dates provided
     if not start_date:
         today = date.today()
@@ -53,21 +128,46 @@ async def get_calendar_view(
     return await service.get_calendar_view(current_user.id, start_date, end_date)
 
 
-@router.get(
-    "/teams/{team_id}/availability", response_model=list[TeamMemberAvailability]
-)
-async def get_team_availability(
-    team_id: uuid.UUID,
-    current_user: CurrentUser,
-    db: DbSession,
-    target_date: date = Query(None),
-) -> list[TeamMemberAvailability]:
-    """Get availability overview for team members. Team lead or org admin only."""
-    if not target_date:
-        target_date = date.today()
+@router.get("/calendar/events", response_model=EventCalendar)
+async def get_event_calendar(
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
+    request: Request,
+    response: Response,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> EventCalendar:
+    """Get the current user's event assignments grouped by date.
+
+    Only dates with assignments appear in ``days``. Defaults to the
+    current month; ranges of up to a year are allowed.
+    """
+    if not start_date:
+        start_date = date.today().replace(day=1)
+    if not end_date:
+        end_date = start_date.replace(
+            day=calendar.monthrange(start_date.year, start_date.month)[1]
+        )
+    if not timedelta(0) <= end_date - start_date < timedelta(days=MAX_CALENDAR_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range must be 1 to {MAX_CALENDAR_DAYS} days",
+        )
+
+    await check_not_modified(
+        request, response, db, current_user, _member_team_ids(current_user.id)
+    )
 
+    service = DashboardService(db)
+    days = await service.get_event_calendar(current_user.id, start_date, end_date)
+    return EventCalendar(start_date=start_date, end_date=end_date, days=days)
+
+
+async def _require_team_manager(
+    team_id: uuid.UUID, current_user: ReadCurrentUser, db: ReadDbSession
+) -> None:
+    """Raise unless the team exists and the user is its lead or an org admin."""
     team_service = TeamService(db)
-    dashboard_service = DashboardService(db)
 
     team = await team_service.get_team(team_id)
     if not team:
@@ -83,7 +183,59 @@ async def get_team_availability(
             detail="Not authorized to view team availability",
         )
 
+
+@router.get(
+    "/teams/{team_id}/availability", response_model=list[TeamMemberAvailability]
+)
+async def get_team_availability(
+    team_id: uuid.UUID,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
+    target_date: date | None = None,
+) -> list[TeamMemberAvailability]:
+    """Get availability overview for team members. Team lead or org admin only."""
+    if not target_date:
+        target_date = date.today()
+
+    await _require_team_manager(team_id, current_user, db)
+
+    dashboard_service = DashboardService(db)
     availability = await dashboard_service.get_team_availability_overview(
         team_id, target_date
     )
     return [TeamMemberAvailability(**a) for a in availability]
+
+
+@router.get(
+    "/teams/{team_id}/availability/matrix", response_model=TeamAvailabilityMatrix
+)
+async def get_team_availability_matrix(
+    team_id: uuid.UUID,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> TeamAvailabilityMatrix:
+    """Get team member x date availability for planning. Team lead or org admin only.
+
+    Defaults to the current month. Each member's ``unavailable`` is a hex
+    bitset: bit n is set when they are unavailable on start_date + n days.
+    """
+    if not start_date:
+        start_date = date.today().replace(day=1)
+    if not end_date:
+        end_date = start_date.replace(
+            day=calendar.monthrange(start_date.year, start_date.month)[1]
+        )
+    if not timedelta(0) <= end_date - start_date < timedelta(days=MAX_MATRIX_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range must be 1 to {MAX_MATRIX_DAYS} days",
+        )
+
+    await _require_team_manager(team_id, current_user, db)
+
+    dashboard_service = DashboardService(db)
+    return await dashboard_service.get_team_availability_matrix(
+        team_id, start_date, end_date
+    )
@@ -1,25 +1,32 @@
 import uuid as uuid_module
+from collections.abc import Iterable
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy import select
+from sqlalchemy import Select, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.security import STREAM_TICKET_SCOPE
 from app.models.user import User
+from app.services.cache import CACHE_CONTROL, CacheService, etag_matches
 
 settings = get_settings()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl="/api/auth/login", auto_error=False
+)
 
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    db: Annotated[AsyncSession, Depends(get_db)],
-) -> User:
-    """Get the current authenticated user from the JWT token."""
+async def _authenticate(token: str, db: AsyncSession, scope: str | None = None) -> User:
+    """Resolve the user a JWT token belongs to.
+
+    Only tokens issued for ``scope`` are accepted: access tokens (no scope)
+    by default, or stream tickets.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -30,7 +37,7 @@ async def get_current_user(
             token, settings.secret_key, algorithms=[settings.algorithm]
         )
         user_id_str: str | None = payload.get("sub")
-        if user_id_str is None:
+        if user_id_str is None or payload.get("scope") != scope:
             raise credentials_exception
         # Convert string to UUID for proper database comparison
         user_id = uuid_module.UUID(user_id_str)
@@ -44,5 +51,68 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> User:
+    """Get the current authenticated user from the JWT token."""
+    return await _authenticate(token, db)
+
+
+async def get_current_read_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+) -> User:
+    """Get the current user through the read session used by GET endpoints."""
+    return await _authenticate(token, db)
+
+
+async def get_stream_user(
+    header_token: Annotated[str | None, Depends(optional_oauth2_scheme)],
+    db: Annotated[AsyncSession, Depends(get_read_db, scope="function")],
+    ticket: str | None = Query(None),
+) -> User:
+    """Get the user of a long-lived streaming request.
+
+    Browsers' EventSource cannot send headers, so instead of the access
+    token it may pass a short-lived stream ticket as ``?ticket=``. The
+    session is closed as soon as the user is loaded rather than held for
+    the life of the stream.
+    """
+    if header_token is not None:
+        return await _authenticate(header_token, db)
+    if ticket is not None:
+        return await _authenticate(ticket, db, scope=STREAM_TICKET_SCOPE)
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Not authenticated",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def check_not_modified(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    user: User,
+    team_ids: Select | Iterable[uuid_module.UUID] = (),
+) -> None:
+    """Tag the response with an ETag, or answer 304 if the client has it.
+
+    Call before the endpoint's own queries, with the teams its response
+    shows. Safe before permission checks: the ETag changes whenever the
+    user's memberships do, so only a client that was already shown this
+    exact version can get a 304 for it.
+    """
+    etag = await CacheService(db).etag(user.id, team_ids)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Authorization"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
+
 CurrentUser = Annotated[User, Depends(get_current_user)]
 DbSession = Annotated[AsyncSession, Depends(get_db)]
+ReadCurrentUser = Annotated[User, Depends(get_current_read_user)]
+ReadDbSession = Annotated[AsyncSession, Depends(get_read_db)]
+StreamUser = Annotated[User, Depends(get_stream_user)]
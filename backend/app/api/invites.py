@@ -2,7 +2,7 @@ import uuid
 
 from fastapi import APIRouter, HTTPException, status
 
-from app.api.deps import CurrentUser, DbSession
+from app.api.deps import CurrentUser, DbSession, ReadCurrentUser, ReadDbSession
 from app.schemas.invite import (
     InviteAccept,
     InviteAcceptResponse,
@@ -13,15 +13,15 @@ from app.schemas.invite import (
 )
 from app.services.invite import InviteService
 from app.services.team import TeamService
-from app.services.email import get_email_service
+from app.services.outbox import OutboxService
 
 router = APIRouter(prefix="/invites", tags=["invites"])
 
 
 @router.get("/my-pending", response_model=list[PendingInviteResponse])
 async def list_my_pending_invites(
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
 ) -> list[PendingInviteResponse]:
     """List pending invites for the current user (by their email)."""
     if not current_user.email:
@@ -234,9 +234,9 @@ async def send_invite(
             team_id=team_id,
         )
 
-        # Send invite email so they know
-        email_service = get_email_service()
-        await email_service.send_invite_email(
+        # Queue invite email so they know
+        OutboxService(db).enqueue_email(
+            "invite",
             to_email=data.email,
             invitee_name=registered_user.name,
             team_name=team.name,
@@ -259,9 +259,9 @@ async def send_invite(
         email=data.email,
     )
 
-    # Send invite email
-    email_service = get_email_service()
-    await email_service.send_invite_email(
+    # Queue invite email
+    OutboxService(db).enqueue_email(
+        "invite",
         to_email=data.email,
         invitee_name=user.name,
         team_name=team.name,
@@ -288,7 +288,7 @@ async def send_invite(
 @router.get("/validate/{token}", response_model=InviteValidation)
 async def validate_invite_token(
     token: str,
-    db: DbSession,
+    db: ReadDbSession,
 ) -> InviteValidation:
     """Validate an invite token. No authentication required."""
     invite_service = InviteService(db)
@@ -375,10 +375,10 @@ async def resend_invite(
     result = await db.execute(select(User).where(User.id == invite.user_id))
     user = result.scalar_one_or_none()
 
-    # Send invite email with new token
+    # Queue invite email with new token
     if user:
-        email_service = get_email_service()
-        await email_service.send_invite_email(
+        OutboxService(db).enqueue_email(
+            "invite",
             to_email=updated_invite.email,
             invitee_name=user.name,
             team_name=team.name,
@@ -392,8 +392,8 @@ async def resend_invite(
 @router.get("/team/{team_id}", response_model=list[InviteResponse])
 async def list_team_invites(
     team_id: uuid.UUID,
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
 ) -> list[InviteResponse]:
     """List all invites for a team. Must be team lead or org admin."""
     team_service = TeamService(db)
@@ -1,28 +1,118 @@
 import uuid
 
 from fastapi import APIRouter, HTTPException, Query, status
-
-from app.api.deps import CurrentUser, DbSession
-from app.schemas.notification import NotificationResponse
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import (
+    CurrentUser,
+    DbSession,
+    ReadCurrentUser,
+    ReadDbSession,
+    StreamUser,
+)
+from app.core.config import get_settings
+from app.core.security import create_stream_ticket
+from app.schemas.notification import (
+    NotificationPage,
+    NotificationResponse,
+    StreamTicket,
+    UnreadCount,
+)
 from app.services.notification import NotificationService
+from app.services.stream import event_stream
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
 
 @router.get("", response_model=list[NotificationResponse])
 async def list_notifications(
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
     unread_only: bool = Query(False),
+    limit: int | None = Query(None, ge=1, le=500),
 ) -> list[NotificationResponse]:
-    """List all notifications for the current user."""
+    """List the current user's notifications, newest first.
+
+    Returns all of them unless a limit is given. Use /notifications/inbox
+    to page through them instead.
+    """
     service = NotificationService(db)
     notifications = await service.get_user_notifications(
-        current_user.id, unread_only=unread_only
+        current_user.id, unread_only=unread_only, limit=limit
     )
     return [NotificationResponse.model_validate(n) for n in notifications]
 
 
+@router.get("/inbox", response_model=NotificationPage)
+async def get_inbox(
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
+    cursor: str | None = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    unread_only: bool = Query(False),
+) -> NotificationPage:
+    """Page through the current user's notifications, newest first.
+
+    Pass the response's next_cursor back as ``cursor`` to get the next page.
+    """
+    service = NotificationService(db)
+    try:
+        notifications, next_cursor = await service.get_inbox(
+            current_user.id, limit, cursor=cursor, unread_only=unread_only
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    return NotificationPage(
+        items=[NotificationResponse.model_validate(n) for n in notifications],
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/unread-count", response_model=UnreadCount)
+async def get_unread_count(
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
+) -> UnreadCount:
+    """Count the current user's unread notifications."""
+    service = NotificationService(db)
+    return UnreadCount(count=await service.count_unread(current_user.id))
+
+
+@router.post("/stream/ticket", response_model=StreamTicket)
+async def create_ticket(current_user: ReadCurrentUser) -> StreamTicket:
+    """Get a ticket for opening the stream where headers cannot be set.
+
+    The ticket only opens the stream and expires after
+    ``stream_ticket_seconds``; an open stream stays open past that.
+    """
+    settings = get_settings()
+    return StreamTicket(
+        ticket=create_stream_ticket(str(current_user.id)),
+        expires_in=settings.stream_ticket_seconds,
+    )
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_notifications(current_user: StreamUser) -> StreamingResponse:
+    """Stream new notifications and assignment changes as Server-Sent Events.
+
+    Events are ``notification`` (a new notification, as in the inbox) and
+    ``assignment`` (an assignment of the user was created or changed
+    status). ``ready`` opens the stream and ``resync`` closes it when the
+    client fell too far behind; on either, refetch. Authenticate with the
+    Authorization header or, from a browser EventSource, with
+    ``?ticket=`` from POST /notifications/stream/ticket.
+    """
+    return StreamingResponse(
+        event_stream(current_user.id, get_settings().stream_heartbeat_seconds),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.patch("/{notification_id}/read", response_model=NotificationResponse)
 async def mark_as_read(
     notification_id: uuid.UUID,
@@ -31,20 +121,11 @@ async def mark_as_read(
 ) -> NotificationResponse:
     """Mark a notification as read. User can only mark their own."""
     service = NotificationService(db)
-
-    # First check if the notification belongs to the user
-    notifications = await service.get_user_notifications(current_user.id)
-    if not any(n.id == notification_id for n in notifications):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Notification not found or not authorized",
-        )
-
-    notification = await service.mark_as_read(notification_id)
+    notification = await service.mark_as_read(notification_id, current_user.id)
     if not notification:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Notification not found",
+            detail="Notification not found or not authorized",
         )
 
     return NotificationResponse.model_validate(notification)
@@ -69,13 +150,8 @@ async def delete_notification(
 ) -> None:
     """Delete a notification. User can only delete their own."""
     service = NotificationService(db)
-
-    # First check if the notification belongs to the user
-    notifications = await service.get_user_notifications(current_user.id)
-    if not any(n.id == notification_id for n in notifications):
+    if not await service.delete_notification(notification_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Notification not found or not authorized",
         )
-
-    await service.delete_notification(notification_id)
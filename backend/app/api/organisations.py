@@ -2,7 +2,7 @@ import uuid
 
 from fastapi import APIRouter, HTTPException, status
 
-from app.api.deps import CurrentUser, DbSession
+from app.api.deps import CurrentUser, DbSession, ReadCurrentUser, ReadDbSession
 from app.schemas.organisation import (
     AddMemberRequest,
     OrganisationCreate,
@@ -32,8 +32,8 @@ async def create_organisation(
 
 @router.get("", response_model=list[OrganisationWithRole])
 async def list_my_organisations(
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
 ) -> list[OrganisationWithRole]:
     """List all organisations the current user belongs to."""
     service = OrganisationService(db)
@@ -52,8 +52,8 @@ async def list_my_organisations(
 @router.get("/{org_id}", response_model=OrganisationResponse)
 async def get_organisation(
     org_id: uuid.UUID,
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
 ) -> OrganisationResponse:
     """Get an organisation by ID. Must be a member."""
     service = OrganisationService(db)
@@ -125,8 +125,8 @@ async def delete_organisation(
 @router.get("/{org_id}/members", response_model=list[OrganisationMemberResponse])
 async def list_members(
     org_id: uuid.UUID,
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
 ) -> list[OrganisationMemberResponse]:
     """List all members of an organisation. Must be a member."""
     service = OrganisationService(db)
@@ -1,11 +1,17 @@
 import uuid
 from datetime import date
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 from sqlalchemy import select
 
-from app.api.deps import CurrentUser, DbSession
-from app.models.roster import AssignmentStatus
+from app.api.deps import (
+    CurrentUser,
+    DbSession,
+    ReadCurrentUser,
+    ReadDbSession,
+    check_not_modified,
+)
+from app.models.roster import AssignmentStatus, Roster
 from app.schemas.roster import (
     AssignmentCreate,
     AssignmentResponse,
@@ -93,10 +99,14 @@ async def create_roster(
 @router.get("/team/{team_id}", response_model=list[RosterResponse])
 async def list_team_rosters(
     team_id: uuid.UUID,
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
+    request: Request,
+    response: Response,
 ) -> list[RosterResponse]:
     """List all rosters for a team. Must be org member."""
+    await check_not_modified(request, response, db, current_user, [team_id])
+
     team_service = TeamService(db)
     org_service = OrganisationService(db)
     roster_service = RosterService(db)
@@ -123,8 +133,8 @@ async def list_team_rosters(
 @router.get("/{roster_id}", response_model=RosterResponse)
 async def get_roster(
     roster_id: uuid.UUID,
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
 ) -> RosterResponse:
     """Get a roster by ID. Must be org member."""
     roster_service = RosterService(db)
@@ -274,8 +284,8 @@ async def create_assignment(
 
 @router.get("/assignments/my", response_model=list[AssignmentResponse])
 async def list_my_assignments(
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
     start_date: date | None = Query(None),
     end_date: date | None = Query(None),
 ) -> list[AssignmentResponse]:
@@ -301,8 +311,8 @@ async def list_my_assignments(
 @router.get("/{roster_id}/assignments", response_model=list[AssignmentResponse])
 async def list_roster_assignments(
     roster_id: uuid.UUID,
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
     start_date: date | None = Query(None),
     end_date: date | None = Query(None),
 ) -> list[AssignmentResponse]:
@@ -458,13 +468,23 @@ async def delete_assignment(
 @router.get("/{roster_id}/events", response_model=list[RosterEventResponse])
 async def list_roster_events(
     roster_id: uuid.UUID,
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
+    request: Request,
+    response: Response,
     start_date: date | None = Query(None),
     end_date: date | None = Query(None),
     include_cancelled: bool = Query(False),
 ) -> list[RosterEventResponse]:
     """List events for a roster. Must be org member."""
+    await check_not_modified(
+        request,
+        response,
+        db,
+        current_user,
+        select(Roster.team_id).where(Roster.id == roster_id),
+    )
+
     roster_service = RosterService(db)
     team_service = TeamService(db)
     org_service = OrganisationService(db)
@@ -516,8 +536,8 @@ async def list_roster_events(
 @router.get("/events/team/{team_id}", response_model=list[RosterEventResponse])
 async def list_team_events(
     team_id: uuid.UUID,
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
     start_date: date | None = Query(None),
     end_date: date | None = Query(None),
     include_cancelled: bool = Query(False),
@@ -567,8 +587,8 @@ async def list_team_events(
 @router.get("/events/team/{team_id}/unfilled", response_model=list[RosterEventResponse])
 async def list_unfilled_events(
     team_id: uuid.UUID,
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
     start_date: date | None = Query(None),
     end_date: date | None = Query(None),
 ) -> list[RosterEventResponse]:
@@ -612,8 +632,8 @@ async def list_unfilled_events(
 @router.get("/events/{event_id}", response_model=RosterEventResponse)
 async def get_roster_event(
     event_id: uuid.UUID,
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
 ) -> RosterEventResponse:
     """Get a roster event by ID. Must be org member."""
     roster_service = RosterService(db)
@@ -661,8 +681,8 @@ async def get_roster_event(
 @router.get("/events/{event_id}/suggestions", response_model=SuggestionsResponse)
 async def get_event_suggestions(
     event_id: uuid.UUID,
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
     limit: int = Query(10, ge=1, le=50),
 ) -> SuggestionsResponse:
     """Get assignment suggestions for a roster event. Team lead only."""
@@ -889,8 +909,8 @@ async def generate_more_events(
 )
 async def list_event_assignments(
     event_id: uuid.UUID,
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
 ) -> list[EventAssignmentResponse]:
     """List all assignments for a roster event. Must be org member."""
     roster_service = RosterService(db)
@@ -1009,11 +1029,13 @@ async def create_event_assignment(
     if user.is_placeholder:
         is_invited = await team_service.has_active_invite(user.id, team.id)
 
+    from app.services.notification import NotificationService
+
+    notification_service = NotificationService(db)
+    await notification_service.notify_new_conflicts(assignment_ids=[assignment.id])
+
     # Send notification (not for self-assigns - they're already confirmed)
     if not is_self_assign:
-        from app.services.notification import NotificationService
-
-        notification_service = NotificationService(db)
         await notification_service.notify_assignment_created_with_email(
             assignment_id=assignment.id,
             user_id=user.id,
@@ -1044,8 +1066,8 @@ async def create_event_assignment(
 )
 async def get_event_assignment_detail(
     assignment_id: uuid.UUID,
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
 ) -> EventAssignmentDetailResponse:
     """Get detailed info for an event assignment including co-volunteers and team lead."""
     roster_service = RosterService(db)
@@ -1116,8 +1138,8 @@ async def get_event_assignment_detail(
 
 @router.get("/event-assignments/my", response_model=list[EventAssignmentResponse])
 async def list_my_event_assignments(
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
     start_date: date | None = Query(None),
     end_date: date | None = Query(None),
 ) -> list[EventAssignmentResponse]:
@@ -1207,6 +1229,11 @@ async def update_event_assignment(
             team_lead_ids = await team_service.get_team_lead_ids(team.id)
             user_name = updated.user.name if updated.user else "Someone"
 
+            if data.status != AssignmentStatus.DECLINED:
+                await notification_service.notify_new_conflicts(
+                    assignment_ids=[assignment_id]
+                )
+
             if data.status == AssignmentStatus.CONFIRMED:
                 await notification_service.notify_assignment_confirmed(
                     user_name=user_name,
@@ -1325,6 +1352,9 @@ async def accept_event_assignment(
             from app.services.notification import NotificationService
 
             notification_service = NotificationService(db)
+            await notification_service.notify_new_conflicts(
+                assignment_ids=[assignment_id]
+            )
             team_lead_ids = await team_service.get_team_lead_ids(team.id)
             await notification_service.notify_assignment_confirmed(
                 user_name=current_user.name,
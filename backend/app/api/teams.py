@@ -1,10 +1,16 @@
 import uuid
 from datetime import date
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, Response, status
 from sqlalchemy import func, select
 
-from app.api.deps import CurrentUser, DbSession
+from app.api.deps import (
+    CurrentUser,
+    DbSession,
+    ReadCurrentUser,
+    ReadDbSession,
+    check_not_modified,
+)
 from app.core.permissions import TeamPermission
 from app.models.team import TeamMember
 from app.models.roster import Roster
@@ -72,8 +78,8 @@ async def create_team(
 
 @router.get("", response_model=list[TeamWithRole])
 async def list_my_teams(
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
     organisation_id: uuid.UUID | None = None,
 ) -> list[TeamWithRole]:
     """List all teams the current user belongs to."""
@@ -121,8 +127,8 @@ async def list_my_teams(
 @router.get("/organisation/{org_id}", response_model=list[TeamResponse])
 async def list_organisation_teams(
     org_id: uuid.UUID,
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
 ) -> list[TeamResponse]:
     """List all teams in an organisation. Must be org member."""
     org_service = OrganisationService(db)
@@ -143,8 +149,8 @@ async def list_organisation_teams(
 @router.get("/{team_id}", response_model=TeamWithRole)
 async def get_team(
     team_id: uuid.UUID,
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
 ) -> TeamWithRole:
     """Get a team by ID with the current user's role and permissions."""
     team_service = TeamService(db)
@@ -248,10 +254,14 @@ async def delete_team(
 @router.get("/{team_id}/members", response_model=list[TeamMemberResponse])
 async def list_members(
     team_id: uuid.UUID,
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
+    request: Request,
+    response: Response,
 ) -> list[TeamMemberResponse]:
     """List all members of a team. Must be org member."""
+    await check_not_modified(request, response, db, current_user, [team_id])
+
     team_service = TeamService(db)
     org_service = OrganisationService(db)
 
@@ -295,8 +305,8 @@ async def list_members(
 async def list_member_assignments(
     team_id: uuid.UUID,
     user_id: uuid.UUID,
-    current_user: CurrentUser,
-    db: DbSession,
+    current_user: ReadCurrentUser,
+    db: ReadDbSession,
     start_date: date | None = None,
     end_date: date | None = None,
 ) -> list[EventAssignmentResponse]:
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -10,6 +11,28 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str = "postgresql+asyncpg://localhost:5433/rooster"
+    # Optional read replica for GET endpoints; empty means read from the primary
+    database_read_url: str = ""
+    # After a user writes, serve their reads from the primary for this long
+    # so they never see replica lag on their own changes
+    database_read_pin_seconds: float = 5.0
+
+    # Connection pool - size these so that
+    #   workers * (db_pool_size + db_max_overflow) < Postgres max_connections
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0  # Seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # Seconds before replacing a connection
+    # "always": ping on every checkout (pool_pre_ping)
+    # "on_error": only ping after a disconnect error has been seen
+    db_pool_ping_mode: Literal["always", "on_error"] = "always"
+    db_pool_ping_window: float = 30.0  # Seconds to keep pinging after a disconnect
+    # Warn (and count in metrics) when a request runs the same statement
+    # this many times - usually an N+1 loop over a relationship
+    db_repeated_statement_threshold: int = 10
+
+    # Bearer token Prometheus sends to scrape GET /metrics; empty disables it
+    metrics_token: str = ""
 
     # Authentication
     secret_key: str = "dev-secret-key-change-in-production"
@@ -31,6 +54,9 @@ class Settings(BaseSettings):
     smtp_from_email: str = ""
     smtp_from_name: str = "Rooster"
     smtp_use_tls: bool = True  # Use STARTTLS (required for Gmail)
+    smtp_pool_size: int = 4  # Authenticated sessions kept open for reuse
+    smtp_idle_timeout: float = 60.0  # Reconnect rather than reuse older sessions
+    smtp_timeout: float = 30.0
     email_enabled: bool = False  # Set to true when SMTP credentials are configured
 
     # Email provider: "smtp" or "resend"
@@ -38,6 +64,40 @@ class Settings(BaseSettings):
 
     # Resend API (alternative to SMTP)
     resend_api_key: str = ""
+    resend_api_url: str = "https://api.resend.com"
+
+    # Outbox dispatcher (python -m app.workers.outbox) - delivers queued
+    # email and push with exponential backoff between failed attempts
+    outbox_batch_size: int = 50
+    outbox_poll_interval: float = 2.0  # Seconds to sleep when the outbox is empty
+    outbox_lease_seconds: int = 300  # Claimed messages reappear if a worker dies
+    outbox_max_attempts: int = 8  # Then the message is dead-lettered
+    outbox_retry_base_seconds: float = 30.0
+    outbox_retry_max_seconds: float = 3600.0
+    # Notification types to merge into digests, as type:seconds pairs. Push
+    # and email of a listed type are held for up to that long and sent to
+    # each user as one summary ("You've been assigned to 6 events in March").
+    # Empty (off) by default; e.g. "assignment_created:120"
+    notification_digest_windows: str = ""
+
+    # Assignment reminders (python -m app.workers.reminders)
+    reminder_lead_days: str = "3,1"  # Comma-separated days before the event
+    reminder_batch_size: int = 500
+    reminder_interval: float = 900.0  # Seconds between scans for due reminders
+
+    # Notification retention (runs in the reminders worker): read
+    # notifications older than this many days are deleted; 0 keeps them all
+    notification_retention_days: int = 180
+    notification_retention_batch_size: int = 1000
+    notification_retention_interval: float = 3600.0
+
+    # Real-time stream (GET /api/notifications/stream). Enable the Postgres
+    # LISTEN/NOTIFY fan-out when running more than one process, so events
+    # reach clients connected to any of them
+    stream_pg_fanout: bool = False
+    stream_heartbeat_seconds: float = 15.0
+    stream_queue_size: int = 100  # Events buffered per client before a resync
+    stream_ticket_seconds: int = 60  # Lifetime of a ?ticket= for opening a stream
 
     # CORS
     cors_origins: str = "*"  # Comma-separated list of origins, or "*" for all
@@ -46,6 +106,17 @@ class Settings(BaseSettings):
     vapid_public_key: str = ""
     vapid_private_key: str = ""
     vapid_subject: str = "mailto:admin@rooster.app"
+    push_max_concurrency: int = 50  # Pushes in flight at once per process
+    push_timeout: float = 10.0  # Seconds per push request
+    # Failing endpoints are skipped for base * 2^(failures - 1) seconds, up
+    # to the maximum, then pruned by the outbox worker after too many
+    # consecutive failures or once they have not succeeded for stale_days
+    push_backoff_base_seconds: float = 60.0
+    push_backoff_max_seconds: float = 86400.0
+    push_prune_max_failures: int = 10
+    push_prune_stale_days: int = 60
+    push_prune_interval: float = 3600.0
+    push_prune_batch_size: int = 500
 
     class Config:
         env_file = ".env"
@@ -1,19 +1,203 @@
+import logging
+import time
 from collections.abc import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import Settings, get_settings
+from app.core.metrics import registry
+from app.core.middleware import current_route, current_scope
+from app.core.security import decode_token_subject
 
-from app.core.config import get_settings
+logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.debug,
-    pool_pre_ping=True,
+POOL_CHECKOUT_WAIT = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    ["pool", "route"],
+)
+POOL_CHECKOUT_TIMEOUTS = registry.counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after db_pool_timeout",
+    ["pool", "route"],
+)
+POOL_IN_USE = registry.gauge(
+    "db_pool_connections_in_use",
+    "Connections currently checked out of the pool",
+    ["pool", "route"],
 )
+POOL_DISCONNECTS = registry.counter(
+    "db_pool_disconnects_total",
+    "Disconnect errors seen on pooled connections",
+    ["pool"],
+)
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waits for a connection."""
+
+    pool_label = "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.inc(pool=self.pool_label, route=current_route())
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(
+                time.perf_counter() - start,
+                pool=self.pool_label,
+                route=current_route(),
+            )
+
+
+class _PingOnError:
+    """Ping connections on checkout only for a while after a disconnect.
+
+    This replaces ``pool_pre_ping`` (one extra round trip per checkout) with
+    the pessimistic checkout recipe, armed by the first disconnect error and
+    disarmed once ``window`` seconds pass without another one.
+    """
+
+    def __init__(self, engine: AsyncEngine, window: float, label: str):
+        self.dialect = engine.dialect
+        # What a failed ping raises on a dead connection
+        self.ping_errors = (engine.dialect.loaded_dbapi.Error, OSError)
+        self.window = window
+        self.label = label
+        self._armed_until = 0.0
+
+    @property
+    def armed(self) -> bool:
+        return time.monotonic() < self._armed_until
+
+    def on_error(self, context) -> None:
+        if context.is_disconnect:
+            POOL_DISCONNECTS.inc(pool=self.label)
+            logger.warning("Database disconnect detected, pinging on checkout")
+            self._armed_until = time.monotonic() + self.window
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        if not self.armed:
+            return
+        try:
+            self.dialect.do_ping(dbapi_connection)
+        except self.ping_errors:
+            # Tells the pool to discard this connection and try another
+            raise exc.DisconnectionError()
+
+
+def create_engine(url: str, config: Settings, label: str = "primary") -> AsyncEngine:
+    """Create an async engine with the pool configured from settings."""
+    options: dict = {"echo": config.debug}
+    is_sqlite = url.startswith("sqlite")
+    if not is_sqlite:
+        pool_class = type(
+            f"InstrumentedAsyncPool_{label}",
+            (InstrumentedAsyncPool,),
+            {"pool_label": label},
+        )
+        options.update(
+            poolclass=pool_class,
+            pool_size=config.db_pool_size,
+            max_overflow=config.db_max_overflow,
+            pool_timeout=config.db_pool_timeout,
+            pool_recycle=config.db_pool_recycle,
+            pool_pre_ping=config.db_pool_ping_mode == "always",
+        )
+
+    new_engine = create_async_engine(url, **options)
+    sync_engine = new_engine.sync_engine
+
+    if not is_sqlite and config.db_pool_ping_mode == "on_error":
+        pinger = _PingOnError(new_engine, config.db_pool_ping_window, label)
+        event.listen(sync_engine, "handle_error", pinger.on_error)
+        # Registered first so a failed ping never counts as an in-use checkout
+        event.listen(sync_engine, "checkout", pinger.on_checkout)
+
+    @event.listens_for(sync_engine, "checkout")
+    def _track_checkout(dbapi_connection, connection_record, connection_proxy):
+        route = current_route()
+        connection_record.info["route"] = route
+        POOL_IN_USE.inc(pool=label, route=route)
+
+    @event.listens_for(sync_engine, "checkin")
+    def _track_checkin(dbapi_connection, connection_record):
+        route = connection_record.info.pop("route", None)
+        if route is not None:
+            POOL_IN_USE.dec(pool=label, route=route)
+
+    return new_engine
+
+
+engine = create_engine(settings.database_url, settings)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+read_engine = (
+    create_engine(settings.database_read_url, settings, label="replica")
+    if settings.database_read_url
+    else engine
+)
+
+
+def read_only(target: AsyncEngine) -> AsyncEngine:
+    """Return a view of the engine whose transactions start READ ONLY.
+
+    On Postgres this turns BEGIN into BEGIN READ ONLY (no extra round trip),
+    so the server never assigns a transaction id for the request and any
+    accidental write fails loudly. Other dialects are returned unchanged.
+    """
+    if target.dialect.name == "postgresql":
+        return target.execution_options(postgresql_readonly=True)
+    return target
+
+
+async_read_session_maker = async_sessionmaker(
+    read_only(read_engine), expire_on_commit=False
+)
+# Used for reads by users pinned to the primary after a write
+async_primary_read_session_maker = async_sessionmaker(
+    read_only(engine), expire_on_commit=False
+)
+
+
+class PrimaryPins:
+    """Remembers which users wrote recently so their reads skip the replica.
+
+    Pins live in this worker's memory. With several workers the load balancer
+    should keep a client on one worker, otherwise a read served by another
+    worker may still observe replica lag.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._until: dict[str, float] = {}
+
+    def pin(self, subject: str) -> None:
+        now = time.monotonic()
+        if len(self._until) > 1000:
+            self._until = {k: v for k, v in self._until.items() if v > now}
+        self._until[subject] = now + self.ttl
+
+    def is_pinned(self, subject: str) -> bool:
+        until = self._until.get(subject)
+        return until is not None and until > time.monotonic()
+
+
+primary_pins = PrimaryPins(settings.database_read_pin_seconds)
+
 
 class Base(DeclarativeBase):
     """Base class for all database models."""
@@ -21,12 +205,72 @@ class Base(DeclarativeBase):
     pass
 
 
+@event.listens_for(Session, "after_flush")
+def _mark_flush_writes(session, flush_context):
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_statement_writes(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+def _current_subject() -> str | None:
+    """Return the user id from the bearer token of the current request."""
+    scope = current_scope()
+    if scope is None:
+        return None
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer":
+                return decode_token_subject(token)
+    return None
+
+
+def _has_writes(session: AsyncSession) -> bool:
+    """Whether the session flushed or still holds changes to persist."""
+    return bool(
+        session.info.get("has_writes")
+        or session.new
+        or session.dirty
+        or session.deleted
+    )
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Dependency that provides a database session."""
+    """Dependency that provides a database session.
+
+    Sessions check out a connection lazily on their first statement, so a
+    request rejected before touching the database never uses the pool.
+    COMMIT is only sent when the request wrote something; a read-only
+    transaction is simply ended when the connection returns to the pool.
+    """
     async with async_session_maker() as session:
         try:
             yield session
-            await session.commit()
+            if _has_writes(session):
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
+        if session.info.get("has_writes"):
+            subject = _current_subject()
+            if subject is not None:
+                primary_pins.pin(subject)
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency that provides a session for read-only endpoints.
+
+    Reads go to the replica when one is configured, unless the requesting
+    user wrote within the last ``database_read_pin_seconds``. Transactions
+    are opened READ ONLY on Postgres and never committed.
+    """
+    session_maker = async_read_session_maker
+    subject = _current_subject()
+    if subject is not None and primary_pins.is_pinned(subject):
+        session_maker = async_primary_read_session_maker
+    async with session_maker() as session:
+        yield session
@@ -0,0 +1,153 @@
+"""ASGI middleware that tracks per-request context for instrumentation."""
+
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import registry
+from app.core.query_stats import (
+    QueryStats,
+    current_query_stats,
+    track_request_queries,
+)
+
+logger = logging.getLogger(__name__)
+
+REQUEST_QUERIES = registry.histogram(
+    "db_queries_per_request",
+    "SQL statements issued while serving a request",
+    ("route",),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 250),
+)
+REQUEST_DB_TIME = registry.histogram(
+    "db_time_per_request_seconds",
+    "Time spent executing SQL statements while serving a request",
+    ("route",),
+)
+REPEATED_STATEMENTS = registry.counter(
+    "db_repeated_statement_requests_total",
+    "Requests that ran the same SQL statement repeatedly (likely N+1)",
+    ("route",),
+)
+
+_request_scope: ContextVar[Scope | None] = ContextVar("request_scope", default=None)
+
+
+def current_scope() -> Scope | None:
+    """Return the ASGI scope of the request being served, if any."""
+    return _request_scope.get()
+
+
+def current_route() -> str:
+    """Return the route template of the request being served.
+
+    The scope is captured before routing happens, but FastAPI stores the
+    matched route on the same scope dict, so by the time a handler touches
+    the database the template (e.g. ``/api/teams/{team_id}``) is available.
+    Work done outside a request is reported as ``background``.
+    """
+    scope = _request_scope.get()
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path or "unmatched"
+
+
+class RequestContextMiddleware:
+    """Expose the current request scope to code running inside the request.
+
+    Also counts the SQL statements each request issues. The totals are
+    recorded as metrics per route and, when ``query_headers`` is set (debug
+    mode), returned in ``X-DB-Query-Count`` / ``X-DB-Query-Time-Ms`` headers.
+    Statements issued after the response has started are only reflected in
+    the metrics.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        query_headers: bool = False,
+        repeated_statement_threshold: int = 10,
+    ):
+        self.app = app
+        self.query_headers = query_headers
+        self.repeated_statement_threshold = repeated_statement_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _request_scope.set(scope)
+        try:
+            with track_request_queries() as stats:
+
+                async def send_with_query_headers(message: Message) -> None:
+                    if message["type"] == "http.response.start":
+                        headers = MutableHeaders(scope=message)
+                        headers["X-DB-Query-Count"] = str(stats.count)
+                        headers["X-DB-Query-Time-Ms"] = f"{stats.duration * 1000:.2f}"
+                    await send(message)
+
+                try:
+                    await self.app(
+                        scope,
+                        receive,
+                        send_with_query_headers if self.query_headers else send,
+                    )
+                finally:
+                    self._record(stats)
+        finally:
+            _request_scope.reset(token)
+
+    def _record(self, stats: QueryStats) -> None:
+        route = current_route()
+        REQUEST_QUERIES.observe(stats.count, route=route)
+        REQUEST_DB_TIME.observe(stats.duration, route=route)
+
+        repeated = stats.repeated(self.repeated_statement_threshold)
+        if repeated:
+            REPEATED_STATEMENTS.inc(route=route)
+            statement, count = repeated[0]
+            logger.warning(
+                "Possible N+1 on %s: statement ran %d times: %s",
+                route,
+                count,
+                " ".join(statement.split())[:200],
+            )
+
+
+class ServerTiming:
+    """Time named sections of a request for a ``Server-Timing`` header.
+
+    Each section records its duration and, inside a request, how many SQL
+    statements it issued, so browser devtools and curl show where an
+    aggregate endpoint spends its time.
+    """
+
+    def __init__(self):
+        self.sections: list[tuple[str, float, int]] = []
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        stats = current_query_stats()
+        queries = stats.count if stats else 0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            queries = (stats.count if stats else 0) - queries
+            self.sections.append((name, elapsed, queries))
+
+    def header(self) -> str:
+        return ", ".join(
+            f'{name};desc="{queries} queries";dur={elapsed * 1000:.2f}'
+            for name, elapsed, queries in self.sections
+        )
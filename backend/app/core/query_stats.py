@@ -0,0 +1,99 @@
+"""Per-request SQL statement accounting.
+
+Cursor-level listeners on every Engine count the statements issued and the
+time spent in the database. Statements are attributed to the request being
+served through a context variable set by ``RequestContextMiddleware``; tests
+can also collect everything executed in a block with ``count_queries``.
+"""
+
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass
+class QueryStats:
+    """Statements executed and time spent in the database."""
+
+    count: int = 0
+    duration: float = 0.0
+    statements: Counter[str] = field(default_factory=Counter)
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.duration += elapsed
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements executed at least ``threshold`` times (likely N+1 loops)."""
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+_request_stats: ContextVar[QueryStats | None] = ContextVar(
+    "request_query_stats", default=None
+)
+_collectors: list[QueryStats] = []
+
+
+def current_query_stats() -> QueryStats | None:
+    """Return the stats of the request being served, if any."""
+    return _request_stats.get()
+
+
+@contextmanager
+def track_request_queries() -> Iterator[QueryStats]:
+    """Attribute statements executed in this context to a fresh QueryStats."""
+    stats = QueryStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """Collect every statement executed in the process while the block runs."""
+    stats = QueryStats()
+    _collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        _collectors.remove(stats)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    for collector in _collectors:
+        collector.record(statement, elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_timer(context):
+    # A failed statement never reaches after_cursor_execute
+    conn = context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
@@ -1,12 +1,15 @@
 from datetime import datetime, timedelta, timezone
 
-from jose import jwt
+from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from app.core.config import get_settings
 
 settings = get_settings()
 
+# The "scope" claim of stream tickets; access tokens have none
+STREAM_TICKET_SCOPE = "stream"
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
@@ -33,3 +36,33 @@ def create_access_token(subject: str, expires_delta: timedelta | None = None) ->
         to_encode, settings.secret_key, algorithm=settings.algorithm
     )
     return encoded_jwt
+
+
+def create_stream_ticket(subject: str) -> str:
+    """Create a short-lived ticket that can only open the notification stream.
+
+    Browsers' EventSource cannot send headers, so the stream takes its
+    credentials in the URL, where access logs and proxies record them. A
+    ticket expires within seconds and is rejected as an access token.
+    """
+    expire = datetime.now(timezone.utc) + timedelta(
+        seconds=settings.stream_ticket_seconds
+    )
+    to_encode = {"exp": expire, "sub": str(subject), "scope": STREAM_TICKET_SCOPE}
+    return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+
+
+def decode_token_subject(token: str) -> str | None:
+    """Return the subject of a valid access token, or None.
+
+    Scoped tokens such as stream tickets are not access tokens and give None.
+    """
+    try:
+        payload = jwt.decode(
+            token, settings.secret_key, algorithms=[settings.algorithm]
+        )
+    except JWTError:
+        return None
+    if payload.get("scope") is not None:
+        return None
+    return payload.get("sub")
@@ -1,6 +1,9 @@
-from fastapi import FastAPI
+import hmac
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from sqlalchemy import text
 
 from app.api.auth import router as auth_router
@@ -13,13 +16,24 @@ from app.api.dashboard import router as dashboard_router
 from app.api.invites import router as invites_router
 from app.api.push import router as push_router
 from app.core.config import get_settings
+from app.core.metrics import registry
+from app.core.middleware import RequestContextMiddleware
+from app.services.stream import fanout_lifespan
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with fanout_lifespan():
+        yield
+
+
 app = FastAPI(
     title=settings.app_name,
     description="Church volunteer rostering application",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Parse CORS origins from config
@@ -38,6 +52,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    RequestContextMiddleware,
+    query_headers=settings.debug,
+    repeated_statement_threshold=settings.db_repeated_statement_threshold,
+)
 
 # Include routers
 app.include_router(auth_router, prefix="/api")
@@ -65,3 +84,27 @@ async def health_check():
             status_code=503,
             content={"status": "unhealthy", "detail": "database unreachable"},
         )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request) -> PlainTextResponse:
+    """Expose this worker's metrics in the Prometheus text format.
+
+    Scrapers authenticate with ``Authorization: Bearer <METRICS_TOKEN>``.
+    The endpoint is off while no token is configured.
+    """
+    token = settings.metrics_token
+    if not token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        credentials.encode(), token.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -10,10 +10,17 @@ from app.models.roster import (
     AssignmentMode,
     AssignmentStatus,
 )
-from app.models.availability import Unavailability
+from app.models.availability import (
+    Unavailability,
+    UnavailabilityRule,
+    UnavailabilityRuleKind,
+)
 from app.models.notification import Notification, NotificationType
 from app.models.invite import Invite
 from app.models.push_subscription import PushSubscription
+from app.models.outbox import OutboxChannel, OutboxMessage, OutboxStatus
+from app.models.reminder import AssignmentReminder
+from app.models.cache import CacheVersion
 
 __all__ = [
     "User",
@@ -31,8 +38,15 @@ __all__ = [
     "AssignmentMode",
     "AssignmentStatus",
     "Unavailability",
+    "UnavailabilityRule",
+    "UnavailabilityRuleKind",
     "Notification",
     "NotificationType",
     "Invite",
     "PushSubscription",
+    "OutboxMessage",
+    "OutboxChannel",
+    "OutboxStatus",
+    "AssignmentReminder",
+    "CacheVersion",
 ]
@@ -1,8 +1,9 @@
+import enum
 import uuid
 from datetime import date
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import Date, ForeignKey, String
+from sqlalchemy import Date, Enum, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -16,6 +17,7 @@ class Unavailability(Base, UUIDMixin, TimestampMixin):
     """Unavailability model - dates when a user cannot serve."""
 
     __tablename__ = "unavailabilities"
+    __table_args__ = (Index("ix_unavailabilities_user_id_date", "user_id", "date"),)
 
     user_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), nullable=False
@@ -25,3 +27,41 @@ class Unavailability(Base, UUIDMixin, TimestampMixin):
 
     # Relationships
     user: Mapped["User"] = relationship(back_populates="unavailabilities")
+
+
+class UnavailabilityRuleKind(str, enum.Enum):
+    """How an unavailability rule repeats."""
+
+    RANGE = "range"  # Every day from start_date to end_date
+    WEEKLY = "weekly"  # Every weekday
+    MONTHLY_NTH_WEEKDAY = "monthly_nth_weekday"  # e.g. every 2nd Sunday
+
+
+class UnavailabilityRule(Base, UUIDMixin, TimestampMixin):
+    """A span or recurrence of dates when a user cannot serve.
+
+    Stored as one row however many dates it covers, and evaluated against
+    the dates being queried rather than expanded to per-day rows.
+    """
+
+    __tablename__ = "unavailability_rules"
+    __table_args__ = (
+        Index("ix_unavailability_rules_user_id_start_date", "user_id", "start_date"),
+    )
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    kind: Mapped[UnavailabilityRuleKind] = mapped_column(
+        Enum(UnavailabilityRuleKind), nullable=False
+    )
+    start_date: Mapped[date] = mapped_column(Date, nullable=False)
+    # Open-ended when null (recurring rules only)
+    end_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    weekday: Mapped[Optional[int]] = mapped_column(
+        Integer, nullable=True
+    )  # 0=Mon..6=Sun (Python weekday)
+    week_number: Mapped[Optional[int]] = mapped_column(
+        Integer, nullable=True
+    )  # 1-4 or 5=last
+    reason: Mapped[str | None] = mapped_column(String(500), nullable=True)
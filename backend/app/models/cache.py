@@ -0,0 +1,129 @@
+"""Cache version counters, and the flush listener that keeps them current.
+
+The listener lives with the models rather than with the endpoints that
+read the counters, so that any process that writes through the ORM (API,
+workers, scripts) bumps them: importing any model imports this module.
+"""
+
+import uuid
+from collections.abc import Iterable
+
+from sqlalchemy import BigInteger, String, event, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from app.core.database import Base
+from app.models.invite import Invite
+from app.models.organisation import Organisation, OrganisationMember
+from app.models.roster import Assignment, EventAssignment, Roster, RosterEvent
+from app.models.team import Team, TeamMember
+from app.models.user import User
+
+TEAM = "team"
+USER = "user"
+
+
+class CacheVersion(Base):
+    """Change counter behind the ETags of cached read endpoints.
+
+    One row per team or user, bumped in the same transaction as any write
+    that changes what their cached responses show. A row that does not
+    exist yet counts as version 0.
+    """
+
+    __tablename__ = "cache_versions"
+
+    scope: Mapped[str] = mapped_column(String(16), primary_key=True)  # team, user
+    scope_id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=1)
+
+
+def _changed(session: Session) -> Iterable[object]:
+    yield from session.new
+    yield from session.deleted
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            yield obj
+
+
+@event.listens_for(Session, "before_flush")
+def bump_versions(session: Session, flush_context, instances) -> None:
+    team_ids: set[uuid.UUID] = set()
+    user_ids: set[uuid.UUID] = set()
+    roster_ids: set[uuid.UUID] = set()
+    event_ids: set[uuid.UUID] = set()
+    org_ids: set[uuid.UUID] = set()
+    member_ids: set[uuid.UUID] = set()  # Users shown in their teams' responses
+
+    for obj in _changed(session):
+        if isinstance(obj, (Team, Invite)):
+            team_ids.add(obj.id if isinstance(obj, Team) else obj.team_id)
+        elif isinstance(obj, TeamMember):
+            team_ids.add(obj.team_id)
+            user_ids.add(obj.user_id)
+        elif isinstance(obj, OrganisationMember):
+            user_ids.add(obj.user_id)
+        elif isinstance(obj, Organisation):
+            org_ids.add(obj.id)
+        elif isinstance(obj, Roster):
+            team_ids.add(obj.team_id)
+        elif isinstance(obj, RosterEvent):
+            roster_ids.add(obj.roster_id)
+        elif isinstance(obj, EventAssignment):
+            user_ids.add(obj.user_id)
+            event_ids.add(obj.event_id)
+        elif isinstance(obj, Assignment):
+            user_ids.add(obj.user_id)
+            roster_ids.add(obj.roster_id)
+        elif isinstance(obj, User) and obj not in session.new:
+            user_ids.add(obj.id)
+            member_ids.add(obj.id)
+
+    # Objects added in this flush may not have their keys yet; the ones that
+    # do not are new, so nothing cached can show them
+    roster_ids.discard(None)
+    event_ids.discard(None)
+    org_ids.discard(None)
+    member_ids.discard(None)
+    lookups = []
+    if roster_ids:
+        lookups.append(select(Roster.team_id).where(Roster.id.in_(roster_ids)))
+    if event_ids:
+        lookups.append(
+            select(Roster.team_id)
+            .join(RosterEvent)
+            .where(RosterEvent.id.in_(event_ids))
+        )
+    if org_ids:
+        lookups.append(select(Team.id).where(Team.organisation_id.in_(org_ids)))
+    if member_ids:
+        lookups.append(
+            select(TeamMember.team_id).where(TeamMember.user_id.in_(member_ids))
+        )
+    for lookup in lookups:
+        team_ids.update(session.execute(lookup).scalars())
+
+    team_ids.discard(None)
+    user_ids.discard(None)
+    if not team_ids and not user_ids:
+        return
+
+    # Sorted so concurrent transactions lock the rows in the same order
+    rows = [
+        {"scope": scope, "scope_id": scope_id, "version": 1}
+        for scope, ids in ((TEAM, team_ids), (USER, user_ids))
+        for scope_id in sorted(ids)
+    ]
+    insert = (
+        postgresql_insert
+        if session.get_bind().dialect.name == "postgresql"
+        else sqlite_insert
+    )
+    statement = insert(CacheVersion).values(rows)
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[CacheVersion.scope, CacheVersion.scope_id],
+            set_={"version": CacheVersion.version + 1},
+        )
+    )
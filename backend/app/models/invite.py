@@ -3,7 +3,7 @@ from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 import secrets
 
-from sqlalchemy import String, ForeignKey, DateTime
+from sqlalchemy import String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -29,6 +29,11 @@ class Invite(Base, UUIDMixin, TimestampMixin):
     """
 
     __tablename__ = "invites"
+    __table_args__ = (
+        Index("ix_invites_team_id_user_id", "team_id", "user_id"),
+        # Pending invites for an email, on the home screen
+        Index("ix_invites_email_accepted_at", "email", "accepted_at"),
+    )
 
     # The team the user is being invited to
     team_id: Mapped[uuid.UUID] = mapped_column(
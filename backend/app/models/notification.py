@@ -3,7 +3,7 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import DateTime, Enum, ForeignKey, String, Text
+from sqlalchemy import DateTime, Enum, ForeignKey, Index, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -30,6 +30,20 @@ class Notification(Base, UUIDMixin, TimestampMixin):
     """Notification model - in-app notifications for users."""
 
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index(
+            "ix_notifications_user_id_read_at_created_at",
+            "user_id",
+            "read_at",
+            "created_at",
+        ),
+        # Keyset pagination of the inbox, newest first
+        Index("ix_notifications_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Retention purge of old read notifications
+        Index("ix_notifications_created_at", "created_at"),
+        # Notifications already sent about the same assignment
+        Index("ix_notifications_type_reference_id", "type", "reference_id"),
+    )
 
     user_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), nullable=False
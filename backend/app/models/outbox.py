@@ -0,0 +1,57 @@
+import enum
+import uuid
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, Enum, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+from app.models.base import TimestampMixin, UUIDMixin, utc_now
+
+
+class OutboxChannel(str, enum.Enum):
+    """Delivery channels handled by the outbox dispatcher."""
+
+    EMAIL = "email"
+    PUSH = "push"
+
+
+class OutboxStatus(str, enum.Enum):
+    """Lifecycle of an outbox message."""
+
+    PENDING = "pending"
+    SENT = "sent"
+    DEAD = "dead"  # Gave up after too many failed attempts
+
+
+class OutboxMessage(Base, UUIDMixin, TimestampMixin):
+    """Outbox message - an email or push queued for delivery.
+
+    Rows are written in the same transaction as the change that triggered
+    them, so a notification is only delivered if that change committed.
+    The dispatcher worker (``python -m app.workers.outbox``) drains them.
+    """
+
+    __tablename__ = "outbox_messages"
+    __table_args__ = (
+        Index("ix_outbox_messages_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    channel: Mapped[OutboxChannel] = mapped_column(Enum(OutboxChannel), nullable=False)
+    user_id: Mapped[uuid.UUID | None] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=True
+    )
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    # Notification type for messages merged into per-user digests
+    digest_key: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    status: Mapped[OutboxStatus] = mapped_column(
+        Enum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=utc_now, nullable=False
+    )
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    sent_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
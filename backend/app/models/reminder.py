@@ -0,0 +1,31 @@
+import uuid
+
+from sqlalchemy import ForeignKey, Integer, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+from app.models.base import TimestampMixin, UUIDMixin
+
+
+class AssignmentReminder(Base, UUIDMixin, TimestampMixin):
+    """Assignment reminder ledger - one row per reminder sent.
+
+    The reminder scheduler anti-joins against this table to find reminders
+    that are due but not yet sent; the unique constraint stops two
+    schedulers from sending the same reminder twice.
+    """
+
+    __tablename__ = "assignment_reminders"
+    __table_args__ = (
+        UniqueConstraint(
+            "event_assignment_id",
+            "lead_days",
+            name="uq_assignment_reminders_event_assignment_id_lead_days",
+        ),
+    )
+
+    event_assignment_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("event_assignments.id", ondelete="CASCADE"), nullable=False
+    )
+    # Which configured lead time (days before the event) this reminder was for
+    lead_days: Mapped[int] = mapped_column(Integer, nullable=False)
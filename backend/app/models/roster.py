@@ -3,7 +3,7 @@ import uuid
 from datetime import date
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import Boolean, Date, Enum, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, Date, Enum, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -44,6 +44,7 @@ class Roster(Base, UUIDMixin, TimestampMixin):
     """Roster model - a recurring schedule template."""
 
     __tablename__ = "rosters"
+    __table_args__ = (Index("ix_rosters_team_id", "team_id"),)
 
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     team_id: Mapped[uuid.UUID] = mapped_column(
@@ -95,6 +96,10 @@ class RosterEvent(Base, UUIDMixin, TimestampMixin):
     """
 
     __tablename__ = "roster_events"
+    __table_args__ = (
+        Index("ix_roster_events_roster_id_date", "roster_id", "date"),
+        Index("ix_roster_events_date", "date"),
+    )
 
     roster_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("rosters.id", ondelete="CASCADE"), nullable=False
@@ -139,6 +144,10 @@ class EventAssignment(Base, UUIDMixin, TimestampMixin):
     """Assignment to a specific roster event."""
 
     __tablename__ = "event_assignments"
+    __table_args__ = (
+        Index("ix_event_assignments_user_id", "user_id"),
+        Index("ix_event_assignments_event_id_status", "event_id", "status"),
+    )
 
     event_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("roster_events.id", ondelete="CASCADE"), nullable=False
@@ -2,7 +2,7 @@ import enum
 import uuid
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Enum, ForeignKey, String, UniqueConstraint, JSON
+from sqlalchemy import Enum, ForeignKey, Index, String, UniqueConstraint, JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -50,7 +50,11 @@ class TeamMember(Base, TimestampMixin):
     """Association table for users belonging to teams with roles."""
 
     __tablename__ = "team_members"
-    __table_args__ = (UniqueConstraint("user_id", "team_id", name="uq_user_team"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "team_id", name="uq_user_team"),
+        # The primary key leads with user_id, so lookups by team need their own
+        Index("ix_team_members_team_id", "team_id"),
+    )
 
     user_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
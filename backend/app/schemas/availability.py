@@ -1,7 +1,9 @@
 import uuid
 from datetime import date, datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from app.models.availability import UnavailabilityRuleKind
 
 
 class UnavailabilityCreate(BaseModel):
@@ -23,11 +25,89 @@ class UnavailabilityResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class UnavailabilityRuleCreate(BaseModel):
+    """Schema for creating a date range or recurring unavailability."""
+
+    kind: UnavailabilityRuleKind
+    start_date: date
+    end_date: date | None = None  # Required for ranges; open-ended otherwise
+    # Frontend sends 0=Sunday, 6=Saturday; converted to Python weekday in service
+    weekday: int | None = Field(None, ge=0, le=6)
+    week_number: int | None = Field(None, ge=1, le=5)  # 1-4 or 5=last
+    reason: str | None = None
+
+    @model_validator(mode="after")
+    def validate_rule_fields(self):
+        if self.end_date is not None and self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        if self.kind == UnavailabilityRuleKind.RANGE:
+            if self.end_date is None:
+                raise ValueError("end_date is required for range rules")
+            if self.weekday is not None or self.week_number is not None:
+                raise ValueError("range rules do not take weekday or week_number")
+        elif self.weekday is None:
+            raise ValueError("weekday is required for recurring rules")
+        if self.kind == UnavailabilityRuleKind.MONTHLY_NTH_WEEKDAY:
+            if self.week_number is None:
+                raise ValueError(
+                    "week_number is required for monthly_nth_weekday rules"
+                )
+        elif (
+            self.kind == UnavailabilityRuleKind.WEEKLY and self.week_number is not None
+        ):
+            raise ValueError("weekly rules do not take week_number")
+        return self
+
+
+class UnavailabilityRuleBulkCreate(BaseModel):
+    """Schema for creating several unavailability rules at once."""
+
+    rules: list[UnavailabilityRuleCreate] = Field(min_length=1, max_length=100)
+
+
+class UnavailabilityRuleBulkDelete(BaseModel):
+    """Schema for deleting several unavailability rules at once."""
+
+    ids: list[uuid.UUID] = Field(min_length=1, max_length=500)
+
+
+class UnavailabilityRuleBulkDeleteResponse(BaseModel):
+    """Schema for the result of deleting several unavailability rules."""
+
+    deleted: int
+
+
+class UnavailabilityRuleResponse(BaseModel):
+    """Schema for unavailability rule response."""
+
+    id: uuid.UUID
+    user_id: uuid.UUID
+    kind: UnavailabilityRuleKind
+    start_date: date
+    end_date: date | None
+    weekday: int | None  # 0=Sunday, 6=Saturday, as sent
+    week_number: int | None
+    reason: str | None
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+    @field_validator("weekday")
+    @classmethod
+    def to_frontend_weekday(cls, weekday: int | None) -> int | None:
+        return None if weekday is None else (weekday + 1) % 7
+
+
 class ConflictResponse(BaseModel):
-    """Schema for conflict response."""
+    """Schema for an upcoming assignment on a date the member is unavailable."""
 
-    assignment_id: uuid.UUID
-    unavailability_id: uuid.UUID
+    assignment_id: uuid.UUID  # The event assignment
+    event_id: uuid.UUID
+    user_id: uuid.UUID
+    user_name: str
+    unavailability_id: uuid.UUID  # The single date or the rule
+    # "date", or the kind of rule: "range", "weekly" or "monthly_nth_weekday"
+    unavailability_kind: str
     date: date
     roster_name: str
     team_name: str
@@ -4,6 +4,10 @@ from datetime import date, datetime
 from pydantic import BaseModel
 
 from app.models.roster import AssignmentStatus
+from app.schemas.invite import PendingInviteResponse
+from app.schemas.notification import NotificationResponse
+from app.schemas.roster import EventAssignmentResponse, RosterEventResponse
+from app.schemas.team import TeamWithRole
 
 
 class UpcomingAssignment(BaseModel):
@@ -25,6 +29,25 @@ class CalendarDay(BaseModel):
     assignments: list[UpcomingAssignment]
 
 
+class CalendarEntry(BaseModel):
+    """Schema for one event assignment in the sparse calendar."""
+
+    id: uuid.UUID
+    event_id: uuid.UUID
+    status: AssignmentStatus
+    roster_name: str
+    team_name: str
+    organisation_name: str
+
+
+class EventCalendar(BaseModel):
+    """Schema for the sparse calendar: only dates with assignments appear."""
+
+    start_date: date
+    end_date: date
+    days: dict[date, list[CalendarEntry]]
+
+
 class TeamMemberAvailability(BaseModel):
     """Schema for team member availability."""
 
@@ -33,3 +56,31 @@ class TeamMemberAvailability(BaseModel):
     user_email: str
     is_available: bool
     unavailability_reason: str | None
+
+
+class TeamMemberUnavailableDays(BaseModel):
+    """One team member's row of the availability grid."""
+
+    user_id: uuid.UUID
+    user_name: str
+    # Hex bitset: bit n is set when unavailable on start_date + n days
+    unavailable: str
+
+
+class TeamAvailabilityMatrix(BaseModel):
+    """Schema for team member x date availability."""
+
+    start_date: date
+    end_date: date
+    members: list[TeamMemberUnavailableDays]
+
+
+class HomeSummary(BaseModel):
+    """Schema for everything the home screen shows, in one response."""
+
+    assignments: list[EventAssignmentResponse]  # Upcoming, from today
+    unfilled_events: list[RosterEventResponse]  # Across teams the user leads
+    notifications: list[NotificationResponse]
+    unread_count: int
+    pending_invites: list[PendingInviteResponse]
+    teams: list[TeamWithRole]
@@ -29,3 +29,23 @@ class NotificationResponse(BaseModel):
     created_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class NotificationPage(BaseModel):
+    """A page of the notification inbox."""
+
+    items: list[NotificationResponse]
+    next_cursor: str | None = None  # Pass back as ?cursor= for the next page
+
+
+class StreamTicket(BaseModel):
+    """A short-lived credential for opening the notification stream."""
+
+    ticket: str
+    expires_in: int  # Seconds
+
+
+class UnreadCount(BaseModel):
+    """Number of unread notifications."""
+
+    count: int
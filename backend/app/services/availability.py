@@ -1,13 +1,129 @@
+import calendar
 import uuid
-from datetime import date
+from collections.abc import Iterable
+from datetime import date, timedelta
 
-from sqlalchemy import and_, select
+from sqlalchemy import (
+    ColumnElement,
+    Select,
+    Subquery,
+    and_,
+    cast,
+    delete,
+    false,
+    insert,
+    literal,
+    null,
+    or_,
+    select,
+    true,
+    union,
+    union_all,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from app.models.availability import Unavailability
-from app.models.roster import Assignment, Roster
-from app.schemas.availability import UnavailabilityCreate
+from app.models.availability import (
+    Unavailability,
+    UnavailabilityRule,
+    UnavailabilityRuleKind,
+)
+from app.models.roster import AssignmentStatus, EventAssignment, Roster, RosterEvent
+from app.models.team import Team, TeamMember
+from app.models.user import User
+from app.schemas.availability import (
+    ConflictResponse,
+    UnavailabilityCreate,
+    UnavailabilityRuleCreate,
+)
+from app.services.roster import frontend_day_to_python_weekday
+
+
+def _week_numbers(day: date) -> list[int]:
+    """The week_number values a monthly_nth_weekday rule must have to match day.
+
+    The 1st-4th occurrence of a weekday is its week number; the last
+    occurrence in the month also matches 5 ("last").
+    """
+    numbers = [(day.day - 1) // 7 + 1]
+    if day.day + 7 > calendar.monthrange(day.year, day.month)[1]:
+        numbers.append(5)
+    return numbers
+
+
+def rule_covers(day: date) -> ColumnElement[bool]:
+    """SQL condition: the unavailability rule includes this date."""
+    weekday_matches = UnavailabilityRule.weekday == day.weekday()
+    return and_(
+        UnavailabilityRule.start_date <= day,
+        or_(UnavailabilityRule.end_date.is_(None), UnavailabilityRule.end_date >= day),
+        or_(
+            UnavailabilityRule.kind == UnavailabilityRuleKind.RANGE,
+            and_(
+                UnavailabilityRule.kind == UnavailabilityRuleKind.WEEKLY,
+                weekday_matches,
+            ),
+            and_(
+                UnavailabilityRule.kind == UnavailabilityRuleKind.MONTHLY_NTH_WEEKDAY,
+                weekday_matches,
+                UnavailabilityRule.week_number.in_(_week_numbers(day)),
+            ),
+        ),
+    )
+
+
+def rule_occurs_on(rule: UnavailabilityRule, day: date) -> bool:
+    """Whether the unavailability rule includes this date (see rule_covers)."""
+    if day < rule.start_date or (rule.end_date is not None and day > rule.end_date):
+        return False
+    if rule.kind == UnavailabilityRuleKind.RANGE:
+        return True
+    if day.weekday() != rule.weekday:
+        return False
+    if rule.kind == UnavailabilityRuleKind.WEEKLY:
+        return True
+    return rule.week_number in _week_numbers(day)
+
+
+def _unavailability_entries(
+    user_ids: Select, start_date: date, end_date: date | None = None
+) -> Subquery:
+    """Rules and single dates of some users overlapping a range, as one subquery.
+
+    Single dates appear as one-day range rules with ``is_rule`` false, so
+    both are matched the same way with rule_occurs_on.
+    """
+    rules = select(
+        UnavailabilityRule.id,
+        UnavailabilityRule.user_id,
+        UnavailabilityRule.kind,
+        UnavailabilityRule.start_date,
+        UnavailabilityRule.end_date,
+        UnavailabilityRule.weekday,
+        UnavailabilityRule.week_number,
+        UnavailabilityRule.reason,
+        true().label("is_rule"),
+    ).where(
+        UnavailabilityRule.user_id.in_(user_ids),
+        or_(
+            UnavailabilityRule.end_date.is_(None),
+            UnavailabilityRule.end_date >= start_date,
+        ),
+    )
+    single_dates = select(
+        Unavailability.id,
+        Unavailability.user_id,
+        cast(literal(UnavailabilityRuleKind.RANGE.name), UnavailabilityRule.kind.type),
+        Unavailability.date,
+        Unavailability.date,
+        null(),
+        null(),
+        Unavailability.reason,
+        false(),
+    ).where(Unavailability.user_id.in_(user_ids), Unavailability.date >= start_date)
+    if end_date is not None:
+        rules = rules.where(UnavailabilityRule.start_date <= end_date)
+        single_dates = single_dates.where(Unavailability.date <= end_date)
+    return union_all(rules, single_dates).subquery()
 
 
 class AvailabilityService:
@@ -57,57 +173,353 @@ class AvailabilityService:
         await self.db.delete(unavailability)
         return True
 
-    async def check_user_conflicts(
-        self, user_id: uuid.UUID
-    ) -> list[tuple[Assignment, Unavailability]]:
-        """Check for conflicts between assignments and unavailabilities for a user."""
-        # Get all assignments for the user
-        assignments_result = await self.db.execute(
-            select(Assignment)
-            .options(selectinload(Assignment.roster).selectinload(Roster.team))
-            .where(Assignment.user_id == user_id)
+    async def create_rules(
+        self, user_id: uuid.UUID, items: list[UnavailabilityRuleCreate]
+    ) -> list[UnavailabilityRule]:
+        """Create date range and recurring unavailability rules for a user.
+
+        All rules go in with one multi-row INSERT ... RETURNING.
+
+        Returns:
+            The created rules, in the order of ``items``
+        """
+        rows = []
+        for item in items:
+            row = item.model_dump()
+            row["user_id"] = user_id
+            if item.weekday is not None:
+                row["weekday"] = frontend_day_to_python_weekday(item.weekday)
+            rows.append(row)
+        result = await self.db.scalars(
+            insert(UnavailabilityRule).returning(
+                UnavailabilityRule, sort_by_parameter_order=True
+            ),
+            rows,
         )
-        assignments = list(assignments_result.scalars().all())
+        return list(result.all())
 
-        # Get all unavailabilities for the user
-        unavailabilities_result = await self.db.execute(
-            select(Unavailability).where(Unavailability.user_id == user_id)
+    async def get_user_rules(
+        self,
+        user_id: uuid.UUID,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> list[UnavailabilityRule]:
+        """Get a user's unavailability rules that overlap a date range."""
+        query = select(UnavailabilityRule).where(UnavailabilityRule.user_id == user_id)
+        if start_date:
+            query = query.where(
+                or_(
+                    UnavailabilityRule.end_date.is_(None),
+                    UnavailabilityRule.end_date >= start_date,
+                )
+            )
+        if end_date:
+            query = query.where(UnavailabilityRule.start_date <= end_date)
+        query = query.order_by(UnavailabilityRule.start_date, UnavailabilityRule.id)
+        result = await self.db.execute(query)
+        return list(result.scalars().all())
+
+    async def delete_rules(self, user_id: uuid.UUID, rule_ids: list[uuid.UUID]) -> int:
+        """Delete several of a user's unavailability rules in one statement.
+
+        Ids that do not exist or belong to someone else are ignored.
+
+        Returns:
+            The number of rules deleted
+        """
+        result = await self.db.execute(
+            delete(UnavailabilityRule).where(
+                UnavailabilityRule.user_id == user_id,
+                UnavailabilityRule.id.in_(rule_ids),
+            )
         )
-        unavailabilities = list(unavailabilities_result.scalars().all())
+        return result.rowcount
 
-        # Find conflicts (same date)
-        conflicts = []
-        for assignment in assignments:
-            for unavailability in unavailabilities:
-                if assignment.date == unavailability.date:
-                    conflicts.append((assignment, unavailability))
+    async def delete_rule(self, user_id: uuid.UUID, rule_id: uuid.UUID) -> bool:
+        """Delete one of a user's unavailability rules in one statement.
+
+        Returns:
+            False if the rule does not exist or belongs to someone else
+        """
+        result = await self.db.execute(
+            delete(UnavailabilityRule).where(
+                UnavailabilityRule.user_id == user_id,
+                UnavailabilityRule.id == rule_id,
+            )
+        )
+        return result.rowcount > 0
+
+    async def get_unavailable_user_ids(
+        self, user_ids: Iterable[uuid.UUID], day: date
+    ) -> set[uuid.UUID]:
+        """Which of the users are unavailable on a date, by date or by rule."""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return set()
+        result = await self.db.execute(
+            union(
+                select(Unavailability.user_id).where(
+                    Unavailability.date == day, Unavailability.user_id.in_(user_ids)
+                ),
+                select(UnavailabilityRule.user_id).where(
+                    rule_covers(day), UnavailabilityRule.user_id.in_(user_ids)
+                ),
+            )
+        )
+        return set(result.scalars().all())
+
+    async def get_unavailable_dates(
+        self, user_ids: Iterable[uuid.UUID], days: Iterable[date]
+    ) -> set[tuple[uuid.UUID, date]]:
+        """Which (user, date) pairs are unavailable, by date or by rule.
+
+        Rules overlapping the dates are loaded once and matched in Python,
+        so the cost does not grow with how many days they span.
+        """
+        user_ids, days = list(user_ids), sorted(set(days))
+        if not user_ids or not days:
+            return set()
+
+        result = await self.db.execute(
+            select(Unavailability.user_id, Unavailability.date).where(
+                Unavailability.date.in_(days), Unavailability.user_id.in_(user_ids)
+            )
+        )
+        unavailable = {(user_id, day) for user_id, day in result.all()}
 
+        result = await self.db.execute(
+            select(UnavailabilityRule).where(
+                UnavailabilityRule.user_id.in_(user_ids),
+                UnavailabilityRule.start_date <= days[-1],
+                or_(
+                    UnavailabilityRule.end_date.is_(None),
+                    UnavailabilityRule.end_date >= days[0],
+                ),
+            )
+        )
+        for rule in result.scalars():
+            unavailable.update(
+                (rule.user_id, day) for day in days if rule_occurs_on(rule, day)
+            )
+        return unavailable
+
+    async def check_user_conflicts(self, user_id: uuid.UUID) -> list[ConflictResponse]:
+        """Find the user's upcoming assignments on dates they are unavailable."""
+        return await self._find_conflicts(EventAssignment.user_id == user_id)
+
+    async def check_team_conflicts(self, team_id: uuid.UUID) -> list[ConflictResponse]:
+        """Find all upcoming conflicts in a team's rosters, in one query."""
+        return await self._find_conflicts(Roster.team_id == team_id)
+
+    async def find_conflicts(
+        self,
+        unavailable: Iterable[tuple[uuid.UUID, date, date | None]] = (),
+        assignment_ids: Iterable[uuid.UUID] = (),
+    ) -> list[ConflictResponse]:
+        """Find the conflicts a write may have introduced, in one query.
+
+        Only the given assignments and the assignments of each user within
+        the given date range (open-ended when the end is None) are checked.
+
+        Args:
+            unavailable: (user_id, start_date, end_date) just marked unavailable
+            assignment_ids: Event assignments just created or accepted
+        """
+        conditions = [
+            and_(
+                EventAssignment.user_id == user_id,
+                RosterEvent.date >= start_date,
+                *([RosterEvent.date <= end_date] if end_date is not None else []),
+            )
+            for user_id, start_date, end_date in unavailable
+        ]
+        assignment_ids = list(assignment_ids)
+        if assignment_ids:
+            conditions.append(EventAssignment.id.in_(assignment_ids))
+        if not conditions:
+            return []
+        return await self._find_conflicts(or_(*conditions))
+
+    async def _find_conflicts(
+        self, condition: ColumnElement[bool]
+    ) -> list[ConflictResponse]:
+        """Join upcoming, not declined event assignments to unavailability.
+
+        The join on user and date range is done in SQL; recurring rules in
+        the range are then narrowed to their weekdays with rule_occurs_on.
+        """
+        today = date.today()
+        entries = _unavailability_entries(
+            select(EventAssignment.user_id)
+            .join(EventAssignment.event)
+            .join(RosterEvent.roster)
+            .where(condition, RosterEvent.date >= today),
+            today,
+        )
+        result = await self.db.execute(
+            select(
+                EventAssignment.id,
+                EventAssignment.event_id,
+                EventAssignment.user_id,
+                User.name,
+                RosterEvent.date,
+                Roster.name,
+                Team.name,
+                entries.c.id,
+                entries.c.kind,
+                entries.c.start_date,
+                entries.c.end_date,
+                entries.c.weekday,
+                entries.c.week_number,
+                entries.c.reason,
+                entries.c.is_rule,
+            )
+            .join(EventAssignment.event)
+            .join(RosterEvent.roster)
+            .join(Roster.team)
+            .join(User, User.id == EventAssignment.user_id)
+            .join(
+                entries,
+                and_(
+                    entries.c.user_id == EventAssignment.user_id,
+                    entries.c.start_date <= RosterEvent.date,
+                    or_(
+                        entries.c.end_date.is_(None),
+                        entries.c.end_date >= RosterEvent.date,
+                    ),
+                ),
+            )
+            .where(
+                condition,
+                RosterEvent.date >= today,
+                RosterEvent.is_cancelled.is_(False),
+                EventAssignment.status != AssignmentStatus.DECLINED,
+            )
+            .order_by(RosterEvent.date, User.name, EventAssignment.id)
+        )
+
+        conflicts = []
+        for row in result.all():
+            (
+                assignment_id,
+                event_id,
+                user_id,
+                user_name,
+                event_date,
+                roster_name,
+                team_name,
+                entry_id,
+                kind,
+                start,
+                end,
+                weekday,
+                week_number,
+                reason,
+                is_rule,
+            ) = row
+            rule = UnavailabilityRule(
+                kind=kind,
+                start_date=start,
+                end_date=end,
+                weekday=weekday,
+                week_number=week_number,
+            )
+            if not rule_occurs_on(rule, event_date):
+                continue
+            conflicts.append(
+                ConflictResponse(
+                    assignment_id=assignment_id,
+                    event_id=event_id,
+                    user_id=user_id,
+                    user_name=user_name,
+                    date=event_date,
+                    roster_name=roster_name,
+                    team_name=team_name,
+                    unavailability_id=entry_id,
+                    unavailability_kind=kind.value if is_rule else "date",
+                    reason=reason,
+                )
+            )
         return conflicts
 
+    async def get_team_unavailability(
+        self, team_id: uuid.UUID, start_date: date, end_date: date
+    ) -> list[tuple[User, list[UnavailabilityRule]]]:
+        """Get each team member with their unavailability overlapping a range.
+
+        Single dates come back as one-day range rules alongside the real
+        rules, so callers match both with rule_occurs_on. Members and their
+        entries are loaded in one query, members ordered by name.
+        """
+        entries = _unavailability_entries(
+            select(TeamMember.user_id).where(TeamMember.team_id == team_id),
+            start_date,
+            end_date,
+        )
+
+        result = await self.db.execute(
+            select(
+                User,
+                entries.c.kind,
+                entries.c.start_date,
+                entries.c.end_date,
+                entries.c.weekday,
+                entries.c.week_number,
+                entries.c.reason,
+            )
+            .select_from(TeamMember)
+            .join(User, User.id == TeamMember.user_id)
+            .outerjoin(entries, entries.c.user_id == TeamMember.user_id)
+            .where(TeamMember.team_id == team_id)
+            .order_by(User.name, User.id)
+        )
+
+        members: dict[uuid.UUID, tuple[User, list[UnavailabilityRule]]] = {}
+        for user, kind, start, end, weekday, week_number, reason in result.all():
+            _, rules = members.setdefault(user.id, (user, []))
+            if kind is not None:
+                rules.append(
+                    UnavailabilityRule(
+                        user_id=user.id,
+                        kind=kind,
+                        start_date=start,
+                        end_date=end,
+                        weekday=weekday,
+                        week_number=week_number,
+                        reason=reason,
+                    )
+                )
+        return list(members.values())
+
     async def get_team_availability(
         self, team_id: uuid.UUID, target_date: date
     ) -> dict[uuid.UUID, bool]:
         """Get availability status for all team members on a specific date."""
-        from app.models.team import TeamMember
+        members = await self.get_team_unavailability(team_id, target_date, target_date)
+        return {
+            user.id: not any(rule_occurs_on(rule, target_date) for rule in rules)
+            for user, rules in members
+        }
 
-        # Get all team members
-        members_result = await self.db.execute(
-            select(TeamMember).where(TeamMember.team_id == team_id)
-        )
-        members = list(members_result.scalars().all())
-
-        # Check unavailability for each member on the target date
-        availability = {}
-        for member in members:
-            unavail_result = await self.db.execute(
-                select(Unavailability).where(
-                    and_(
-                        Unavailability.user_id == member.user_id,
-                        Unavailability.date == target_date,
-                    )
-                )
-            )
-            is_unavailable = unavail_result.scalar_one_or_none() is not None
-            availability[member.user_id] = not is_unavailable  # True if available
+    async def get_team_availability_matrix(
+        self, team_id: uuid.UUID, start_date: date, end_date: date
+    ) -> list[tuple[User, int]]:
+        """Get each team member's unavailable days in a range as a bitset.
 
-        return availability
+        Bit ``n`` of a member's bitset is set when they are unavailable on
+        ``start_date + n days``.
+        """
+        days = [
+            start_date + timedelta(days=n)
+            for n in range((end_date - start_date).days + 1)
+        ]
+        matrix = []
+        for user, rules in await self.get_team_unavailability(
+            team_id, start_date, end_date
+        ):
+            bits = 0
+            for n, day in enumerate(days):
+                if any(rule_occurs_on(rule, day) for rule in rules):
+                    bits |= 1 << n
+            matrix.append((user, bits))
+        return matrix
@@ -0,0 +1,78 @@
+"""ETags for conditional GETs on read-heavy endpoints.
+
+Every flush that touches something a cached response shows bumps the
+``cache_versions`` counters of the affected teams and users (see
+``app.models.cache``). A cached endpoint reads the counters it depends on
+with one small query, derives an ETag from them and answers ``304 Not
+Modified`` when the client already has that version, skipping its main
+queries.
+
+The counters are read before the endpoint's data. A write committing in
+between can at worst pair newer data with an older ETag, which only costs
+the client one more full response on its next poll.
+"""
+
+import hashlib
+import uuid
+from collections.abc import Iterable
+from datetime import date
+
+from sqlalchemy import Select, and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.cache import TEAM, USER, CacheVersion
+
+# Revalidate on every use, and never store in shared caches
+CACHE_CONTROL = "private, no-cache"
+
+
+class CacheService:
+    """Service for cache versions and ETags."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def etag(
+        self, user_id: uuid.UUID, team_ids: Select | Iterable[uuid.UUID] = ()
+    ) -> str:
+        """Get the ETag of a response depending on a user and some teams.
+
+        The user's own counter is always included: it changes with their
+        team and organisation memberships, so a 304 is never served across
+        a change in what they may see. Today's date is included for
+        responses whose default ranges move with it.
+
+        Args:
+            user_id: The requesting user
+            team_ids: Teams the response shows, as IDs or a select of them
+        """
+        if not isinstance(team_ids, Select):
+            team_ids = list(team_ids)
+        result = await self.db.execute(
+            select(CacheVersion.scope, CacheVersion.scope_id, CacheVersion.version)
+            .where(
+                or_(
+                    and_(CacheVersion.scope == USER, CacheVersion.scope_id == user_id),
+                    and_(
+                        CacheVersion.scope == TEAM,
+                        CacheVersion.scope_id.in_(team_ids),
+                    ),
+                )
+            )
+            .order_by(CacheVersion.scope, CacheVersion.scope_id)
+        )
+        versions = ",".join(
+            f"{scope}:{scope_id}:{version}" for scope, scope_id, version in result.all()
+        )
+        digest = hashlib.sha256(
+            f"{user_id}|{date.today()}|{versions}".encode()
+        ).hexdigest()
+        return f'W/"{digest[:20]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header matches the ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag[2:] for tag in tags)
@@ -1,15 +1,38 @@
 import uuid
-from datetime import date, timedelta
 from collections import defaultdict
+from datetime import date, timedelta
 
-from sqlalchemy import and_, select
+from sqlalchemy import and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
 
-from app.models.availability import Unavailability
-from app.models.roster import Assignment
-from app.models.team import TeamMember
-from app.schemas.dashboard import CalendarDay, UpcomingAssignment
+from app.core.permissions import TeamPermission
+from app.models.invite import Invite
+from app.models.organisation import Organisation
+from app.models.roster import (
+    Assignment,
+    AssignmentStatus,
+    EventAssignment,
+    Roster,
+    RosterEvent,
+)
+from app.models.team import Team, TeamMember, TeamRole
+from app.models.user import User
+from app.schemas.dashboard import (
+    CalendarDay,
+    TeamAvailabilityMatrix,
+    TeamMemberUnavailableDays,
+    UpcomingAssignment,
+)
+from app.schemas.invite import PendingInviteResponse
+from app.schemas.roster import (
+    EventAssignmentResponse,
+    EventAssignmentSummary,
+    RosterEventResponse,
+)
+from app.schemas.team import TeamWithRole
+from app.services.availability import AvailabilityService, rule_occurs_on
+from app.services.roster import RosterService
 
 
 class DashboardService:
@@ -119,36 +142,217 @@ class DashboardService:
 
         return calendar_days
 
+    async def get_event_calendar(
+        self, user_id: uuid.UUID, start_date: date, end_date: date
+    ) -> dict[date, list[dict]]:
+        """Get the user's event assignments in a range, keyed by date.
+
+        One joined query selects just the columns shown; dates without
+        assignments are left out.
+        """
+        result = await self.db.execute(
+            select(
+                RosterEvent.date,
+                EventAssignment.id,
+                EventAssignment.event_id,
+                EventAssignment.status,
+                Roster.name.label("roster_name"),
+                Team.name.label("team_name"),
+                Organisation.name.label("organisation_name"),
+            )
+            .select_from(EventAssignment)
+            .join(EventAssignment.event)
+            .join(RosterEvent.roster)
+            .join(Roster.team)
+            .join(Team.organisation)
+            .where(
+                EventAssignment.user_id == user_id,
+                RosterEvent.date >= start_date,
+                RosterEvent.date <= end_date,
+                RosterEvent.is_cancelled.is_(False),
+            )
+            .order_by(RosterEvent.date, Roster.name, EventAssignment.id)
+        )
+
+        days: dict[date, list[dict]] = defaultdict(list)
+        for row in result.mappings():
+            entry = dict(row)
+            days[entry.pop("date")].append(entry)
+        return days
+
+    async def get_home_teams(self, user_id: uuid.UUID) -> list[TeamWithRole]:
+        """Get the user's teams with their role and member/roster counts.
+
+        The counts are correlated subqueries, so this is a single query.
+        """
+        members = aliased(TeamMember)
+        member_count = (
+            select(func.count())
+            .where(members.team_id == Team.id)
+            .correlate(Team)
+            .scalar_subquery()
+        )
+        roster_count = (
+            select(func.count())
+            .where(Roster.team_id == Team.id)
+            .correlate(Team)
+            .scalar_subquery()
+        )
+        result = await self.db.execute(
+            select(
+                Team,
+                TeamMember.role,
+                TeamMember.permissions,
+                member_count.label("member_count"),
+                roster_count.label("roster_count"),
+            )
+            .join(TeamMember)
+            .where(TeamMember.user_id == user_id)
+            .order_by(Team.name)
+        )
+        return [
+            TeamWithRole(
+                id=team.id,
+                name=team.name,
+                organisation_id=team.organisation_id,
+                role=role,
+                permissions=permissions or [],
+                member_count=members_n,
+                roster_count=rosters_n,
+                created_at=team.created_at,
+            )
+            for team, role, permissions, members_n, rosters_n in result.all()
+        ]
+
+    async def get_home_assignments(
+        self, user: User, start_date: date
+    ) -> list[EventAssignmentResponse]:
+        """Get the user's event assignments from start_date, in one query."""
+        result = await self.db.execute(
+            select(
+                EventAssignment,
+                RosterEvent.date,
+                Roster.name,
+                Roster.team_id,
+                Team.name,
+            )
+            .join(EventAssignment.event)
+            .join(RosterEvent.roster)
+            .join(Roster.team)
+            .where(
+                EventAssignment.user_id == user.id,
+                RosterEvent.date >= start_date,
+            )
+            .order_by(RosterEvent.date, Roster.name)
+        )
+        return [
+            EventAssignmentResponse(
+                id=a.id,
+                event_id=a.event_id,
+                user_id=a.user_id,
+                status=a.status,
+                user_name=user.name,
+                user_email=user.email,
+                is_placeholder=user.is_placeholder,
+                created_at=a.created_at,
+                event_date=event_date,
+                roster_name=roster_name,
+                team_name=team_name,
+                team_id=team_id,
+            )
+            for a, event_date, roster_name, team_id, team_name in result.all()
+        ]
+
+    async def get_home_unfilled_events(
+        self, teams: list[TeamWithRole], start_date: date, end_date: date
+    ) -> list[RosterEventResponse]:
+        """Get unfilled events of the teams the user leads, across all of them.
+
+        Teams count as led when the user is a lead or may manage the team,
+        matching the home screen's team lead section.
+        """
+        team_ids = [
+            team.id
+            for team in teams
+            if team.role == TeamRole.LEAD
+            or TeamPermission.MANAGE_TEAM in team.permissions
+        ]
+        events = await RosterService(self.db).get_unfilled_events_for_teams(
+            team_ids, start_date, end_date
+        )
+
+        unfilled = []
+        for e in events:
+            assignments = [
+                EventAssignmentSummary(
+                    id=a.id,
+                    user_id=a.user_id,
+                    user_name=a.user.name if a.user else None,
+                    status=a.status,
+                    is_placeholder=a.user.is_placeholder if a.user else False,
+                )
+                for a in e.event_assignments
+            ]
+            unfilled.append(
+                RosterEventResponse(
+                    id=e.id,
+                    roster_id=e.roster_id,
+                    date=e.date,
+                    notes=e.notes,
+                    is_cancelled=e.is_cancelled,
+                    roster_name=e.roster.name,
+                    team_id=e.roster.team_id,
+                    slots_needed=e.roster.slots_needed,
+                    filled_slots=sum(
+                        1 for a in assignments if a.status != AssignmentStatus.DECLINED
+                    ),
+                    assignments=assignments,
+                    created_at=e.created_at,
+                )
+            )
+        return unfilled
+
+    async def get_home_invites(self, email: str | None) -> list[PendingInviteResponse]:
+        """Get pending invites for the user's email, with team names joined in."""
+        if not email:
+            return []
+        result = await self.db.execute(
+            select(Invite, Team.name)
+            .join(Invite.team)
+            .where(Invite.email == email, Invite.accepted_at.is_(None))
+            .order_by(Invite.created_at)
+        )
+        return [
+            PendingInviteResponse(
+                id=invite.id,
+                team_id=invite.team_id,
+                team_name=team_name,
+                email=invite.email,
+                created_at=invite.created_at,
+            )
+            for invite, team_name in result.all()
+            # Filter out expired ones in Python since is_expired is a property
+            if not invite.is_expired
+        ]
+
     async def get_team_availability_overview(
         self, team_id: uuid.UUID, target_date: date
     ) -> list[dict]:
         """Get availability overview for all team members on a specific date."""
-        # Get all team members
-        members_result = await self.db.execute(
-            select(TeamMember)
-            .options(selectinload(TeamMember.user))
-            .where(TeamMember.team_id == team_id)
+        members = await AvailabilityService(self.db).get_team_unavailability(
+            team_id, target_date, target_date
         )
-        members = list(members_result.scalars().all())
 
-        # Check unavailability for each member
         availability_overview = []
-        for member in members:
-            unavail_result = await self.db.execute(
-                select(Unavailability).where(
-                    and_(
-                        Unavailability.user_id == member.user_id,
-                        Unavailability.date == target_date,
-                    )
-                )
+        for user, rules in members:
+            unavailability = next(
+                (rule for rule in rules if rule_occurs_on(rule, target_date)), None
             )
-            unavailability = unavail_result.scalar_one_or_none()
-
             availability_overview.append(
                 {
-                    "user_id": member.user_id,
-                    "user_name": member.user.name if member.user else "Unknown",
-                    "user_email": (member.user and member.user.email) or "No email",
+                    "user_id": user.id,
+                    "user_name": user.name,
+                    "user_email": user.email or "No email",
                     "is_available": unavailability is None,
                     "unavailability_reason": (
                         unavailability.reason if unavailability else None
@@ -157,3 +361,21 @@ class DashboardService:
             )
 
         return availability_overview
+
+    async def get_team_availability_matrix(
+        self, team_id: uuid.UUID, start_date: date, end_date: date
+    ) -> TeamAvailabilityMatrix:
+        """Get a member x date availability grid for a team."""
+        matrix = await AvailabilityService(self.db).get_team_availability_matrix(
+            team_id, start_date, end_date
+        )
+        return TeamAvailabilityMatrix(
+            start_date=start_date,
+            end_date=end_date,
+            members=[
+                TeamMemberUnavailableDays(
+                    user_id=user.id, user_name=user.name, unavailable=f"{bits:x}"
+                )
+                for user, bits in matrix
+            ],
+        )
@@ -0,0 +1,78 @@
+"""Notification digests.
+
+Notification types listed in ``notification_digest_windows`` are not
+delivered as soon as they are queued. Their outbox messages become due at
+the end of the current window (windows are aligned to the clock, so every
+message a bulk operation queues for a type shares one due time), and the
+dispatcher merges the messages due for the same user, channel and type
+into a single push or email: "You've been assigned to 6 events in March"
+instead of six separate notifications.
+"""
+
+import math
+from datetime import date, datetime, timezone
+from functools import lru_cache
+
+from app.models.notification import NotificationType
+
+# Opens the home screen's action-required section, like a single assignment
+ASSIGNMENT_DIGEST_URL = "/?focus=action-required"
+
+
+@lru_cache
+def parse_digest_windows(value: str) -> dict[NotificationType, int]:
+    """Parse ``"assignment_created:120,team_joined:600"`` into seconds per type."""
+    windows = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, _, seconds = item.partition(":")
+        try:
+            windows[NotificationType(name.strip())] = int(seconds)
+        except ValueError as e:
+            raise ValueError(f"Invalid notification digest window: {item!r}") from e
+    return {type: seconds for type, seconds in windows.items() if seconds > 0}
+
+
+def digest_due(now: datetime, window: int) -> datetime:
+    """End of the ``window``-second slot that ``now`` falls in."""
+    slot = math.floor(now.timestamp() / window) + 1
+    return datetime.fromtimestamp(slot * window, tz=timezone.utc)
+
+
+def describe_period(dates: list[date]) -> str:
+    """Describe when a set of dates falls, e.g. "in March"."""
+    first, last = min(dates), max(dates)
+    if (first.year, first.month) == (last.year, last.month):
+        return f"in {first:%B}"
+    return f"between {first:%B} {first.day} and {last:%B} {last.day}"
+
+
+def push_digest(digest_key: str, payloads: list[dict]) -> dict:
+    """Merge the push payloads of one user's messages into a single payload.
+
+    Assignment digests summarise the event dates; other types fall back to
+    a generic "N new notifications" summary of the titles.
+
+    Args:
+        digest_key: The notification type the messages were queued for
+        payloads: The queued payloads, oldest first
+
+    Returns:
+        A payload for ``PushService.send_many``
+    """
+    count = len(payloads)
+    if digest_key == NotificationType.ASSIGNMENT_CREATED.value:
+        dates = [date.fromisoformat(p["digest"]["event_date"]) for p in payloads]
+        return {
+            "title": "New Assignments",
+            "body": f"You've been assigned to {count} events {describe_period(dates)}",
+            "url": ASSIGNMENT_DIGEST_URL,
+            "tag": "new-assignment",
+        }
+
+    titles = [p["title"] for p in payloads]
+    body = ", ".join(titles[:3])
+    if count > 3:
+        body += f" and {count - 3} more"
+    return {"title": f"{count} new notifications", "body": body, "url": "/"}
@@ -1,17 +1,39 @@
 """Email service for sending notifications and invites."""
 
-import smtplib
+import asyncio
 import ssl
+import time
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Optional
 import logging
 
+import aiosmtplib
+import httpx
+
 from app.core.config import get_settings
+from app.services.email_templates import DEFAULT_LOCALE, get_template
 
 logger = logging.getLogger(__name__)
 
+# Errors meaning an SMTP session is unusable, rather than the message rejected
+_CONNECTION_ERRORS = (aiosmtplib.SMTPServerDisconnected, ConnectionError)
+
+# Most emails Resend accepts in one batch request
+RESEND_BATCH_LIMIT = 100
+
+
+@dataclass
+class OutgoingEmail:
+    """A rendered email, ready for a provider."""
+
+    to_email: str
+    subject: str
+    html_content: str
+    text_content: Optional[str] = None
+
 
 class EmailProvider(ABC):
     """Abstract base class for email providers."""
@@ -29,12 +51,50 @@ class EmailProvider(ABC):
         """Send an email."""
         pass
 
+    async def send_many(
+        self, emails: list[OutgoingEmail], from_email: str, from_name: str
+    ) -> list[bool]:
+        """Send several emails concurrently.
+
+        Returns:
+            Whether each email was sent, in the same order
+        """
+        return list(
+            await asyncio.gather(
+                *(
+                    self.send(
+                        to_email=email.to_email,
+                        subject=email.subject,
+                        html_content=email.html_content,
+                        text_content=email.text_content,
+                        from_email=from_email,
+                        from_name=from_name,
+                    )
+                    for email in emails
+                )
+            )
+        )
+
+    async def aclose(self) -> None:
+        """Release any connections held by the provider."""
+
 
 class SMTPProvider(EmailProvider):
-    """SMTP email provider."""
+    """SMTP email provider with a pool of authenticated sessions.
 
-    def __init__(self, settings):
+    Sessions stay open between messages, so a batch pays for the TCP
+    connect, STARTTLS and AUTH once per pooled connection rather than once
+    per email. Idle sessions older than ``smtp_idle_timeout`` are dropped
+    before reuse, and a message whose session turns out to be dead is
+    retried once on a fresh connection.
+    """
+
+    def __init__(self, settings, tls_context: Optional[ssl.SSLContext] = None):
         self.settings = settings
+        self.tls_context = tls_context
+        self._idle: list[tuple[aiosmtplib.SMTP, float]] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
 
     async def send(
         self,
@@ -45,49 +105,112 @@ class SMTPProvider(EmailProvider):
         from_email: str,
         from_name: str,
     ) -> bool:
-        try:
-            message = MIMEMultipart("alternative")
-            message["Subject"] = subject
-            message["From"] = f"{from_name} <{from_email}>"
-            message["To"] = to_email
-
-            # Add plain text version
-            if text_content:
-                part1 = MIMEText(text_content, "plain")
-                message.attach(part1)
-
-            # Add HTML version
-            part2 = MIMEText(html_content, "html")
-            message.attach(part2)
-
-            # Send the email
-            if self.settings.smtp_use_tls:
-                context = ssl.create_default_context()
-                with smtplib.SMTP(
-                    self.settings.smtp_host, self.settings.smtp_port
-                ) as server:
-                    server.starttls(context=context)
-                    server.login(self.settings.smtp_user, self.settings.smtp_password)
-                    server.sendmail(from_email, to_email, message.as_string())
-            else:
-                with smtplib.SMTP(
-                    self.settings.smtp_host, self.settings.smtp_port
-                ) as server:
-                    server.login(self.settings.smtp_user, self.settings.smtp_password)
-                    server.sendmail(from_email, to_email, message.as_string())
+        message = MIMEMultipart("alternative")
+        message["Subject"] = subject
+        message["From"] = f"{from_name} <{from_email}>"
+        message["To"] = to_email
+
+        # Add plain text version
+        if text_content:
+            part1 = MIMEText(text_content, "plain")
+            message.attach(part1)
 
+        # Add HTML version
+        part2 = MIMEText(html_content, "html")
+        message.attach(part2)
+
+        try:
+            await self._send_pooled(message, from_email)
             return True
 
         except Exception as e:
             logger.error(f"SMTP send failed: {e}")
             return False
 
+    async def aclose(self) -> None:
+        """Close all idle sessions."""
+        idle, self._idle = self._idle, []
+        for client, _ in idle:
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+
+    async def _send_pooled(self, message: MIMEMultipart, sender: str) -> None:
+        self._bind_to_loop()
+        async with self._slots:
+            client = self._checkout()
+            try:
+                if client is None:
+                    client = await self._connect()
+                    await client.send_message(message, sender=sender)
+                else:
+                    try:
+                        await client.send_message(message, sender=sender)
+                    except _CONNECTION_ERRORS:
+                        # The server closed the pooled session; use a new one
+                        client.close()
+                        client = await self._connect()
+                        await client.send_message(message, sender=sender)
+            except Exception:
+                # Don't return a session in an unknown state to the pool
+                if client is not None:
+                    client.close()
+                raise
+            self._idle.append((client, time.monotonic()))
+
+    def _checkout(self) -> Optional[aiosmtplib.SMTP]:
+        """Most recently used live session, closing stale ones on the way."""
+        now = time.monotonic()
+        while self._idle:
+            client, idle_since = self._idle.pop()
+            if (
+                client.is_connected
+                and now - idle_since < self.settings.smtp_idle_timeout
+            ):
+                return client
+            client.close()
+        return None
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=self.settings.smtp_host,
+            port=self.settings.smtp_port,
+            username=self.settings.smtp_user,
+            password=self.settings.smtp_password,
+            start_tls=self.settings.smtp_use_tls,
+            tls_context=self.tls_context,
+            timeout=self.settings.smtp_timeout,
+        )
+        await client.connect()
+        return client
+
+    def _bind_to_loop(self) -> None:
+        # Sessions belong to the event loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._idle = []
+            self._slots = asyncio.Semaphore(self.settings.smtp_pool_size)
+
 
 class ResendProvider(EmailProvider):
-    """Resend API email provider."""
+    """Resend API email provider.
+
+    Requests go through one shared keep-alive HTTP client. Emails sent
+    together use the batch endpoint, up to RESEND_BATCH_LIMIT per request.
+    """
 
-    def __init__(self, api_key: str):
-        self.api_key = api_key
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.resend.com",
+        timeout: float = 10.0,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self._headers = {"Authorization": f"Bearer {api_key}"}
+        self._client = client or httpx.AsyncClient(timeout=timeout)
 
     async def send(
         self,
@@ -98,24 +221,86 @@ class ResendProvider(EmailProvider):
         from_email: str,
         from_name: str,
     ) -> bool:
-        try:
-            import resend
-
-            resend.api_key = self.api_key
-            resend.Emails.send(
-                {
-                    "from": f"{from_name} <{from_email}>",
-                    "to": [to_email],
-                    "subject": subject,
-                    "html": html_content,
-                    "text": text_content,
-                }
+        email = OutgoingEmail(to_email, subject, html_content, text_content)
+        [success] = await self.send_many([email], from_email, from_name)
+        return success
+
+    async def send_many(
+        self, emails: list[OutgoingEmail], from_email: str, from_name: str
+    ) -> list[bool]:
+        sender = f"{from_name} <{from_email}>"
+        results: list[bool] = []
+        for start in range(0, len(emails), RESEND_BATCH_LIMIT):
+            chunk = emails[start : start + RESEND_BATCH_LIMIT]
+            results.extend(
+                await self._send_chunk([_resend_params(e, sender) for e in chunk])
             )
-            return True
+        return results
 
-        except Exception as e:
+    async def _send_chunk(self, params: list[dict]) -> list[bool]:
+        """Send a batch, narrowing a rejected one down to the bad emails.
+
+        A batch is accepted or rejected as a whole. A rejection (4xx) is
+        usually one invalid email, so the batch is split in halves and each
+        half retried, until only the rejected emails fail. Server and network
+        errors fail the whole batch, to be retried later as it is.
+        """
+        status = await self._post(params)
+        if status is None:
+            return [True] * len(params)
+        if len(params) == 1 or not _is_rejection(status):
+            return [False] * len(params)
+        middle = len(params) // 2
+        return await self._send_chunk(params[:middle]) + await self._send_chunk(
+            params[middle:]
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def _post(self, params: list[dict]) -> Optional[int]:
+        """Send one request.
+
+        Returns:
+            None if it was accepted, else the HTTP status (0 if no response)
+        """
+        if len(params) == 1:
+            url, body = f"{self.base_url}/emails", params[0]
+        else:
+            url, body = f"{self.base_url}/emails/batch", params
+        try:
+            response = await self._client.post(url, json=body, headers=self._headers)
+            response.raise_for_status()
+            return None
+
+        except httpx.HTTPStatusError as e:
+            logger.error(
+                f"Resend send failed: {e.response.status_code} {e.response.text[:200]}"
+            )
+            return e.response.status_code
+        except httpx.HTTPError as e:
             logger.error(f"Resend send failed: {e}")
-            return False
+            return 0
+
+
+def _is_rejection(status: int) -> bool:
+    """Whether Resend refused the request itself, rather than failed to serve it.
+
+    429 (rate limited) is a 4xx but passes with time, like a server error.
+    """
+    return 400 <= status < 500 and status != 429
+
+
+def _resend_params(email: OutgoingEmail, sender: str) -> dict:
+    params = {
+        "from": sender,
+        "to": [email.to_email],
+        "subject": email.subject,
+        "html": email.html_content,
+    }
+    if email.text_content:
+        params["text"] = email.text_content
+    return params
 
 
 class EmailService:
@@ -133,7 +318,9 @@ class EmailService:
 
         if self.settings.email_provider == "resend":
             if self.settings.resend_api_key:
-                self._provider = ResendProvider(self.settings.resend_api_key)
+                self._provider = ResendProvider(
+                    self.settings.resend_api_key, base_url=self.settings.resend_api_url
+                )
         else:  # default to smtp
             if self.settings.smtp_host and self.settings.smtp_user:
                 self._provider = SMTPProvider(self.settings)
@@ -151,6 +338,11 @@ class EmailService:
         else:
             return bool(self.settings.smtp_host) and bool(self.settings.smtp_user)
 
+    async def aclose(self) -> None:
+        """Close the provider's connections, if one was created."""
+        if self._provider is not None:
+            await self._provider.aclose()
+
     def _get_invite_url(self, token: str) -> str:
         """Generate the invite acceptance URL."""
         base_url = self.settings.app_url.rstrip("/")
@@ -174,30 +366,48 @@ class EmailService:
         Returns:
             True if email was sent successfully, False otherwise
         """
+        email = OutgoingEmail(to_email, subject, html_content, text_content)
+        [success] = await self.send_many([email])
+        return success
+
+    async def send_many(self, emails: list[OutgoingEmail]) -> list[bool]:
+        """Send several rendered emails, batched where the provider allows.
+
+        Args:
+            emails: The emails to send
+
+        Returns:
+            Whether each email was sent, in the same order
+        """
         if not self.is_enabled:
-            logger.warning(f"Email not sent (disabled): {subject} -> {to_email}")
-            return False
+            for email in emails:
+                logger.warning(
+                    f"Email not sent (disabled): {email.subject} -> {email.to_email}"
+                )
+            return [False] * len(emails)
 
         provider = self.provider
         if provider is None:
             logger.error("No email provider configured")
-            return False
+            return [False] * len(emails)
 
-        success = await provider.send(
-            to_email=to_email,
-            subject=subject,
-            html_content=html_content,
-            text_content=text_content,
+        results = await provider.send_many(
+            emails,
             from_email=self.settings.smtp_from_email,
             from_name=self.settings.smtp_from_name,
         )
 
-        if success:
-            logger.info(f"Email sent successfully: {subject} -> {to_email}")
-        else:
-            logger.error(f"Failed to send email: {subject} -> {to_email}")
+        for email, success in zip(emails, results):
+            if success:
+                logger.info(
+                    f"Email sent successfully: {email.subject} -> {email.to_email}"
+                )
+            else:
+                logger.error(
+                    f"Failed to send email: {email.subject} -> {email.to_email}"
+                )
 
-        return success
+        return results
 
     async def send_invite_email(
         self,
@@ -209,15 +419,37 @@ class EmailService:
     ) -> bool:
         """Send an invite email to a placeholder user.
 
+        Takes the same arguments as ``invite_email``.
+
+        Returns:
+            True if email was sent successfully, False otherwise
+        """
+        [success] = await self.send_many(
+            [self.invite_email(to_email, invitee_name, team_name, inviter_name, token)]
+        )
+        return success
+
+    def invite_email(
+        self,
+        to_email: str,
+        invitee_name: str,
+        team_name: str,
+        inviter_name: str,
+        token: str,
+        locale: str = DEFAULT_LOCALE,
+    ) -> OutgoingEmail:
+        """Render the invite email for a placeholder user.
+
         Args:
             to_email: Recipient email address
             invitee_name: Name of the person being invited
             team_name: Name of the team
             inviter_name: Name of the person sending the invite
             token: Invite token
+            locale: Template locale
 
         Returns:
-            True if email was sent successfully, False otherwise
+            The rendered email
         """
         invite_url = self._get_invite_url(token)
         if self.settings.debug or not self.is_enabled:
@@ -228,71 +460,13 @@ class EmailService:
                 invite_url,
                 reason,
             )
-        subject = f"You've been invited to join {team_name} on Rooster"
-
-        html_content = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>You're Invited!</title>
-</head>
-<body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Helvetica, Arial, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
-    <div style="text-align: center; margin-bottom: 30px;">
-        <h1 style="color: #673AB7; margin: 0;">Rooster</h1>
-        <p style="color: #666; margin: 5px 0 0 0;">Volunteer Scheduling</p>
-    </div>
-
-    <div style="background: #f8f9fa; border-radius: 12px; padding: 30px; margin-bottom: 30px;">
-        <h2 style="margin-top: 0; color: #333;">Hi {invitee_name}!</h2>
-        <p style="font-size: 16px; margin-bottom: 20px;">
-            <strong>{inviter_name}</strong> has invited you to join <strong>{team_name}</strong> on Rooster.
-        </p>
-        <p style="font-size: 14px; color: #666;">
-            Rooster helps you stay on top of your volunteer schedule. Once you join, you'll be able to see your assignments and respond with just a tap.
-        </p>
-    </div>
-
-    <div style="text-align: center; margin-bottom: 30px;">
-        <a href="{invite_url}" style="display: inline-block; background: #673AB7; color: white; text-decoration: none; padding: 14px 32px; border-radius: 8px; font-weight: 600; font-size: 16px;">
-            Join {team_name}
-        </a>
-    </div>
-
-    <div style="text-align: center; color: #999; font-size: 12px;">
-        <p>This invite link will expire in 7 days.</p>
-        <p>If you weren't expecting this email, you can safely ignore it.</p>
-    </div>
-
-    <hr style="border: none; border-top: 1px solid #eee; margin: 30px 0;">
-
-    <div style="text-align: center; color: #999; font-size: 12px;">
-        <p>Rooster - Volunteer Scheduling Made Simple</p>
-    </div>
-</body>
-</html>
-"""
-
-        text_content = f"""
-Hi {invitee_name}!
-
-{inviter_name} has invited you to join {team_name} on Rooster.
-
-Rooster helps you stay on top of your volunteer schedule. Once you join, you'll be able to see your assignments and respond with just a tap.
-
-Join the team by clicking this link:
-{invite_url}
-
-This invite link will expire in 7 days.
-
-If you weren't expecting this email, you can safely ignore it.
-
----
-Rooster - Volunteer Scheduling Made Simple
-"""
-
-        return await self.send_email(to_email, subject, html_content, text_content)
+        rendered = get_template("invite", locale).render(
+            invitee_name=invitee_name,
+            team_name=team_name,
+            inviter_name=inviter_name,
+            invite_url=invite_url,
+        )
+        return OutgoingEmail(to_email, *rendered)
 
     async def send_assignment_notification(
         self,
@@ -305,6 +479,29 @@ Rooster - Volunteer Scheduling Made Simple
     ) -> bool:
         """Send a notification about a new assignment.
 
+        Takes the same arguments as ``assignment_email``.
+
+        Returns:
+            True if email was sent successfully, False otherwise
+        """
+        email = self.assignment_email(
+            to_email, user_name, roster_name, team_name, event_date, event_time
+        )
+        [success] = await self.send_many([email])
+        return success
+
+    def assignment_email(
+        self,
+        to_email: str,
+        user_name: str,
+        roster_name: str,
+        team_name: str,
+        event_date: str,
+        event_time: Optional[str] = None,
+        locale: str = DEFAULT_LOCALE,
+    ) -> OutgoingEmail:
+        """Render the notification about a new assignment.
+
         Args:
             to_email: Recipient email address
             user_name: Name of the assigned user
@@ -312,65 +509,53 @@ Rooster - Volunteer Scheduling Made Simple
             team_name: Name of the team
             event_date: Date of the event (formatted string)
             event_time: Time of the event (optional)
+            locale: Template locale
 
         Returns:
-            True if email was sent successfully, False otherwise
+            The rendered email
         """
-        subject = f"New assignment: {roster_name}"
         time_str = f" at {event_time}" if event_time else ""
+        rendered = get_template("assignment", locale).render(
+            user_name=user_name,
+            roster_name=roster_name,
+            team_name=team_name,
+            event_date=event_date,
+            time_str=time_str,
+        )
+        return OutgoingEmail(to_email, *rendered)
 
-        html_content = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-</head>
-<body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Helvetica, Arial, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
-    <div style="text-align: center; margin-bottom: 30px;">
-        <h1 style="color: #673AB7; margin: 0;">Rooster</h1>
-    </div>
-
-    <div style="background: #fff3e0; border-radius: 12px; padding: 30px; margin-bottom: 30px; border-left: 4px solid #ff9800;">
-        <h2 style="margin-top: 0; color: #333;">New Assignment</h2>
-        <p style="font-size: 16px;">
-            Hi {user_name}, you've been assigned to serve!
-        </p>
-        <div style="background: white; padding: 16px; border-radius: 8px; margin: 16px 0;">
-            <p style="margin: 0;"><strong>{roster_name}</strong></p>
-            <p style="margin: 4px 0 0 0; color: #666;">{team_name}</p>
-            <p style="margin: 4px 0 0 0; color: #666;">{event_date}{time_str}</p>
-        </div>
-        <p style="font-size: 14px; color: #666;">
-            Open the Rooster app to accept or decline this assignment.
-        </p>
-    </div>
-
-    <hr style="border: none; border-top: 1px solid #eee; margin: 30px 0;">
-
-    <div style="text-align: center; color: #999; font-size: 12px;">
-        <p>Rooster - Volunteer Scheduling Made Simple</p>
-    </div>
-</body>
-</html>
-"""
-
-        text_content = f"""
-New Assignment
-
-Hi {user_name}, you've been assigned to serve!
-
-{roster_name}
-{team_name}
-{event_date}{time_str}
-
-Open the Rooster app to accept or decline this assignment.
-
----
-Rooster - Volunteer Scheduling Made Simple
-"""
-
-        return await self.send_email(to_email, subject, html_content, text_content)
+    def assignment_digest_email(
+        self,
+        to_email: str,
+        items: list[dict],
+        period: str,
+        locale: str = DEFAULT_LOCALE,
+    ) -> OutgoingEmail:
+        """Render one email covering several new assignments.
+
+        Args:
+            to_email: Recipient email address
+            items: ``assignment_email`` arguments for each assignment
+            period: When the events fall, e.g. "in March"
+            locale: Template locale
+
+        Returns:
+            The rendered email
+        """
+        events = []
+        for item in items:
+            time_str = f" at {item['event_time']}" if item.get("event_time") else ""
+            events.append(
+                f"{item['roster_name']} ({item['team_name']}) - "
+                f"{item['event_date']}{time_str}"
+            )
+        rendered = get_template("assignment_digest", locale).render(
+            user_name=items[0]["user_name"],
+            count=len(items),
+            period=period,
+            events="\n".join(events),
+        )
+        return OutgoingEmail(to_email, *rendered)
 
 
 # Singleton instance
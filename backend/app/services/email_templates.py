@@ -0,0 +1,198 @@
+"""Precompiled email templates.
+
+Templates live in ``app/templates/email/<locale>/<name>.{subject,html,txt}``
+with ``str.format`` style placeholders. Each is read once per process and
+compiled into a skeleton of static text with slots, so rendering a message
+only drops the recipient's values into the slots and joins.
+Values are HTML-escaped for the HTML body and used as-is for the subject
+and text body.
+"""
+
+import html
+import re
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from operator import itemgetter
+from pathlib import Path
+from string import Formatter
+from typing import NamedTuple
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+DEFAULT_LOCALE = "en"
+
+_HTML_SPECIAL = re.compile(r"[&<>\"']")
+
+
+class TemplateError(Exception):
+    """A template is missing or malformed."""
+
+
+class RenderedEmail(NamedTuple):
+    subject: str
+    html: str
+    text: str
+
+
+class _Skeleton:
+    """Static text split around its placeholders.
+
+    ``parts`` alternates literal text and slots: the even entries are the
+    literals (possibly empty) and the odd ones are placeholders, one per
+    entry of ``slots``. ``values`` picks the slots' values out of a dict, in
+    order, so filling is a copy, one slice assignment and a join, with no
+    per-placeholder work in Python.
+    """
+
+    __slots__ = ("parts", "slots", "fields", "values")
+
+    def __init__(self, source: str, path: Path):
+        self.parts: list[str] = []
+        slots: list[str] = []
+        try:
+            parsed = list(Formatter().parse(source))
+        except ValueError as e:
+            raise TemplateError(f"{path}: {e}") from e
+        for literal, field, spec, conversion in parsed:
+            # Formatter yields a literal, possibly empty, before each field
+            self.parts.append(literal)
+            if field is None:
+                continue
+            if not field.isidentifier() or spec or conversion:
+                raise TemplateError(f"{path}: unsupported placeholder {{{field}}}")
+            slots.append(field)
+            self.parts.append("")
+        if len(self.parts) % 2 == 0:
+            self.parts.append("")
+        self.slots = tuple(slots)
+        self.fields = frozenset(slots)
+        if len(slots) > 1:
+            self.values = itemgetter(*slots)
+        elif slots:
+            # itemgetter of one key returns the value rather than a tuple
+            field = slots[0]
+            self.values = lambda values: (values[field],)
+        else:
+            self.values = lambda values: ()
+
+
+# Recipients share most values (team, roster, event date), so each distinct
+# value is escaped once and then looked up
+_escaped: dict[str, str] = {}
+_escaped_lookup = _escaped.__getitem__
+_ESCAPED_MAX = 4096
+
+
+def _escape(value: str) -> str:
+    if len(_escaped) >= _ESCAPED_MAX:
+        _escaped.clear()
+    escaped = html.escape(value) if _HTML_SPECIAL.search(value) else value
+    _escaped[value] = escaped
+    return escaped
+
+
+@dataclass(frozen=True)
+class EmailTemplate:
+    """A compiled email template."""
+
+    name: str
+    locale: str
+    subject: _Skeleton
+    html: _Skeleton
+    text: _Skeleton
+
+    @cached_property
+    def fields(self) -> frozenset[str]:
+        return self.subject.fields | self.html.fields | self.text.fields
+
+    @cached_property
+    def _plan(self) -> tuple:
+        """The skeletons' parts and value getters, unpacked once per render.
+
+        The text body's getter is None when it uses the HTML body's
+        placeholders in the same order, so it reuses the HTML body's values.
+        """
+        subject, body, text = self.subject, self.html, self.text
+        text_values = None if text.slots == body.slots else text.values
+        return (
+            subject.parts,
+            subject.values,
+            body.parts,
+            body.values,
+            text.parts,
+            text_values,
+        )
+
+    def render(self, **values: object) -> RenderedEmail:
+        """Substitute the recipient's values into the template.
+
+        Values that are not strings are formatted with ``str()``. Other
+        keyword arguments are ignored.
+
+        Raises:
+            TemplateError: If a placeholder has no value
+        """
+        # Inlined rather than a method per part: this runs once per email
+        subject, get_subject, body, get_body, text, get_text = self._plan
+        try:
+            subject = subject.copy()
+            subject[1::2] = get_subject(values)
+            body_values = get_body(values)
+            body = body.copy()
+            try:
+                body[1::2] = map(_escaped_lookup, body_values)
+            except KeyError:
+                body[1::2] = map(_escape, body_values)
+            text = text.copy()
+            text[1::2] = body_values if get_text is None else get_text(values)
+            return tuple.__new__(
+                RenderedEmail, ("".join(subject), "".join(body), "".join(text))
+            )
+        except KeyError:
+            missing = ", ".join(sorted(self.fields - values.keys()))
+            raise TemplateError(
+                f"Missing values for {self.name} template: {missing}"
+            ) from None
+        except TypeError:
+            # Only pay for the conversion when something is not a string
+            return self.render(**{key: str(value) for key, value in values.items()})
+
+
+def get_template(name: str, locale: str = DEFAULT_LOCALE) -> EmailTemplate:
+    """Get a compiled template, falling back to the default locale.
+
+    Templates are compiled on first use and cached for the life of the
+    process.
+    """
+    return _get_template(name, locale)
+
+
+@lru_cache(maxsize=None)
+def _get_template(name: str, locale: str) -> EmailTemplate:
+    if (
+        locale != DEFAULT_LOCALE
+        and not (TEMPLATE_DIR / locale / f"{name}.html").exists()
+    ):
+        return _get_template(name, DEFAULT_LOCALE)
+    return load_template(name, locale)
+
+
+def load_template(name: str, locale: str = DEFAULT_LOCALE) -> EmailTemplate:
+    """Read and compile a template from disk, bypassing the cache."""
+    directory = TEMPLATE_DIR / locale
+    parts = {}
+    for part, suffix in (("subject", "subject"), ("html", "html"), ("text", "txt")):
+        path = directory / f"{name}.{suffix}"
+        try:
+            source = path.read_text(encoding="utf-8")
+        except FileNotFoundError as e:
+            raise TemplateError(f"No {locale} email template {path.name}") from e
+        if part == "subject":
+            source = source.strip()
+        parts[part] = _Skeleton(source, path)
+    return EmailTemplate(name=name, locale=locale, **parts)
+
+
+def preload(locale: str = DEFAULT_LOCALE) -> None:
+    """Compile every template for a locale up front."""
+    for path in sorted((TEMPLATE_DIR / locale).glob("*.html")):
+        get_template(path.stem, locale)
@@ -1,12 +1,39 @@
+import asyncio
+import base64
+import binascii
+import logging
 import uuid
-from datetime import datetime
-
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
-
+from collections.abc import Iterable
+from contextlib import suppress
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core import database
+from app.core.config import Settings, get_settings
+from app.core.metrics import registry
+from app.models.base import utc_now
 from app.models.notification import Notification, NotificationType
 from app.models.roster import Assignment
 from app.schemas.notification import NotificationCreate
+from app.services.availability import AvailabilityService
+from app.services.outbox import OutboxService
+from app.services.stream import notification_event, queue_event
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATIONS_PURGED = registry.counter(
+    "notifications_purged_total", "Read notifications deleted by retention"
+)
+
+
+CONFLICT_TITLE = "Schedule Conflict Detected"
+
+
+def _conflict_message(date: str, roster_name: str) -> str:
+    return f"You are marked unavailable on {date} but assigned to {roster_name}"
 
 
 class NotificationService:
@@ -14,6 +41,7 @@ class NotificationService:
 
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.outbox = OutboxService(db)
 
     async def create_notification(self, data: NotificationCreate) -> Notification:
         """Create a new notification."""
@@ -29,41 +57,183 @@ class NotificationService:
         await self.db.refresh(notification)
         return notification
 
+    async def create_notifications(
+        self,
+        user_ids: list[uuid.UUID],
+        type: NotificationType,
+        title: str,
+        message: str,
+        reference_id: uuid.UUID | None = None,
+    ) -> list[Notification]:
+        """Create the same notification for several users.
+
+        Returns:
+            The created notifications, in the order of ``user_ids``
+        """
+        return await self.create_notification_batch(
+            [
+                NotificationCreate(
+                    user_id=user_id,
+                    type=type,
+                    title=title,
+                    message=message,
+                    reference_id=reference_id,
+                )
+                for user_id in user_ids
+            ]
+        )
+
+    async def create_notification_batch(
+        self, items: list[NotificationCreate]
+    ) -> list[Notification]:
+        """Create several notifications.
+
+        All rows go in with one multi-row INSERT ... RETURNING rather than a
+        flush and refresh per notification.
+
+        Returns:
+            The created notifications, in the order of ``items``
+        """
+        if not items:
+            return []
+        result = await self.db.scalars(
+            insert(Notification).returning(Notification, sort_by_parameter_order=True),
+            [item.model_dump() for item in items],
+        )
+        notifications = list(result.all())
+        # A bulk INSERT is not a flush, so announce the rows explicitly
+        for notification in notifications:
+            queue_event(
+                self.db.sync_session,
+                notification.user_id,
+                "notification",
+                notification_event(notification),
+            )
+        return notifications
+
     async def get_user_notifications(
         self,
         user_id: uuid.UUID,
         unread_only: bool = False,
+        limit: int | None = None,
     ) -> list[Notification]:
-        """Get all notifications for a user."""
+        """Get a user's notifications, newest first.
+
+        Args:
+            user_id: The user
+            unread_only: Only return unread notifications
+            limit: Return at most this many (all if None)
+        """
         query = select(Notification).where(Notification.user_id == user_id)
         if unread_only:
             query = query.where(Notification.read_at.is_(None))
-        query = query.order_by(Notification.created_at.desc())
+        query = query.order_by(Notification.created_at.desc()).limit(limit)
         result = await self.db.execute(query)
         return list(result.scalars().all())
 
-    async def mark_as_read(self, notification_id: uuid.UUID) -> Notification | None:
-        """Mark a notification as read."""
+    async def get_inbox(
+        self,
+        user_id: uuid.UUID,
+        limit: int,
+        cursor: str | None = None,
+        unread_only: bool = False,
+    ) -> tuple[list[Notification], str | None]:
+        """Get one page of a user's notifications, newest first.
+
+        Pages are keyset-paginated on (created_at, id), so each one costs
+        the same however deep into the inbox it is, and notifications
+        arriving meanwhile do not shift later pages.
+
+        Args:
+            user_id: The user
+            limit: Page size
+            cursor: ``next_cursor`` of the previous page, if any
+            unread_only: Only return unread notifications
+
+        Returns:
+            The page, and the cursor of the next page (None on the last one)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        query = select(Notification).where(Notification.user_id == user_id)
+        if unread_only:
+            query = query.where(Notification.read_at.is_(None))
+        if cursor:
+            created_at, notification_id = decode_cursor(cursor)
+            query = query.where(
+                tuple_(Notification.created_at, Notification.id)
+                < tuple_(created_at, notification_id)
+            )
+        query = query.order_by(
+            Notification.created_at.desc(), Notification.id.desc()
+        ).limit(limit + 1)
+        result = await self.db.execute(query)
+        notifications = list(result.scalars().all())
+        if len(notifications) <= limit:
+            return notifications, None
+        page = notifications[:limit]
+        return page, encode_cursor(page[-1])
+
+    async def count_unread(self, user_id: uuid.UUID) -> int:
+        """Count a user's unread notifications.
+
+        Answered from the (user_id, read_at, created_at) index alone.
+        """
         result = await self.db.execute(
-            select(Notification).where(Notification.id == notification_id)
+            select(func.count())
+            .select_from(Notification)
+            .where(Notification.user_id == user_id, Notification.read_at.is_(None))
         )
-        notification = result.scalar_one_or_none()
-        if not notification:
-            return None
-        notification.read_at = datetime.now(datetime.now().astimezone().tzinfo)
-        await self.db.flush()
-        await self.db.refresh(notification)
-        return notification
+        return result.scalar_one()
+
+    async def mark_as_read(
+        self, notification_id: uuid.UUID, user_id: uuid.UUID
+    ) -> Notification | None:
+        """Mark one of a user's notifications as read.
+
+        Returns:
+            The notification, or None if the user has no such notification
+        """
+        result = await self.db.scalars(
+            update(Notification)
+            .where(Notification.id == notification_id, Notification.user_id == user_id)
+            .values(read_at=func.coalesce(Notification.read_at, utc_now()))
+            .returning(Notification)
+        )
+        return result.one_or_none()
 
     async def mark_all_as_read(self, user_id: uuid.UUID) -> int:
-        """Mark all notifications as read for a user."""
-        notifications = await self.get_user_notifications(user_id, unread_only=True)
-        count = 0
-        for notification in notifications:
-            notification.read_at = datetime.now(datetime.now().astimezone().tzinfo)
-            count += 1
-        await self.db.flush()
-        return count
+        """Mark all notifications as read for a user.
+
+        Returns:
+            Number of notifications that were unread
+        """
+        result = await self.db.execute(
+            update(Notification)
+            .where(Notification.user_id == user_id, Notification.read_at.is_(None))
+            .values(read_at=utc_now())
+        )
+        return result.rowcount
+
+    async def purge_read(self, older_than: datetime, limit: int) -> int:
+        """Delete one batch of read notifications created before ``older_than``.
+
+        Returns:
+            Number of notifications deleted
+        """
+        ids = (
+            select(Notification.id)
+            .where(
+                Notification.created_at < older_than,
+                Notification.read_at.is_not(None),
+            )
+            .limit(limit)
+        )
+        result = await self.db.execute(
+            delete(Notification).where(Notification.id.in_(ids))
+        )
+        return result.rowcount
 
     async def has_notification(
         self,
@@ -81,16 +251,20 @@ class NotificationService:
         )
         return result.scalar_one_or_none() is not None
 
-    async def delete_notification(self, notification_id: uuid.UUID) -> bool:
-        """Delete a notification."""
+    async def delete_notification(
+        self, notification_id: uuid.UUID, user_id: uuid.UUID
+    ) -> bool:
+        """Delete one of a user's notifications.
+
+        Returns:
+            True if it was deleted, False if the user has no such notification
+        """
         result = await self.db.execute(
-            select(Notification).where(Notification.id == notification_id)
+            delete(Notification).where(
+                Notification.id == notification_id, Notification.user_id == user_id
+            )
         )
-        notification = result.scalar_one_or_none()
-        if not notification:
-            return False
-        await self.db.delete(notification)
-        return True
+        return result.rowcount > 0
 
     async def notify_assignment_created(self, assignment: Assignment) -> Notification:
         """Create a notification when an assignment is created."""
@@ -115,17 +289,75 @@ class NotificationService:
         self, user_id: uuid.UUID, date: str, roster_name: str
     ) -> Notification:
         """Create a notification when a conflict is detected."""
-        title = "Schedule Conflict Detected"
-        message = f"You are marked unavailable on {date} but assigned to {roster_name}"
-
         return await self.create_notification(
             NotificationCreate(
                 user_id=user_id,
                 type=NotificationType.CONFLICT_DETECTED,
-                title=title,
-                message=message,
+                title=CONFLICT_TITLE,
+                message=_conflict_message(date, roster_name),
+            )
+        )
+
+    async def notify_new_conflicts(
+        self,
+        unavailable: Iterable[tuple[uuid.UUID, date, date | None]] = (),
+        assignment_ids: Iterable[uuid.UUID] = (),
+    ) -> list[Notification]:
+        """Notify users of conflicts introduced by a write.
+
+        Call after marking dates unavailable or creating or accepting
+        event assignments; only those (user, dates) and assignments are
+        checked. A conflict already notified for the same assignment is not
+        notified again.
+
+        Args:
+            unavailable: (user_id, start_date, end_date) just marked
+                unavailable; end_date None for open-ended rules
+            assignment_ids: Event assignments just created or accepted
+
+        Returns:
+            The created notifications
+        """
+        conflicts = await AvailabilityService(self.db).find_conflicts(
+            unavailable, assignment_ids
+        )
+        if not conflicts:
+            return []
+
+        # A rule and a single date can both cover an assignment
+        conflicts = list({c.assignment_id: c for c in conflicts}.values())
+        notified = await self.db.scalars(
+            select(Notification.reference_id).where(
+                Notification.type == NotificationType.CONFLICT_DETECTED,
+                Notification.reference_id.in_([c.assignment_id for c in conflicts]),
             )
         )
+        already_notified = set(notified.all())
+        conflicts = [c for c in conflicts if c.assignment_id not in already_notified]
+
+        notifications = await self.create_notification_batch(
+            [
+                NotificationCreate(
+                    user_id=c.user_id,
+                    type=NotificationType.CONFLICT_DETECTED,
+                    title=CONFLICT_TITLE,
+                    message=_conflict_message(
+                        c.date.strftime("%B %d, %Y"), c.roster_name
+                    ),
+                    reference_id=c.assignment_id,
+                )
+                for c in conflicts
+            ]
+        )
+        for notification in notifications:
+            self.outbox.enqueue_push(
+                user_id=notification.user_id,
+                title=notification.title,
+                body=notification.message,
+                url=f"/assignments/{notification.reference_id}",
+                notification_type=NotificationType.CONFLICT_DETECTED,
+            )
+        return notifications
 
     async def notify_team_joined(
         self,
@@ -139,8 +371,6 @@ class NotificationService:
 
         Also notifies team leads that a new member has joined.
         """
-        from app.services.push import PushService
-
         title = "Team Joined"
         message = f"You've joined {team_name}"
 
@@ -154,44 +384,34 @@ class NotificationService:
             )
         )
 
-        # Send push to the joining user
-        try:
-            push_service = PushService(self.db)
-            await push_service.send_to_user(
-                user_id=user_id,
-                title=title,
-                body=message,
-                url=f"/teams/{team_id}",
-            )
-        except Exception:
-            pass
+        # Queue push to the joining user
+        self.outbox.enqueue_push(
+            user_id=user_id,
+            title=title,
+            body=message,
+            url=f"/teams/{team_id}",
+            notification_type=NotificationType.TEAM_JOINED,
+        )
 
         # Notify team leads that someone joined
         if team_lead_ids and user_name:
+            lead_ids = [lead_id for lead_id in team_lead_ids if lead_id != user_id]
             lead_title = "New Team Member"
             lead_message = f"{user_name} has joined {team_name}"
-            try:
-                push_service = PushService(self.db)
-                for lead_id in team_lead_ids:
-                    if lead_id == user_id:
-                        continue
-                    await self.create_notification(
-                        NotificationCreate(
-                            user_id=lead_id,
-                            type=NotificationType.TEAM_JOINED,
-                            title=lead_title,
-                            message=lead_message,
-                            reference_id=team_id,
-                        )
-                    )
-                    await push_service.send_to_user(
-                        user_id=lead_id,
-                        title=lead_title,
-                        body=lead_message,
-                        url=f"/teams/{team_id}",
-                    )
-            except Exception:
-                pass
+            await self.create_notifications(
+                lead_ids,
+                type=NotificationType.TEAM_JOINED,
+                title=lead_title,
+                message=lead_message,
+                reference_id=team_id,
+            )
+            self.outbox.enqueue_push_many(
+                user_ids=lead_ids,
+                title=lead_title,
+                body=lead_message,
+                url=f"/teams/{team_id}",
+                notification_type=NotificationType.TEAM_JOINED,
+            )
 
         return notification
 
@@ -206,7 +426,7 @@ class NotificationService:
         event_date: datetime,
         event_time: str | None = None,
     ) -> Notification:
-        """Create notification and send email for new assignment.
+        """Create notification and queue email and push for new assignment.
 
         Args:
             assignment_id: The assignment ID
@@ -221,8 +441,6 @@ class NotificationService:
         Returns:
             The created notification
         """
-        from app.services.email import get_email_service
-
         title = "New Assignment"
         formatted_date = event_date.strftime("%B %d, %Y")
         message = f"You've been assigned to {roster_name} on {formatted_date}"
@@ -238,11 +456,17 @@ class NotificationService:
             )
         )
 
-        # Send email if user has email
+        # Facts an assignment digest summarises, if these are coalesced
+        digest = {"event_date": event_date.strftime("%Y-%m-%d")}
+
+        # Queue email if user has email
         if user_email:
-            email_service = get_email_service()
-            await email_service.send_assignment_notification(
+            self.outbox.enqueue_email(
+                "assignment",
                 to_email=user_email,
+                user_id=user_id,
+                notification_type=NotificationType.ASSIGNMENT_CREATED,
+                digest=digest,
                 user_name=user_name,
                 roster_name=roster_name,
                 team_name=team_name,
@@ -250,20 +474,16 @@ class NotificationService:
                 event_time=event_time,
             )
 
-        # Send push notification — opens home action-required section
-        try:
-            from app.services.push import PushService
-
-            push_service = PushService(self.db)
-            await push_service.send_to_user(
-                user_id=user_id,
-                title=title,
-                body=message,
-                url="/?focus=action-required",
-                tag="new-assignment",
-            )
-        except ImportError:
-            pass
+        # Queue push notification — opens home action-required section
+        self.outbox.enqueue_push(
+            user_id=user_id,
+            title=title,
+            body=message,
+            url="/?focus=action-required",
+            tag="new-assignment",
+            notification_type=NotificationType.ASSIGNMENT_CREATED,
+            digest=digest,
+        )
 
         return notification
 
@@ -276,36 +496,24 @@ class NotificationService:
         assignment_id: uuid.UUID,
     ) -> list[Notification]:
         """Notify team leads when an assignment is accepted."""
-        from app.services.push import PushService
-
         title = f"{user_name} accepted"
         formatted_date = event_date.strftime("%B %d, %Y")
         message = f"Confirmed for {roster_name} on {formatted_date}"
 
-        notifications = []
-        push_service = PushService(self.db)
-
-        for lead_id in team_lead_ids:
-            notification = await self.create_notification(
-                NotificationCreate(
-                    user_id=lead_id,
-                    type=NotificationType.ASSIGNMENT_CONFIRMED,
-                    title=title,
-                    message=message,
-                    reference_id=assignment_id,
-                )
-            )
-            notifications.append(notification)
-
-            try:
-                await push_service.send_to_user(
-                    user_id=lead_id,
-                    title=title,
-                    body=message,
-                    url=f"/assignments/{assignment_id}",
-                )
-            except Exception:
-                pass
+        notifications = await self.create_notifications(
+            team_lead_ids,
+            type=NotificationType.ASSIGNMENT_CONFIRMED,
+            title=title,
+            message=message,
+            reference_id=assignment_id,
+        )
+        self.outbox.enqueue_push_many(
+            user_ids=team_lead_ids,
+            title=title,
+            body=message,
+            url=f"/assignments/{assignment_id}",
+            notification_type=NotificationType.ASSIGNMENT_CONFIRMED,
+        )
 
         return notifications
 
@@ -319,38 +527,26 @@ class NotificationService:
         assignment_id: uuid.UUID,
     ) -> list[Notification]:
         """Notify team leads when an assignment is declined."""
-        from app.services.push import PushService
-
         title = f"{user_name} declined"
         formatted_date = event_date.strftime("%B %d, %Y")
         message = f"Declined {roster_name} on {formatted_date}"
 
-        notifications = []
-        push_service = PushService(self.db)
-
-        for lead_id in team_lead_ids:
-            notification = await self.create_notification(
-                NotificationCreate(
-                    user_id=lead_id,
-                    type=NotificationType.ASSIGNMENT_DECLINED,
-                    title=title,
-                    message=message,
-                    reference_id=assignment_id,
-                )
-            )
-            notifications.append(notification)
-
-            try:
-                await push_service.send_to_user(
-                    user_id=lead_id,
-                    title=title,
-                    body=message,
-                    url=f"/events/{event_id}",
-                    actions=[{"action": "reassign", "title": "Reassign"}],
-                    data={"url": f"/events/{event_id}"},
-                )
-            except Exception:
-                pass
+        notifications = await self.create_notifications(
+            team_lead_ids,
+            type=NotificationType.ASSIGNMENT_DECLINED,
+            title=title,
+            message=message,
+            reference_id=assignment_id,
+        )
+        self.outbox.enqueue_push_many(
+            user_ids=team_lead_ids,
+            title=title,
+            body=message,
+            url=f"/events/{event_id}",
+            actions=[{"action": "reassign", "title": "Reassign"}],
+            data={"url": f"/events/{event_id}"},
+            notification_type=NotificationType.ASSIGNMENT_DECLINED,
+        )
 
         return notifications
 
@@ -361,8 +557,6 @@ class NotificationService:
         team_id: uuid.UUID,
     ) -> Notification:
         """Notify a user when they are invited to a team."""
-        from app.services.push import PushService
-
         title = "Team Invitation"
         message = f"You've been invited to join {team_name}"
 
@@ -376,16 +570,13 @@ class NotificationService:
             )
         )
 
-        try:
-            push_service = PushService(self.db)
-            await push_service.send_to_user(
-                user_id=user_id,
-                title=title,
-                body=message,
-                url=f"/teams/{team_id}",
-            )
-        except Exception:
-            pass
+        self.outbox.enqueue_push(
+            user_id=user_id,
+            title=title,
+            body=message,
+            url=f"/teams/{team_id}",
+            notification_type=NotificationType.TEAM_INVITE,
+        )
 
         return notification
 
@@ -408,3 +599,81 @@ class NotificationService:
                 reference_id=team_id,
             )
         )
+
+
+class NotificationRetention:
+    """Delete read notifications past their retention age, on an interval.
+
+    Runs in the scheduler worker (``python -m app.workers.reminders``).
+    Deletes go in committed batches of ``notification_retention_batch_size``
+    so no single transaction holds many row locks or bloats the WAL.
+    """
+
+    def __init__(
+        self,
+        session_maker: Optional[async_sessionmaker] = None,
+        settings: Optional[Settings] = None,
+    ):
+        self.settings = settings or get_settings()
+        self.session_maker = session_maker or database.async_session_maker
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Purge every ``notification_retention_interval`` until ``stop``."""
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Notification retention failed")
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    stop.wait(), self.settings.notification_retention_interval
+                )
+
+    async def run_once(self) -> int:
+        """Delete every expired read notification, one batch at a time.
+
+        Returns:
+            Number of notifications deleted
+        """
+        if self.settings.notification_retention_days <= 0:
+            return 0
+        older_than = utc_now() - timedelta(
+            days=self.settings.notification_retention_days
+        )
+        batch_size = self.settings.notification_retention_batch_size
+        total = 0
+        while True:
+            async with self.session_maker() as db:
+                purged = await NotificationService(db).purge_read(
+                    older_than, batch_size
+                )
+                await db.commit()
+            total += purged
+            if purged < batch_size:
+                break
+        if total:
+            NOTIFICATIONS_PURGED.inc(total)
+            logger.info("Deleted %d read notifications", total)
+        return total
+
+
+def encode_cursor(notification: Notification) -> str:
+    """Opaque inbox cursor pointing just past ``notification``."""
+    raw = f"{notification.created_at.isoformat()}|{notification.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Parse an inbox cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        created_at, notification_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        )
+        return datetime.fromisoformat(created_at), uuid.UUID(notification_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
@@ -0,0 +1,469 @@
+"""Transactional outbox for email and push delivery.
+
+Request handlers queue messages with ``OutboxService`` inside their own
+transaction, so the request only pays for an INSERT and nothing is sent
+for a change that rolled back. ``OutboxDispatcher`` drains the queue from
+a separate worker process (``python -m app.workers.outbox``).
+
+Messages for notification types with a digest window are held until the
+window closes and merged per user and channel; see ``app.services.digest``.
+"""
+
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from contextlib import suppress
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core import database
+from app.core.config import Settings, get_settings
+from app.core.metrics import registry
+from app.models.base import utc_now
+from app.models.notification import NotificationType
+from app.models.outbox import OutboxChannel, OutboxMessage, OutboxStatus
+from app.services.digest import (
+    describe_period,
+    digest_due,
+    parse_digest_windows,
+    push_digest,
+)
+from app.services.email import EmailService, OutgoingEmail, get_email_service
+from app.services.email_templates import TemplateError
+from app.services.push import PushService, build_payload
+
+logger = logging.getLogger(__name__)
+
+# What rendering a queued email raises for a malformed payload: a missing
+# key or template value, wrong parameter types, or a bad date
+RENDER_ERRORS = (TemplateError, LookupError, TypeError, ValueError)
+
+# Email templates the dispatcher can render, mapped to EmailService methods
+EMAIL_TEMPLATES = {
+    "invite": "invite_email",
+    "assignment": "assignment_email",
+}
+# Templates whose emails can be merged into a digest, mapped to the
+# EmailService method rendering the digest
+EMAIL_DIGESTS = {
+    "assignment": "assignment_digest_email",
+}
+
+OUTBOX_SENT = registry.counter(
+    "outbox_messages_sent_total", "Outbox messages delivered", ("channel",)
+)
+OUTBOX_FAILED = registry.counter(
+    "outbox_delivery_failures_total",
+    "Failed outbox delivery attempts (each will be retried)",
+    ("channel",),
+)
+OUTBOX_COALESCED = registry.counter(
+    "outbox_messages_coalesced_total",
+    "Outbox messages delivered as part of a digest",
+    ("channel",),
+)
+OUTBOX_DEAD = registry.counter(
+    "outbox_messages_dead_total",
+    "Outbox messages abandoned after exhausting their attempts",
+    ("channel",),
+)
+
+
+class DeliveryError(Exception):
+    """A provider did not accept a message."""
+
+
+class OutboxService:
+    """Service for queueing outbound email and push messages."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.digest_windows = parse_digest_windows(
+            get_settings().notification_digest_windows
+        )
+
+    def enqueue_email(
+        self,
+        template: str,
+        to_email: str,
+        user_id: Optional[uuid.UUID] = None,
+        notification_type: Optional[NotificationType] = None,
+        digest: Optional[dict] = None,
+        **params: Optional[str],
+    ) -> OutboxMessage:
+        """Queue a templated email.
+
+        Args:
+            template: Key of EMAIL_TEMPLATES
+            to_email: Recipient email address
+            user_id: The recipient's user, if any
+            notification_type: The notification the email belongs to, which
+                decides whether it is merged into a digest
+            digest: Facts about this message that a digest summarises
+            **params: Arguments for the template's EmailService method
+
+        Returns:
+            The queued message, inserted when the caller's session flushes
+        """
+        if template not in EMAIL_TEMPLATES:
+            raise ValueError(f"Unknown email template: {template}")
+        if template not in EMAIL_DIGESTS:
+            notification_type = None
+        return self._enqueue(
+            OutboxChannel.EMAIL,
+            {"template": template, "to_email": to_email, "params": params},
+            user_id,
+            notification_type,
+            digest,
+        )
+
+    def enqueue_push(
+        self,
+        user_id: uuid.UUID,
+        title: str,
+        body: str,
+        url: Optional[str] = None,
+        actions: Optional[list[dict]] = None,
+        tag: Optional[str] = None,
+        data: Optional[dict] = None,
+        notification_type: Optional[NotificationType] = None,
+        digest: Optional[dict] = None,
+    ) -> OutboxMessage:
+        """Queue a push notification to all of a user's subscriptions.
+
+        Takes the same arguments as ``PushService.send_to_user``, plus the
+        ``notification_type`` and ``digest`` facts of ``enqueue_email``.
+        """
+        payload = build_payload(title, body, url, actions=actions, tag=tag, data=data)
+        return self._enqueue(
+            OutboxChannel.PUSH, payload, user_id, notification_type, digest
+        )
+
+    def enqueue_push_many(
+        self,
+        user_ids: list[uuid.UUID],
+        title: str,
+        body: str,
+        url: Optional[str] = None,
+        actions: Optional[list[dict]] = None,
+        tag: Optional[str] = None,
+        data: Optional[dict] = None,
+        notification_type: Optional[NotificationType] = None,
+    ) -> list[OutboxMessage]:
+        """Queue the same push notification for several users.
+
+        One message per recipient, all inserted by the session's next flush
+        as a single batch; the dispatcher then fans them out together.
+        """
+        payload = build_payload(title, body, url, actions=actions, tag=tag, data=data)
+        return [
+            self._enqueue(OutboxChannel.PUSH, payload, user_id, notification_type)
+            for user_id in user_ids
+        ]
+
+    def _enqueue(
+        self,
+        channel: OutboxChannel,
+        payload: dict,
+        user_id: Optional[uuid.UUID],
+        notification_type: Optional[NotificationType] = None,
+        digest: Optional[dict] = None,
+    ) -> OutboxMessage:
+        message = OutboxMessage(channel=channel, payload=payload, user_id=user_id)
+        window = self.digest_windows.get(notification_type)
+        if window and user_id is not None:
+            message.digest_key = notification_type.value
+            message.payload = {**payload, "digest": digest or {}}
+            message.next_attempt_at = digest_due(utc_now(), window)
+        self.db.add(message)
+        return message
+
+
+class OutboxDispatcher:
+    """Deliver queued outbox messages in batches.
+
+    Each batch is claimed with ``FOR UPDATE SKIP LOCKED`` and leased by
+    pushing its ``next_attempt_at`` forward, then delivered outside any
+    transaction. Several dispatchers can therefore run side by side, and a
+    batch held by a crashed worker becomes due again once its lease expires.
+    Failed messages are retried with exponential backoff and marked dead
+    after ``outbox_max_attempts``. Due digest messages for the same user,
+    channel and type are claimed together and delivered as one.
+    """
+
+    def __init__(
+        self,
+        session_maker: Optional[async_sessionmaker] = None,
+        email_service: Optional[EmailService] = None,
+        settings: Optional[Settings] = None,
+    ):
+        self.settings = settings or get_settings()
+        self.session_maker = session_maker or database.async_session_maker
+        self.email_service = email_service or get_email_service()
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Drain the outbox until ``stop`` is set, sleeping while it is empty."""
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                claimed = await self.drain_once()
+            except Exception:
+                logger.exception("Outbox drain failed")
+                claimed = 0
+            if claimed < self.settings.outbox_batch_size:
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(
+                        stop.wait(), self.settings.outbox_poll_interval
+                    )
+
+    async def drain_once(self) -> int:
+        """Claim and deliver one batch of due messages.
+
+        Returns:
+            Number of messages claimed
+        """
+        messages = await self._claim()
+        if not messages:
+            return 0
+
+        groups = _coalesce(messages)
+        pushes = [g for g in groups if g[0].channel == OutboxChannel.PUSH]
+        emails = [g for g in groups if g[0].channel == OutboxChannel.EMAIL]
+        errors = await self._send_pushes(pushes) if pushes else {}
+        if emails:
+            errors.update(await self._send_emails(emails))
+
+        sent, failed = [], []
+        for group in groups:
+            error = errors.get(group[0].id)
+            if error is None:
+                sent.extend(group)
+            else:
+                failed.extend((m, error) for m in group)
+            if len(group) > 1:
+                OUTBOX_COALESCED.inc(len(group), channel=group[0].channel.value)
+        await self._record(sent, failed)
+        return len(messages)
+
+    async def _claim(self) -> list[OutboxMessage]:
+        now = utc_now()
+        async with self.session_maker() as db:
+            result = await db.execute(
+                select(OutboxMessage)
+                .where(
+                    OutboxMessage.status == OutboxStatus.PENDING,
+                    OutboxMessage.next_attempt_at <= now,
+                )
+                .order_by(OutboxMessage.next_attempt_at)
+                .limit(self.settings.outbox_batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            messages = list(result.scalars().all())
+            messages += await self._claim_digest_siblings(db, messages, now)
+            lease_until = now + timedelta(seconds=self.settings.outbox_lease_seconds)
+            for message in messages:
+                message.next_attempt_at = lease_until
+            await db.commit()
+        return messages
+
+    async def _claim_digest_siblings(
+        self, db: AsyncSession, messages: list[OutboxMessage], now: datetime
+    ) -> list[OutboxMessage]:
+        """Lock the rest of each claimed digest, even past the batch size.
+
+        A digest's messages share a due time but the batch limit can cut
+        through them; without this the remainder would go out as a second
+        digest on the next drain.
+        """
+        digests = {_digest_group(m) for m in messages if m.digest_key}
+        if not digests:
+            return []
+        result = await db.execute(
+            select(OutboxMessage)
+            .where(
+                OutboxMessage.status == OutboxStatus.PENDING,
+                OutboxMessage.next_attempt_at <= now,
+                OutboxMessage.user_id.in_({user_id for user_id, _, _ in digests}),
+                OutboxMessage.digest_key.is_not(None),
+                OutboxMessage.id.not_in([m.id for m in messages]),
+            )
+            .with_for_update(skip_locked=True)
+        )
+        return [m for m in result.scalars().all() if _digest_group(m) in digests]
+
+    async def _send_emails(
+        self, groups: list[list[OutboxMessage]]
+    ) -> dict[uuid.UUID, Exception]:
+        """Render the batch's emails and send them together; return errors.
+
+        Providers with a batch API (Resend) send them in one request; SMTP
+        spreads them over its pooled sessions. Errors are keyed by the id of
+        each group's first message.
+        """
+        errors: dict[uuid.UUID, Exception] = {}
+        rendered = []
+        for group in groups:
+            message = group[0]
+            try:
+                rendered.append((message, self._render_email(group)))
+            except RENDER_ERRORS as e:
+                errors[message.id] = e
+
+        try:
+            results = await self.email_service.send_many([e for _, e in rendered])
+        # Providers report delivery failures as results; anything raised is a
+        # bug, recorded against the batch so it backs off instead of being
+        # claimed again on the next drain
+        except Exception as e:  # noqa: BLE001
+            return {**errors, **{m.id: e for m, _ in rendered}}
+
+        for (message, _), success in zip(rendered, results):
+            # A disabled email service drops messages on purpose (logged there)
+            if not success and self.email_service.is_enabled:
+                errors[message.id] = DeliveryError(
+                    f"Email provider rejected {message.payload['template']}"
+                )
+        return errors
+
+    def _render_email(self, group: list[OutboxMessage]) -> OutgoingEmail:
+        payload = group[0].payload
+        if len(group) == 1:
+            render = getattr(self.email_service, EMAIL_TEMPLATES[payload["template"]])
+            return render(to_email=payload["to_email"], **payload["params"])
+
+        render = getattr(self.email_service, EMAIL_DIGESTS[payload["template"]])
+        dates = [date.fromisoformat(m.payload["digest"]["event_date"]) for m in group]
+        return render(
+            to_email=payload["to_email"],
+            items=[m.payload["params"] for m in group],
+            period=describe_period(dates),
+        )
+
+    async def _send_pushes(
+        self, groups: list[list[OutboxMessage]]
+    ) -> dict[uuid.UUID, Exception]:
+        """Fan the batch's pushes out concurrently; return errors.
+
+        A push is retried only when no subscription received it and at least
+        one failed transiently or is backing off, so recipients never get
+        duplicates. Errors are keyed by the id of each group's first message.
+        """
+        messages = [group[0] for group in groups]
+        payloads = [
+            push_digest(group[0].digest_key, [m.payload for m in group])
+            if len(group) > 1
+            else _without_digest(group[0].payload)
+            for group in groups
+        ]
+        try:
+            async with self.session_maker() as db:
+                outcomes = await PushService(db).send_many(
+                    [(m.user_id, p) for m, p in zip(messages, payloads)]
+                )
+                # Persist removal of expired subscriptions
+                await db.commit()
+        # Delivery failures come back as outcomes; anything raised (e.g. the
+        # database) is recorded against the batch so it backs off instead of
+        # being claimed again on the next drain
+        except Exception as e:  # noqa: BLE001
+            return {m.id: e for m in messages}
+
+        return {
+            message.id: DeliveryError(
+                f"{outcome.failed + outcome.deferred} subscription(s) could not"
+                " be reached"
+            )
+            for message, outcome in zip(messages, outcomes)
+            if (outcome.failed or outcome.deferred) and not outcome.sent
+        }
+
+    async def _record(
+        self,
+        sent: list[OutboxMessage],
+        failed: list[tuple[OutboxMessage, Exception]],
+    ) -> None:
+        now = utc_now()
+        async with self.session_maker() as db:
+            if sent:
+                await db.execute(
+                    update(OutboxMessage)
+                    .where(OutboxMessage.id.in_([m.id for m in sent]))
+                    .values(
+                        status=OutboxStatus.SENT,
+                        sent_at=now,
+                        attempts=OutboxMessage.attempts + 1,
+                        last_error=None,
+                    )
+                )
+                for message in sent:
+                    OUTBOX_SENT.inc(channel=message.channel.value)
+
+            for message, error in failed:
+                await db.execute(
+                    update(OutboxMessage)
+                    .where(OutboxMessage.id == message.id)
+                    .values(**self._failure_values(message, error, now))
+                )
+            await db.commit()
+
+    def _failure_values(
+        self, message: OutboxMessage, error: Exception, now: datetime
+    ) -> dict:
+        attempts = message.attempts + 1
+        values = {
+            "attempts": attempts,
+            "last_error": f"{type(error).__name__}: {error}",
+        }
+        OUTBOX_FAILED.inc(channel=message.channel.value)
+
+        if attempts >= self.settings.outbox_max_attempts:
+            logger.error(
+                "Giving up on %s outbox message %s after %d attempts: %s",
+                message.channel.value,
+                message.id,
+                attempts,
+                error,
+            )
+            OUTBOX_DEAD.inc(channel=message.channel.value)
+            values["status"] = OutboxStatus.DEAD
+        else:
+            logger.warning(
+                "Outbox message %s failed (attempt %d), retrying: %s",
+                message.id,
+                attempts,
+                error,
+            )
+            values["next_attempt_at"] = now + self.retry_delay(attempts)
+        return values
+
+    def retry_delay(self, attempts: int) -> timedelta:
+        """Exponential backoff after the given number of failed attempts."""
+        delay = self.settings.outbox_retry_base_seconds * 2 ** (attempts - 1)
+        return timedelta(seconds=min(delay, self.settings.outbox_retry_max_seconds))
+
+
+def _digest_group(message: OutboxMessage) -> tuple:
+    return (message.user_id, message.channel, message.digest_key)
+
+
+def _coalesce(messages: list[OutboxMessage]) -> list[list[OutboxMessage]]:
+    """Group digest messages by user, channel and type, oldest first.
+
+    Every other message is a group of its own.
+    """
+    groups: dict[tuple, list[OutboxMessage]] = defaultdict(list)
+    for message in sorted(messages, key=lambda m: m.created_at):
+        key = _digest_group(message) if message.digest_key else message.id
+        groups[key].append(message)
+    return list(groups.values())
+
+
+def _without_digest(payload: dict) -> dict:
+    """The payload as the service worker should see it."""
+    if "digest" not in payload:
+        return payload
+    return {key: value for key, value in payload.items() if key != "digest"}
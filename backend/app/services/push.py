@@ -1,26 +1,74 @@
 """Push notification service for Web Push notifications."""
 
+import asyncio
 import json
 import logging
 import uuid
+from collections import defaultdict
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from typing import Optional
 
-from pywebpush import webpush, WebPushException
-from sqlalchemy import delete, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import case, delete, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.core.config import get_settings
+from app.core import database
+from app.core.config import Settings, get_settings
+from app.core.metrics import registry
+from app.models.base import utc_now
 from app.models.push_subscription import PushSubscription
+from app.services.push_transport import PushResponse, PushTransport, get_push_transport
 
 logger = logging.getLogger(__name__)
 
+# A healthy subscription's last_success_at is only rewritten this often, so
+# that routine sends do not update the row every time
+SUCCESS_RESOLUTION = timedelta(hours=1)
+
+PUSH_SENDS = registry.counter(
+    "push_sends_total",
+    "Push deliveries by result (deferred sends were skipped during backoff)",
+    ("result",),
+)
+PUSH_SUBSCRIPTIONS = registry.gauge(
+    "push_subscriptions", "Push subscriptions by delivery health", ("state",)
+)
+PUSH_SUBSCRIPTIONS_PER_USER = registry.gauge(
+    "push_subscriptions_per_user",
+    "Users by number of push subscriptions",
+    ("subscriptions",),
+)
+PUSH_PRUNED = registry.counter(
+    "push_subscriptions_pruned_total", "Failing push subscriptions removed"
+)
+
+
+@dataclass
+class PushOutcome:
+    """Per-recipient result of a push fan-out, counted by subscription."""
+
+    sent: int = 0
+    failed: int = 0  # Transient errors (network, 429, 5xx) worth retrying
+    gone: int = 0  # Expired subscriptions, now removed
+    rejected: int = 0  # Permanent errors (bad keys, other 4xx)
+    deferred: int = 0  # Not tried: the endpoint is backing off after failures
+
 
 class PushService:
     """Service for Web Push notification operations."""
 
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, transport: Optional[PushTransport] = None):
         self.db = db
         self.settings = get_settings()
+        self._transport = transport
+
+    @property
+    def transport(self) -> PushTransport:
+        """The push transport, shared process-wide unless one was injected."""
+        if self._transport is None:
+            self._transport = get_push_transport()
+        return self._transport
 
     @property
     def is_configured(self) -> bool:
@@ -38,7 +86,8 @@ class PushService:
         """Register a push subscription for a user.
 
         If the endpoint already exists, update the keys. This handles
-        subscription renewal gracefully.
+        subscription renewal gracefully. The app re-subscribes on every
+        launch, so an unchanged subscription is returned without a write.
 
         Args:
             user_id: The user to subscribe
@@ -57,6 +106,18 @@ class PushService:
         existing = result.scalar_one_or_none()
 
         if existing:
+            if (
+                existing.user_id == user_id
+                and existing.p256dh_key == p256dh_key
+                and existing.auth_key == auth_key
+                and existing.user_agent == user_agent
+            ):
+                return existing
+
+            if (existing.p256dh_key, existing.auth_key) != (p256dh_key, auth_key):
+                # Renewed keys - give the endpoint a clean slate
+                existing.failure_count = 0
+                existing.retry_after = None
             # Update existing subscription
             existing.user_id = user_id
             existing.p256dh_key = p256dh_key
@@ -153,48 +214,176 @@ class PushService:
         Returns:
             Number of notifications successfully sent
         """
+        payload = build_payload(title, body, url, icon, actions, tag, data)
+        [outcome] = await self.send_many([(user_id, payload)])
+        return outcome.sent
+
+    async def send_many(
+        self, notifications: list[tuple[uuid.UUID, dict]]
+    ) -> list[PushOutcome]:
+        """Send payloads to several users at once.
+
+        Subscriptions for all recipients are loaded with one query and every
+        (subscription, payload) pair is sent concurrently through the shared
+        transport, which bounds how many are in flight. Expired subscriptions
+        are removed in a single DELETE. Endpoints that are backing off after
+        failures are skipped, and every other subscription's health is
+        updated; the caller commits.
+
+        Args:
+            notifications: (user_id, payload) pairs; see ``build_payload``
+
+        Returns:
+            One outcome per notification, in the same order
+        """
+        outcomes = [PushOutcome() for _ in notifications]
         if not self.is_configured:
             logger.warning("Push notifications not configured - VAPID keys missing")
-            return 0
+            return outcomes
 
-        subscriptions = await self.get_user_subscriptions(user_id)
-        if not subscriptions:
-            return 0
+        now = utc_now()
+        user_ids = {user_id for user_id, _ in notifications}
+        result = await self.db.execute(
+            select(PushSubscription, PushSubscription.retry_after > now).where(
+                PushSubscription.user_id.in_(user_ids)
+            )
+        )
+        subscriptions: dict[uuid.UUID, list[PushSubscription]] = defaultdict(list)
+        backing_off: dict[uuid.UUID, int] = defaultdict(int)
+        for subscription, deferred in result.all():
+            if deferred:
+                backing_off[subscription.user_id] += 1
+            else:
+                subscriptions[subscription.user_id].append(subscription)
+
+        sends = []
+        for outcome, (user_id, payload) in zip(outcomes, notifications):
+            outcome.deferred = backing_off[user_id]
+            if outcome.deferred:
+                PUSH_SENDS.inc(outcome.deferred, result="deferred")
+            if subscriptions[user_id]:
+                # Serialized once and shared by all of the user's subscriptions
+                data = json.dumps(payload)
+                sends.extend((outcome, s, data) for s in subscriptions[user_id])
+        if not sends:
+            return outcomes
+
+        responses = await asyncio.gather(
+            *(
+                self._send_notification(subscription, data)
+                for _, subscription, data in sends
+            )
+        )
 
-        payload: dict = {
-            "title": title,
-            "body": body,
-        }
-        if url:
-            payload["url"] = url
-        if icon:
-            payload["icon"] = icon
-        if actions:
-            payload["actions"] = actions
-        if tag:
-            payload["tag"] = tag
-        if data:
-            payload["data"] = data
-
-        sent = 0
-        for subscription in subscriptions:
-            success = await self._send_notification(subscription, payload)
-            if success:
-                sent += 1
-
-        return sent
+        gone_ids = []
+        for (outcome, subscription, _), response in zip(sends, responses):
+            if response.ok:
+                outcome.sent += 1
+                PUSH_SENDS.inc(result="sent")
+                self._record_success(subscription, now)
+            elif response.gone:
+                outcome.gone += 1
+                PUSH_SENDS.inc(result="gone")
+                gone_ids.append(subscription.id)
+            else:
+                if response.retryable:
+                    outcome.failed += 1
+                    PUSH_SENDS.inc(result="failed")
+                else:
+                    outcome.rejected += 1
+                    PUSH_SENDS.inc(result="rejected")
+                self._record_failure(subscription, now)
+
+        if gone_ids:
+            await self.db.execute(
+                delete(PushSubscription).where(PushSubscription.id.in_(gone_ids))
+            )
+        return outcomes
+
+    def _record_success(self, subscription: PushSubscription, now: datetime) -> None:
+        if (
+            subscription.failure_count
+            or subscription.last_success_at is None
+            or _naive(subscription.last_success_at) < _naive(now) - SUCCESS_RESOLUTION
+        ):
+            subscription.last_success_at = now
+            subscription.failure_count = 0
+            subscription.retry_after = None
+
+    def _record_failure(self, subscription: PushSubscription, now: datetime) -> None:
+        """Count the failure and back the endpoint off exponentially."""
+        subscription.failure_count += 1
+        subscription.last_failure_at = now
+        delay = self.settings.push_backoff_base_seconds * 2 ** (
+            subscription.failure_count - 1
+        )
+        subscription.retry_after = now + timedelta(
+            seconds=min(delay, self.settings.push_backoff_max_seconds)
+        )
+
+    async def prune(self, max_failures: int, stale_before: datetime, limit: int) -> int:
+        """Delete one batch of subscriptions that keep failing.
+
+        A subscription is pruned once it has failed ``max_failures`` times
+        in a row, or when it is failing and has not delivered anything
+        since ``stale_before``.
+
+        Returns:
+            Number of subscriptions removed
+        """
+        last_alive = func.coalesce(
+            PushSubscription.last_success_at, PushSubscription.created_at
+        )
+        ids = (
+            select(PushSubscription.id)
+            .where(
+                or_(
+                    PushSubscription.failure_count >= max_failures,
+                    (PushSubscription.failure_count > 0) & (last_alive < stale_before),
+                )
+            )
+            .limit(limit)
+        )
+        result = await self.db.execute(
+            delete(PushSubscription).where(PushSubscription.id.in_(ids))
+        )
+        return result.rowcount
+
+    async def update_metrics(self) -> None:
+        """Refresh the subscription gauges from the table."""
+        state = case((PushSubscription.failure_count > 0, "failing"), else_="healthy")
+        result = await self.db.execute(select(state, func.count()).group_by(state))
+        PUSH_SUBSCRIPTIONS.reset()
+        for label, count in result.all():
+            PUSH_SUBSCRIPTIONS.set(count, state=label)
+
+        per_user = (
+            select(func.count().label("subscriptions"))
+            .select_from(PushSubscription)
+            .group_by(PushSubscription.user_id)
+            .subquery()
+        )
+        result = await self.db.execute(
+            select(per_user.c.subscriptions, func.count()).group_by(
+                per_user.c.subscriptions
+            )
+        )
+        PUSH_SUBSCRIPTIONS_PER_USER.reset()
+        for subscriptions, users in result.all():
+            label = str(subscriptions) if subscriptions < 4 else "4+"
+            PUSH_SUBSCRIPTIONS_PER_USER.inc(users, subscriptions=label)
 
     async def _send_notification(
-        self, subscription: PushSubscription, payload: dict
-    ) -> bool:
+        self, subscription: PushSubscription, data: str
+    ) -> PushResponse:
         """Send a notification to a single subscription.
 
         Args:
             subscription: The push subscription
-            payload: The notification payload
+            data: The serialized notification payload
 
         Returns:
-            True if sent successfully, False otherwise
+            The push service's response
         """
         subscription_info = {
             "endpoint": subscription.endpoint,
@@ -208,32 +397,104 @@ class PushService:
             "sub": self.settings.vapid_subject,
         }
 
-        try:
-            webpush(
-                subscription_info=subscription_info,
-                data=json.dumps(payload),
-                vapid_private_key=self.settings.vapid_private_key,
-                vapid_claims=vapid_claims,
-            )
+        response = await self.transport.send(
+            subscription_info=subscription_info,
+            data=data,
+            vapid_private_key=self.settings.vapid_private_key,
+            vapid_claims=vapid_claims,
+        )
+        if response.ok:
             logger.info(f"Push notification sent to {subscription.endpoint[:50]}...")
-            return True
-        except WebPushException as e:
-            logger.error(f"Push notification failed: {e}")
-            # If subscription is invalid (410 Gone or 404), remove it.
-            # Check both the response object and the message string since
-            # pywebpush doesn't always attach the response object.
-            is_gone = False
-            if e.response is not None and hasattr(e.response, "status_code"):
-                is_gone = e.response.status_code in (404, 410)
-            else:
-                msg = str(e)
-                is_gone = "410 Gone" in msg or "404 Not Found" in msg
-            if is_gone:
-                logger.info(
-                    f"Removing invalid subscription: {subscription.endpoint[:50]}..."
+        elif response.gone:
+            # 410 Gone or 404 - the subscription is no longer valid
+            logger.info(
+                f"Removing invalid subscription: {subscription.endpoint[:50]}..."
+            )
+        else:
+            logger.error(f"Push notification failed: {response.error}")
+        return response
+
+
+def build_payload(
+    title: str,
+    body: str,
+    url: Optional[str] = None,
+    icon: Optional[str] = None,
+    actions: Optional[list[dict]] = None,
+    tag: Optional[str] = None,
+    data: Optional[dict] = None,
+) -> dict:
+    """Build the JSON payload read by the service worker."""
+    payload: dict = {
+        "title": title,
+        "body": body,
+    }
+    if url:
+        payload["url"] = url
+    if icon:
+        payload["icon"] = icon
+    if actions:
+        payload["actions"] = actions
+    if tag:
+        payload["tag"] = tag
+    if data:
+        payload["data"] = data
+    return payload
+
+
+def _naive(value: datetime) -> datetime:
+    """Drop the timezone; SQLite hands stored datetimes back without one."""
+    return value.replace(tzinfo=None)
+
+
+class PushSubscriptionPruner:
+    """Remove failing push subscriptions and refresh their gauges, on an interval.
+
+    Runs inside the outbox worker. Several workers pruning at once is
+    harmless; each batch is its own DELETE.
+    """
+
+    def __init__(
+        self,
+        session_maker: Optional[async_sessionmaker] = None,
+        settings: Optional[Settings] = None,
+    ):
+        self.settings = settings or get_settings()
+        self.session_maker = session_maker or database.async_session_maker
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Prune every ``push_prune_interval`` seconds until ``stop`` is set."""
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Push subscription pruning failed")
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(stop.wait(), self.settings.push_prune_interval)
+
+    async def run_once(self) -> int:
+        """Prune in committed batches, then update the metrics.
+
+        Returns:
+            Number of subscriptions removed
+        """
+        stale_before = utc_now() - timedelta(days=self.settings.push_prune_stale_days)
+        batch_size = self.settings.push_prune_batch_size
+        total = 0
+        while True:
+            async with self.session_maker() as db:
+                pruned = await PushService(db).prune(
+                    self.settings.push_prune_max_failures, stale_before, batch_size
                 )
-                await self.db.delete(subscription)
-            return False
-        except Exception as e:
-            logger.error(f"Unexpected error sending push notification: {e}")
-            return False
+                await db.commit()
+            total += pruned
+            if pruned < batch_size:
+                break
+        if total:
+            PUSH_PRUNED.inc(total)
+            logger.info("Pruned %d failing push subscriptions", total)
+
+        async with self.session_maker() as db:
+            await PushService(db).update_metrics()
+        return total
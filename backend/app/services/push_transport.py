@@ -0,0 +1,211 @@
+"""Async Web Push transport.
+
+Payload encryption (ECDH + AES-GCM) and VAPID signing are CPU-bound, so
+they run in a worker thread instead of on the event loop. The VAPID key is
+parsed once and each signed JWT is reused for every push to the same push
+service origin until shortly before it expires. Requests go
+through one shared httpx client, which keeps a single HTTP/2 connection
+per push service origin (FCM, Mozilla autopush, Apple) and multiplexes
+concurrent sends over it. A semaphore caps the number of pushes in flight.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
+
+import httpx
+from py_vapid import Vapid
+from pywebpush import WebPusher, WebPushException
+
+from app.core.config import get_settings
+
+# Lifetime of the VAPID JWT; push services reject tokens over 24 hours
+VAPID_EXPIRY_SECONDS = 12 * 60 * 60
+# Re-sign this long before a cached token expires, so that a token is never
+# sent with only seconds to live
+VAPID_REFRESH_SECONDS = 10 * 60
+# What encrypting to a subscription or loading the VAPID key raises for bad
+# keys: missing or malformed subscription keys, or an unparseable VAPID key
+_ENCRYPTION_ERRORS = (WebPushException, LookupError, TypeError, ValueError)
+
+
+@dataclass(frozen=True)
+class PushResponse:
+    """Result of a single push request."""
+
+    status_code: Optional[int] = None  # None if no response was received
+    error: Optional[str] = None
+    invalid: bool = False  # The subscription's keys cannot be encrypted to
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code is not None and 200 <= self.status_code < 300
+
+    @property
+    def gone(self) -> bool:
+        """The subscription expired or was revoked and should be removed."""
+        return self.status_code in (404, 410)
+
+    @property
+    def retryable(self) -> bool:
+        """Network errors, throttling and server errors may succeed later."""
+        if self.status_code is None:
+            return not self.invalid
+        return self.status_code == 429 or self.status_code >= 500
+
+
+class VapidSigner:
+    """VAPID Authorization headers, cached per audience origin.
+
+    The JWT's only per-request claim is ``aud``, the push service origin,
+    so a handful of signatures cover every subscription. Safe to use from
+    several threads.
+    """
+
+    def __init__(
+        self,
+        private_key: str,
+        claims: dict,
+        lifetime: int = VAPID_EXPIRY_SECONDS,
+        refresh: int = VAPID_REFRESH_SECONDS,
+    ):
+        self._vapid = Vapid.from_string(private_key=private_key)
+        self._claims = claims
+        self._lifetime = lifetime
+        self._refresh = refresh
+        self._cache: dict[str, tuple[int, dict[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def headers(self, endpoint: str, now: Optional[float] = None) -> dict[str, str]:
+        """Get signed headers for a subscription endpoint.
+
+        Args:
+            endpoint: The subscription's push endpoint URL
+            now: Current Unix time (defaults to the clock)
+
+        Returns:
+            A fresh dict holding the ``Authorization`` header
+        """
+        url = urlparse(endpoint)
+        audience = f"{url.scheme}://{url.netloc}"
+        now = time.time() if now is None else now
+
+        with self._lock:
+            cached = self._cache.get(audience)
+        if cached is None or cached[0] - self._refresh <= now:
+            expires = int(now) + self._lifetime
+            claims = {**self._claims, "aud": audience, "exp": expires}
+            cached = (expires, dict(self._vapid.sign(claims)))
+            with self._lock:
+                self._cache[audience] = cached
+        return dict(cached[1])
+
+
+class PushTransport:
+    """Send encrypted Web Push messages without blocking the event loop."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 50,
+        timeout: float = 10.0,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        self._client = client or httpx.AsyncClient(
+            http2=True,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._signers: dict[tuple[str, str], VapidSigner] = {}
+
+    async def send(
+        self,
+        subscription_info: dict,
+        data: str,
+        vapid_private_key: str,
+        vapid_claims: dict,
+        ttl: int = 0,
+    ) -> PushResponse:
+        """Encrypt ``data`` for the subscription and post it to its endpoint.
+
+        Args:
+            subscription_info: ``{"endpoint": ..., "keys": {"p256dh", "auth"}}``
+            data: Serialized payload
+            vapid_private_key: Application server key (base64url or PEM)
+            vapid_claims: VAPID claims, at least ``sub``
+            ttl: Seconds the push service may hold the message
+
+        Returns:
+            The push service's response; never raises for delivery errors
+        """
+        async with self._semaphore:
+            try:
+                signer = self._signer(vapid_private_key, vapid_claims)
+                endpoint, body, headers = await asyncio.to_thread(
+                    _prepare, subscription_info, data, signer
+                )
+            except _ENCRYPTION_ERRORS as e:
+                return PushResponse(error=f"Cannot encrypt: {e}", invalid=True)
+            headers["ttl"] = str(ttl)
+
+            try:
+                response = await self._client.post(
+                    endpoint, content=body, headers=headers
+                )
+            except httpx.HTTPError as e:
+                return PushResponse(error=f"{type(e).__name__}: {e}")
+
+        if 200 <= response.status_code < 300:
+            return PushResponse(status_code=response.status_code)
+        return PushResponse(
+            status_code=response.status_code,
+            error=f"{response.status_code} {response.text[:200]}",
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def _signer(self, vapid_private_key: str, vapid_claims: dict) -> VapidSigner:
+        key = (vapid_private_key, json.dumps(vapid_claims, sort_keys=True))
+        signer = self._signers.get(key)
+        if signer is None:
+            signer = self._signers[key] = VapidSigner(vapid_private_key, vapid_claims)
+        return signer
+
+
+def _prepare(
+    subscription_info: dict, data: str, signer: VapidSigner
+) -> tuple[str, bytes, dict[str, str]]:
+    """Encrypt the payload and build the request headers (runs in a thread).
+
+    Encryption cannot be shared between subscriptions: RFC 8291 derives the
+    content key from each subscriber's keys and a fresh ephemeral key.
+    """
+    endpoint = subscription_info["endpoint"]
+    encoded = WebPusher(subscription_info).encode(data.encode(), "aes128gcm")
+    headers = signer.headers(endpoint)
+    headers["content-encoding"] = "aes128gcm"
+    return endpoint, encoded["body"], headers
+
+
+# Singleton instance
+_push_transport: Optional[PushTransport] = None
+
+
+def get_push_transport() -> PushTransport:
+    """Get the shared push transport."""
+    global _push_transport
+    if _push_transport is None:
+        settings = get_settings()
+        _push_transport = PushTransport(
+            max_concurrency=settings.push_max_concurrency,
+            timeout=settings.push_timeout,
+        )
+    return _push_transport
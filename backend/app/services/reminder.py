@@ -0,0 +1,216 @@
+"""Assignment reminders.
+
+``ReminderScheduler`` periodically finds assignments whose event is within
+one of the configured lead times (``reminder_lead_days``, e.g. 3 and 1 days
+before) and queues an in-app notification and a push for each. Due
+reminders come from one range query over upcoming events, anti-joined
+against the ``assignment_reminders`` ledger, and are written in batches.
+Run it with ``python -m app.workers.reminders``.
+"""
+
+import asyncio
+import logging
+import uuid
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, case, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core import database
+from app.core.config import Settings, get_settings
+from app.core.metrics import registry
+from app.models.notification import NotificationType
+from app.models.reminder import AssignmentReminder
+from app.models.roster import AssignmentStatus, EventAssignment, Roster, RosterEvent
+from app.schemas.notification import NotificationCreate
+from app.services.notification import NotificationService
+
+logger = logging.getLogger(__name__)
+
+REMINDERS_SENT = registry.counter(
+    "assignment_reminders_total", "Assignment reminders queued", ("lead_days",)
+)
+
+
+@dataclass(frozen=True)
+class DueReminder:
+    """An assignment that is owed a reminder."""
+
+    event_assignment_id: uuid.UUID
+    user_id: uuid.UUID
+    event_id: uuid.UUID
+    event_date: date
+    roster_name: str
+    lead_days: int
+
+
+def parse_lead_days(value: str) -> list[int]:
+    """Parse ``"3,1"`` into positive lead times, largest first."""
+    days = {int(part) for part in value.split(",") if part.strip()}
+    if any(d < 1 for d in days):
+        raise ValueError(f"Reminder lead days must be at least 1: {value!r}")
+    return sorted(days, reverse=True)
+
+
+class ReminderService:
+    """Service for finding and queueing due assignment reminders."""
+
+    def __init__(self, db: AsyncSession, lead_days: list[int]):
+        self.db = db
+        self.lead_days = sorted(lead_days)
+
+    def _lead_for(self, today: date):
+        """SQL expression for the lead time an event date currently falls in.
+
+        With leads of 3 and 1 day, events tomorrow get the 1-day reminder and
+        events 2-3 days out the 3-day one. A scheduler that was down and
+        missed a window therefore sends only the most relevant reminder.
+        """
+        return case(
+            *(
+                (RosterEvent.date <= today + timedelta(days=days), days)
+                for days in self.lead_days
+            )
+        )
+
+    async def find_due(self, today: date, limit: int) -> list[DueReminder]:
+        """Find reminders due today that have not been sent yet.
+
+        Args:
+            today: The current date
+            limit: Maximum number of reminders to return
+
+        Returns:
+            Due reminders, soonest event first
+        """
+        if not self.lead_days:
+            return []
+        lead = self._lead_for(today)
+        result = await self.db.execute(
+            select(
+                EventAssignment.id,
+                EventAssignment.user_id,
+                RosterEvent.id,
+                RosterEvent.date,
+                Roster.name,
+                lead,
+            )
+            .join(RosterEvent, RosterEvent.id == EventAssignment.event_id)
+            .join(Roster, Roster.id == RosterEvent.roster_id)
+            .outerjoin(
+                AssignmentReminder,
+                and_(
+                    AssignmentReminder.event_assignment_id == EventAssignment.id,
+                    AssignmentReminder.lead_days == lead,
+                ),
+            )
+            .where(
+                RosterEvent.date > today,
+                RosterEvent.date <= today + timedelta(days=self.lead_days[-1]),
+                RosterEvent.is_cancelled.is_(False),
+                EventAssignment.status != AssignmentStatus.DECLINED,
+                AssignmentReminder.id.is_(None),
+            )
+            .order_by(RosterEvent.date, EventAssignment.id)
+            .limit(limit)
+        )
+        return [DueReminder(*row) for row in result.all()]
+
+    async def enqueue(self, reminders: list[DueReminder], today: date) -> None:
+        """Record reminders in the ledger and queue their notifications.
+
+        Issues one INSERT per table for the whole batch; the caller commits.
+        """
+        if not reminders:
+            return
+        await self.db.execute(
+            insert(AssignmentReminder),
+            [
+                {"event_assignment_id": r.event_assignment_id, "lead_days": r.lead_days}
+                for r in reminders
+            ],
+        )
+
+        notifications = NotificationService(self.db)
+        messages = [(r, _reminder_message(r, today)) for r in reminders]
+        await notifications.create_notification_batch(
+            [
+                NotificationCreate(
+                    user_id=r.user_id,
+                    type=NotificationType.ASSIGNMENT_REMINDER,
+                    title=title,
+                    message=message,
+                    reference_id=r.event_assignment_id,
+                )
+                for r, (title, message) in messages
+            ]
+        )
+        for r, (title, message) in messages:
+            notifications.outbox.enqueue_push(
+                user_id=r.user_id,
+                title=title,
+                body=message,
+                url=f"/assignments/{r.event_assignment_id}",
+                tag=f"reminder-{r.event_assignment_id}",
+                notification_type=NotificationType.ASSIGNMENT_REMINDER,
+            )
+            REMINDERS_SENT.inc(lead_days=str(r.lead_days))
+
+
+def _reminder_message(reminder: DueReminder, today: date) -> tuple[str, str]:
+    days = (reminder.event_date - today).days
+    when = "tomorrow" if days == 1 else f"in {days} days"
+    formatted_date = reminder.event_date.strftime("%A, %B %d")
+    return (
+        f"Reminder: {reminder.roster_name}",
+        f"You're serving {when} ({formatted_date})",
+    )
+
+
+class ReminderScheduler:
+    """Queue due assignment reminders in batches, on an interval."""
+
+    def __init__(
+        self,
+        session_maker: Optional[async_sessionmaker] = None,
+        settings: Optional[Settings] = None,
+    ):
+        self.settings = settings or get_settings()
+        self.session_maker = session_maker or database.async_session_maker
+        self.lead_days = parse_lead_days(self.settings.reminder_lead_days)
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Scan for due reminders every ``reminder_interval`` until ``stop``."""
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Reminder scan failed")
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(stop.wait(), self.settings.reminder_interval)
+
+    async def run_once(self, today: Optional[date] = None) -> int:
+        """Queue every reminder due today, one committed batch at a time.
+
+        Returns:
+            Number of reminders queued
+        """
+        today = today or date.today()
+        batch_size = self.settings.reminder_batch_size
+        total = 0
+        while True:
+            async with self.session_maker() as db:
+                service = ReminderService(db, self.lead_days)
+                due = await service.find_due(today, batch_size)
+                await service.enqueue(due, today)
+                await db.commit()
+            total += len(due)
+            if len(due) < batch_size:
+                break
+        if total:
+            logger.info("Queued %d assignment reminders", total)
+        return total
@@ -5,7 +5,7 @@ from typing import Optional
 
 from sqlalchemy import and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import contains_eager, selectinload
 
 from app.models.roster import (
     Assignment,
@@ -35,6 +35,21 @@ def frontend_day_to_python_weekday(day: int) -> int:
     return (day - 1) % 7
 
 
+def _is_unfilled(event: RosterEvent) -> bool:
+    """Whether an event has fewer assigned volunteers than its roster needs.
+
+    Both PENDING and CONFIRMED assignments count as "assigned": PENDING means
+    the volunteer has been assigned but hasn't confirmed yet. DECLINED
+    assignments are not counted since those slots need to be refilled.
+    """
+    assigned_count = sum(
+        1
+        for a in event.event_assignments
+        if a.status in (AssignmentStatus.CONFIRMED, AssignmentStatus.PENDING)
+    )
+    return assigned_count < event.roster.slots_needed
+
+
 def _get_monthly_date(year: int, month: int, day: int) -> date:
     """Get a valid date by clamping the day to the month's max valid day.
 
@@ -477,21 +492,41 @@ class RosterService:
             end_date=end_date,
             include_cancelled=False,
         )
+        return [event for event in events if _is_unfilled(event)]
 
-        unfilled = []
-        for event in events:
-            # Count both PENDING and CONFIRMED assignments as "assigned"
-            # PENDING means the volunteer has been assigned but hasn't confirmed yet
-            # DECLINED assignments are not counted since those slots need to be refilled
-            assigned_count = sum(
-                1
-                for a in event.event_assignments
-                if a.status in (AssignmentStatus.CONFIRMED, AssignmentStatus.PENDING)
-            )
-            if assigned_count < event.roster.slots_needed:
-                unfilled.append(event)
+    async def get_unfilled_events_for_teams(
+        self,
+        team_ids: list[uuid.UUID],
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> list[RosterEvent]:
+        """Get unfilled events across several teams, in date order.
 
-        return unfilled
+        Loads every team's events in one query instead of one per team.
+        """
+        if not team_ids:
+            return []
+        query = (
+            select(RosterEvent)
+            .join(Roster)
+            .options(
+                contains_eager(RosterEvent.roster),
+                selectinload(RosterEvent.event_assignments).selectinload(
+                    EventAssignment.user
+                ),
+            )
+            .where(
+                Roster.team_id.in_(team_ids),
+                RosterEvent.is_cancelled.is_(False),
+            )
+        )
+        if start_date:
+            query = query.where(RosterEvent.date >= start_date)
+        if end_date:
+            query = query.where(RosterEvent.date <= end_date)
+        query = query.order_by(RosterEvent.date, Roster.name)
+        result = await self.db.execute(query)
+        return [event for event in result.scalars().all() if _is_unfilled(event)]
 
     async def update_event(
         self,
@@ -0,0 +1,363 @@
+"""Real-time notification stream.
+
+Clients hold ``GET /api/notifications/stream`` (Server-Sent Events) open
+instead of polling. Changes a client cares about - new notifications and
+status changes of its assignments - are collected on the database session
+as they are flushed and handed to the process-wide ``StreamBroker`` only
+after the transaction commits, so a rolled-back change is never announced.
+
+The broker only reaches clients connected to the same process. With
+``STREAM_PG_FANOUT`` enabled each process also relays its events through
+Postgres LISTEN/NOTIFY, so a change committed by one API worker (or by the
+reminder worker) reaches clients connected to any other.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+import asyncpg
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.metrics import registry
+from app.models.notification import Notification
+from app.models.roster import EventAssignment
+from app.schemas.notification import NotificationResponse
+
+logger = logging.getLogger(__name__)
+
+FANOUT_CHANNEL = "rooster_stream"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+FANOUT_MAX_PAYLOAD = 7000
+# Backoff between attempts to re-establish a lost fan-out connection
+FANOUT_RECONNECT_MIN_DELAY = 1.0
+FANOUT_RECONNECT_MAX_DELAY = 30.0
+
+_SESSION_KEY = "stream_events"
+
+STREAM_CONNECTIONS = registry.gauge(
+    "stream_connections", "Clients connected to the notification stream"
+)
+STREAM_EVENTS = registry.counter(
+    "stream_events_total", "Events published to the notification stream", ("type",)
+)
+STREAM_RESYNCS = registry.counter(
+    "stream_resyncs_total", "Streams closed because the client fell behind"
+)
+FANOUT_RECONNECTS = registry.counter(
+    "stream_fanout_reconnects_total", "Times the fan-out connection was re-established"
+)
+
+
+@dataclass(frozen=True)
+class StreamEvent:
+    """A change to announce to one user's connected clients."""
+
+    user_id: uuid.UUID
+    type: str  # "notification", "assignment" or "resync"
+    data: dict
+
+    def encode(self) -> str:
+        """Format as a Server-Sent Events message."""
+        return f"event: {self.type}\ndata: {json.dumps(self.data)}\n\n"
+
+    def to_dict(self) -> dict:
+        return {"user_id": str(self.user_id), "type": self.type, "data": self.data}
+
+    @classmethod
+    def from_dict(cls, value: dict) -> "StreamEvent":
+        return cls(uuid.UUID(value["user_id"]), value["type"], value["data"])
+
+
+class Subscription:
+    """One connected client's queue of events.
+
+    A client that stops reading does not hold events forever: once its
+    queue is full it is marked ``overflowed`` and the stream tells it to
+    resync (refetch) and closes.
+    """
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue[StreamEvent] = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, stream_event: StreamEvent) -> None:
+        try:
+            self.queue.put_nowait(stream_event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class StreamBroker:
+    """In-process pub/sub of stream events, keyed by user."""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self.fanout: Optional["PostgresFanout"] = None
+        self._subscribers: dict[uuid.UUID, set[Subscription]] = defaultdict(set)
+
+    @contextmanager
+    def subscribe(self, user_id: uuid.UUID) -> Iterator[Subscription]:
+        """Receive the user's events for the duration of the block."""
+        subscription = Subscription(self.queue_size)
+        self._subscribers[user_id].add(subscription)
+        STREAM_CONNECTIONS.inc()
+        try:
+            yield subscription
+        finally:
+            STREAM_CONNECTIONS.dec()
+            subscribers = self._subscribers[user_id]
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[user_id]
+
+    def publish(self, events: list[StreamEvent], relay: bool = True) -> None:
+        """Deliver events to local subscribers and, if enabled, other workers.
+
+        Args:
+            events: The events to deliver
+            relay: Also send them over the Postgres fan-out (False for
+                events that arrived through it)
+        """
+        for stream_event in events:
+            STREAM_EVENTS.inc(type=stream_event.type)
+            for subscription in self._subscribers.get(stream_event.user_id, ()):
+                subscription.put(stream_event)
+        if relay and self.fanout is not None:
+            self.fanout.send(events)
+
+    def resync_all(self) -> None:
+        """Tell every connected client to refetch, e.g. after missed events."""
+        for user_id, subscriptions in self._subscribers.items():
+            for subscription in subscriptions:
+                subscription.put(StreamEvent(user_id, "resync", {}))
+
+
+class PostgresFanout:
+    """Relay stream events between processes over LISTEN/NOTIFY.
+
+    Uses one dedicated asyncpg connection per process, outside the pool,
+    both to LISTEN and to send. NOTIFY runs after the originating commit, so
+    a relayed event is never announced for a change that rolled back.
+
+    If the connection drops it is re-established, with backoff, and LISTEN
+    is issued again. Events relayed meanwhile were missed, so local clients
+    are then told to resync; events to send wait for the new connection.
+    """
+
+    def __init__(self, dsn: str, broker: StreamBroker):
+        self.dsn = dsn
+        self.broker = broker
+        self.origin = uuid.uuid4().hex
+        self._pending: asyncio.Queue[list[StreamEvent]] = asyncio.Queue()
+        self._connection: Optional[asyncpg.Connection] = None
+        self._connected = asyncio.Event()
+        self._lost = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        await self._connect()
+        self._tasks = [
+            asyncio.create_task(self._send_pending()),
+            asyncio.create_task(self._reconnect_when_lost()),
+        ]
+
+    async def aclose(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        if self._connection is not None:
+            await self._connection.close()
+
+    async def _connect(self) -> None:
+        connection = await asyncpg.connect(self.dsn)
+        connection.add_termination_listener(self._on_terminate)
+        await connection.add_listener(FANOUT_CHANNEL, self._on_notify)
+        self._connection = connection
+        self._lost.clear()
+        self._connected.set()
+
+    def _on_terminate(self, connection: asyncpg.Connection) -> None:
+        if connection is self._connection:
+            self._connected.clear()
+            self._lost.set()
+
+    async def _reconnect_when_lost(self) -> None:
+        while True:
+            await self._lost.wait()
+            logger.warning("Stream fan-out connection lost, reconnecting")
+            delay = FANOUT_RECONNECT_MIN_DELAY
+            while True:
+                try:
+                    await self._connect()
+                    break
+                except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                    logger.warning(
+                        "Stream fan-out reconnect failed (%s), retrying in %.0fs",
+                        e,
+                        delay,
+                    )
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, FANOUT_RECONNECT_MAX_DELAY)
+            FANOUT_RECONNECTS.inc()
+            self.broker.resync_all()
+
+    def send(self, events: list[StreamEvent]) -> None:
+        self._pending.put_nowait(events)
+
+    def payloads(self, events: list[StreamEvent]) -> list[str]:
+        """Pack events into as few NOTIFY payloads as fit the size limit."""
+        payloads: list[str] = []
+        batch: list[dict] = []
+        size = 0
+        for stream_event in events:
+            item = stream_event.to_dict()
+            item_size = len(json.dumps(item))
+            if batch and size + item_size > FANOUT_MAX_PAYLOAD:
+                payloads.append(self._payload(batch))
+                batch, size = [], 0
+            batch.append(item)
+            size += item_size
+        if batch:
+            payloads.append(self._payload(batch))
+        return payloads
+
+    def _payload(self, batch: list[dict]) -> str:
+        return json.dumps({"origin": self.origin, "events": batch})
+
+    async def _send_pending(self) -> None:
+        while True:
+            events = await self._pending.get()
+            await self._connected.wait()
+            try:
+                for payload in self.payloads(events):
+                    await self._connection.execute(
+                        "SELECT pg_notify($1, $2)", FANOUT_CHANNEL, payload
+                    )
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                logger.exception("Could not relay %d stream events", len(events))
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        message = json.loads(payload)
+        if message["origin"] == self.origin:
+            return
+        self.broker.publish(
+            [StreamEvent.from_dict(item) for item in message["events"]], relay=False
+        )
+
+
+# Singleton instance
+_broker: Optional[StreamBroker] = None
+
+
+def get_broker() -> StreamBroker:
+    """Get this process's stream broker."""
+    global _broker
+    if _broker is None:
+        _broker = StreamBroker(get_settings().stream_queue_size)
+    return _broker
+
+
+@asynccontextmanager
+async def fanout_lifespan() -> AsyncIterator[None]:
+    """Run the Postgres fan-out for the block, if STREAM_PG_FANOUT is on."""
+    settings = get_settings()
+    url = make_url(settings.database_url)
+    if not settings.stream_pg_fanout or url.get_backend_name() != "postgresql":
+        yield
+        return
+
+    broker = get_broker()
+    fanout = PostgresFanout(
+        url.set(drivername="postgresql").render_as_string(hide_password=False),
+        broker,
+    )
+    await fanout.start()
+    broker.fanout = fanout
+    try:
+        yield
+    finally:
+        broker.fanout = None
+        await fanout.aclose()
+
+
+async def event_stream(
+    user_id: uuid.UUID, heartbeat: float, broker: Optional[StreamBroker] = None
+) -> AsyncIterator[str]:
+    """Server-Sent Events for one client, until it disconnects.
+
+    Starts with a ``ready`` event (clients refetch once, since they may
+    have missed changes while disconnected) and sends a comment every
+    ``heartbeat`` seconds so proxies keep the connection open.
+    """
+    broker = broker or get_broker()
+    with broker.subscribe(user_id) as subscription:
+        yield "retry: 5000\nevent: ready\ndata: {}\n\n"
+        while True:
+            try:
+                stream_event = await asyncio.wait_for(
+                    subscription.queue.get(), heartbeat
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield stream_event.encode()
+            if stream_event.type == "resync":
+                return
+            if subscription.overflowed and subscription.queue.empty():
+                STREAM_RESYNCS.inc()
+                yield "event: resync\ndata: {}\n\n"
+                return
+
+
+def queue_event(session: Session, user_id: uuid.UUID, type: str, data: dict) -> None:
+    """Announce an event once the session's transaction commits."""
+    session.info.setdefault(_SESSION_KEY, []).append(StreamEvent(user_id, type, data))
+
+
+def notification_event(notification: Notification) -> dict:
+    """The event data of a notification: the same shape as in the inbox."""
+    return NotificationResponse.model_validate(notification).model_dump(mode="json")
+
+
+def _assignment_event(assignment: EventAssignment) -> dict:
+    return {
+        "id": str(assignment.id),
+        "event_id": str(assignment.event_id),
+        "status": assignment.status.value,
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session: Session, flush_context) -> None:
+    for obj in session.new:
+        if isinstance(obj, Notification):
+            queue_event(session, obj.user_id, "notification", notification_event(obj))
+        elif isinstance(obj, EventAssignment):
+            queue_event(session, obj.user_id, "assignment", _assignment_event(obj))
+    for obj in session.dirty:
+        if (
+            isinstance(obj, EventAssignment)
+            and inspect(obj).attrs.status.history.has_changes()
+        ):
+            queue_event(session, obj.user_id, "assignment", _assignment_event(obj))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session: Session) -> None:
+    events = session.info.pop(_SESSION_KEY, None)
+    if events:
+        get_broker().publish(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
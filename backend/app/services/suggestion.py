@@ -6,9 +6,9 @@ from sqlalchemy import and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.models.availability import Unavailability
 from app.models.roster import EventAssignment, RosterEvent, AssignmentStatus
 from app.models.team import TeamMember
+from app.services.availability import AvailabilityService
 
 
 class Suggestion:
@@ -122,16 +122,10 @@ class SuggestionService:
         # Include all members (including placeholders - they are real people who haven't joined yet)
         real_members = [m for m in members if m.user]
 
-        # Get unavailable user IDs for this date
-        unavailable_result = await self.db.execute(
-            select(Unavailability.user_id).where(
-                and_(
-                    Unavailability.date == event_date,
-                    Unavailability.user_id.in_([m.user_id for m in real_members]),
-                )
-            )
-        )
-        unavailable_user_ids = set(unavailable_result.scalars().all())
+        # Get unavailable user IDs for this date, by single date or by rule
+        unavailable_user_ids = await AvailabilityService(
+            self.db
+        ).get_unavailable_user_ids([m.user_id for m in real_members], event_date)
 
         # Get all events in this team's rosters
         roster_ids_result = await self.db.execute(
@@ -354,20 +348,12 @@ class SuggestionService:
         member_scores.sort(key=lambda m: (-m["score"], m["member"].user.name))
         sorted_members = [m["member"] for m in member_scores]
 
-        # Get unavailability for all dates in the roster
-        event_dates = [e["event"].date for e in unfilled_events]
-        unavailability_result = await self.db.execute(
-            select(Unavailability).where(
-                and_(
-                    Unavailability.date.in_(event_dates),
-                    Unavailability.user_id.in_([m.user_id for m in sorted_members]),
-                )
-            )
+        # Get (user_id, date) pairs that are unavailable, by single date or
+        # by rule, for all dates in the roster
+        unavailable_set = await AvailabilityService(self.db).get_unavailable_dates(
+            [m.user_id for m in sorted_members],
+            [e["event"].date for e in unfilled_events],
         )
-        unavailability_records = unavailability_result.scalars().all()
-
-        # Build a set of (user_id, date) tuples for quick lookup
-        unavailable_set = {(u.user_id, u.date) for u in unavailability_records}
 
         # Round-robin assignment
         assignments_created = []
@@ -0,0 +1,42 @@
+"""Outbox dispatcher worker.
+
+Delivers the email and push messages queued by the API, and periodically
+prunes push subscriptions that keep failing. Run it next to the API server
+with ``python -m app.workers.outbox``; several workers can run at once
+since each claims its own batch.
+"""
+
+import asyncio
+import logging
+import signal
+
+from app.core.database import engine
+from app.services import email_templates
+from app.services.outbox import OutboxDispatcher
+from app.services.push import PushSubscriptionPruner
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    email_templates.preload()
+    logger.info("Outbox dispatcher started")
+    dispatcher = OutboxDispatcher()
+    try:
+        await asyncio.gather(dispatcher.run(stop), PushSubscriptionPruner().run(stop))
+    finally:
+        await dispatcher.email_service.aclose()
+        await engine.dispose()
+    logger.info("Outbox dispatcher stopped")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    asyncio.run(main())
@@ -0,0 +1,45 @@
+"""Assignment reminder worker.
+
+Queues reminder notifications for upcoming assignments at the lead times in
+``REMINDER_LEAD_DAYS``; the outbox worker then delivers the pushes. It also
+deletes read notifications older than ``NOTIFICATION_RETENTION_DAYS``. Run
+it with ``python -m app.workers.reminders``. One instance is enough, and a
+second one cannot double-send since the reminder ledger is unique per
+assignment and lead time. With ``STREAM_PG_FANOUT`` the reminders it
+creates are relayed to clients connected to the API.
+"""
+
+import asyncio
+import logging
+import signal
+
+from app.core.database import engine
+from app.services.notification import NotificationRetention
+from app.services.reminder import ReminderScheduler
+from app.services.stream import fanout_lifespan
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    logger.info("Reminder scheduler started")
+    try:
+        async with fanout_lifespan():
+            await asyncio.gather(
+                ReminderScheduler().run(stop), NotificationRetention().run(stop)
+            )
+    finally:
+        await engine.dispose()
+    logger.info("Reminder scheduler stopped")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    asyncio.run(main())
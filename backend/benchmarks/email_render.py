@@ -0,0 +1,93 @@
+"""Email rendering throughput.
+
+Renders personalized invite and assignment emails through EmailService
+(compiled, cached templates), and straight from the template files with
+the cache bypassed, as a loader without a cache would.
+
+Usage (from backend/):
+    python -m benchmarks.email_render --messages 10000
+"""
+
+import argparse
+import time
+
+from app.services.email import EmailService
+from app.services.email_templates import load_template, preload
+
+
+def _values(i: int) -> tuple[str, dict]:
+    if i % 2:
+        return "invite", {
+            "invitee_name": f"Volunteer {i}",
+            "team_name": "Media & Worship",
+            "inviter_name": "Team Lead",
+            "invite_url": f"https://rooster.example.com/invite/token-{i}",
+        }
+    return "assignment", {
+        "user_name": f"Volunteer {i}",
+        "roster_name": "Sunday Service <AM>",
+        "team_name": "Media & Worship",
+        "event_date": "November 01, 2026",
+        "time_str": " at 9:30 AM",
+    }
+
+
+def bench_service(messages: int) -> float:
+    service = EmailService()
+    # Keeps invite_email from logging a warning for every render
+    service.settings.email_enabled = True
+    service.settings.smtp_user = "bench"
+
+    start = time.perf_counter()
+    for i in range(messages):
+        if i % 2:
+            service.invite_email(
+                to_email=f"user{i}@example.com",
+                invitee_name=f"Volunteer {i}",
+                team_name="Media & Worship",
+                inviter_name="Team Lead",
+                token=f"token-{i}",
+            )
+        else:
+            service.assignment_email(
+                to_email=f"user{i}@example.com",
+                user_name=f"Volunteer {i}",
+                roster_name="Sunday Service <AM>",
+                team_name="Media & Worship",
+                event_date="November 01, 2026",
+                event_time="9:30 AM",
+            )
+    return time.perf_counter() - start
+
+
+def bench_uncached(messages: int) -> float:
+    start = time.perf_counter()
+    for i in range(messages):
+        name, values = _values(i)
+        load_template(name).render(**values)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=10_000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    preload()
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{'compile all templates:':28} {compile_ms:8.2f} ms")
+    for label, bench in [
+        ("EmailService, cached:", bench_service),
+        ("no template cache:", bench_uncached),
+    ]:
+        elapsed = bench(args.messages)
+        print(
+            f"{label:28} {args.messages / elapsed:8.0f} msgs/sec "
+            f"({elapsed * 1e6 / args.messages:.1f} us/msg)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Push fan-out throughput against a local stub push service.
+
+Compares the old path (pywebpush's blocking ``webpush()`` called once per
+subscription, one after another) with ``PushTransport`` fanning out
+concurrently, over HTTP/1.1 and over HTTP/2. Real push services negotiate
+HTTP/2 through TLS; the local stub speaks cleartext HTTP/2 (prior
+knowledge) instead, so the transport's client is built with http1=False.
+The stubs answer 201 after a fixed delay that stands in for the network
+round trip to FCM/Mozilla/Apple.
+
+Usage (from backend/):
+    python -m benchmarks.push_fanout --pushes 500 --latency-ms 30
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import threading
+import time
+
+import h2.config
+import h2.connection
+import h2.events
+import httpx
+import uvicorn
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from pywebpush import webpush
+
+from app.services.push_transport import PushTransport
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _subscription(endpoint: str) -> dict:
+    public_key = ec.generate_private_key(ec.SECP256R1()).public_key()
+    p256dh = public_key.public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+    )
+    return {
+        "endpoint": endpoint,
+        "keys": {"p256dh": _b64(p256dh), "auth": _b64(os.urandom(16))},
+    }
+
+
+def start_http1_stub(port: int, latency: float) -> uvicorn.Server:
+    """Run an HTTP/1.1 push service stub that accepts everything."""
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        while (await receive()).get("more_body"):
+            pass
+        await asyncio.sleep(latency)
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def start_http2_stub(port: int, latency: float) -> None:
+    """Run a cleartext HTTP/2 push service stub that accepts everything."""
+
+    async def serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=False))
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+        responses = set()
+
+        async def respond(stream_id: int) -> None:
+            await asyncio.sleep(latency)
+            conn.send_headers(stream_id, [(":status", "201")], end_stream=True)
+            writer.write(conn.data_to_send())
+
+        while data := await reader.read(65536):
+            for event in conn.receive_data(data):
+                if isinstance(event, h2.events.DataReceived):
+                    conn.acknowledge_received_data(
+                        event.flow_controlled_length, event.stream_id
+                    )
+                elif isinstance(event, h2.events.StreamEnded):
+                    task = asyncio.create_task(respond(event.stream_id))
+                    responses.add(task)
+                    task.add_done_callback(responses.discard)
+            writer.write(conn.data_to_send())
+        writer.close()
+
+    started = threading.Event()
+
+    async def run() -> None:
+        await asyncio.start_server(serve, "127.0.0.1", port)
+        started.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=asyncio.run, args=(run(),), daemon=True).start()
+    started.wait()
+
+
+def bench_serial(subscriptions, data, key, claims) -> float:
+    start = time.perf_counter()
+    for subscription in subscriptions:
+        webpush(
+            subscription_info=subscription,
+            data=data,
+            vapid_private_key=key,
+            vapid_claims=dict(claims),
+        )
+    return time.perf_counter() - start
+
+
+async def bench_transport(
+    subscriptions, data, key, claims, concurrency, http2
+) -> float:
+    client = None
+    if http2:
+        client = httpx.AsyncClient(http1=False, http2=True)
+    transport = PushTransport(max_concurrency=concurrency, client=client)
+    try:
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *(transport.send(s, data, key, claims) for s in subscriptions)
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        await transport.aclose()
+    assert all(r.ok for r in responses), [r.error for r in responses if not r.ok]
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pushes", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--serial-pushes",
+        type=int,
+        default=100,
+        help="The serial path is slow; time fewer pushes and scale the rate",
+    )
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    server = start_http1_stub(args.port, latency)
+    start_http2_stub(args.port + 1, latency)
+    http1 = [
+        _subscription(f"http://127.0.0.1:{args.port}/push/{i}")
+        for i in range(args.pushes)
+    ]
+    http2 = [
+        {**s, "endpoint": f"http://127.0.0.1:{args.port + 1}/push/{i}"}
+        for i, s in enumerate(http1)
+    ]
+    vapid_key = ec.generate_private_key(ec.SECP256R1())
+    key = _b64(vapid_key.private_numbers().private_value.to_bytes(32, "big"))
+    claims = {"sub": "mailto:bench@example.com"}
+    data = json.dumps({"title": "New Assignment", "body": "Sunday Service"})
+
+    serial = http1[: args.serial_pushes]
+    elapsed = bench_serial(serial, data, key, claims)
+    print(f"{'serial webpush(), HTTP/1.1':32} {len(serial) / elapsed:8.1f} sends/sec")
+
+    for label, subscriptions, use_http2 in [
+        ("HTTP/1.1", http1, False),
+        ("HTTP/2", http2, True),
+    ]:
+        elapsed = asyncio.run(
+            bench_transport(
+                subscriptions, data, key, claims, args.concurrency, use_http2
+            )
+        )
+        label = f"PushTransport x{args.concurrency}, {label}"
+        print(f"{label:32} {len(subscriptions) / elapsed:8.1f} sends/sec")
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""SMTP throughput against a local STARTTLS sink.
+
+Compares the old path (blocking smtplib: connect, STARTTLS, AUTH, send and
+QUIT for every email) with ``SMTPProvider``'s pooled sessions, sending one
+email at a time and concurrently. The sink is aiosmtpd with a throwaway
+self-signed certificate. On loopback the round trips are nearly free, so
+the concurrent run mostly shows its gain against a real, distant server.
+
+Usage (from backend/):
+    python -m benchmarks.smtp_pool --emails 200
+"""
+
+import argparse
+import asyncio
+import datetime
+import logging
+import smtplib
+import ssl
+import tempfile
+import time
+from email.mime.text import MIMEText
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from app.core.config import Settings
+from app.services.email import SMTPProvider
+
+HTML = "<p>You've been assigned to Sunday Service on November 01, 2026</p>"
+
+
+class Sink:
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def self_signed_cert(directory: str) -> tuple[str, str]:
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), False)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = f"{directory}/cert.pem", f"{directory}/key.pem"
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(
+            key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+        )
+    return cert_path, key_path
+
+
+def bench_smtplib(settings: Settings, context: ssl.SSLContext, emails: int) -> float:
+    start = time.perf_counter()
+    for i in range(emails):
+        message = MIMEText(HTML, "html")
+        message["Subject"] = "New assignment"
+        message["To"] = f"user{i}@example.com"
+        with smtplib.SMTP(settings.smtp_host, settings.smtp_port) as server:
+            server.starttls(context=context)
+            server.login(settings.smtp_user, settings.smtp_password)
+            server.sendmail("rooster@example.com", message["To"], message.as_string())
+    return time.perf_counter() - start
+
+
+async def bench_pool(
+    settings: Settings, context: ssl.SSLContext, emails: int, concurrent: bool
+) -> float:
+    provider = SMTPProvider(settings, tls_context=context)
+    sends = (
+        provider.send(
+            to_email=f"user{i}@example.com",
+            subject="New assignment",
+            html_content=HTML,
+            text_content=None,
+            from_email="rooster@example.com",
+            from_name="Rooster",
+        )
+        for i in range(emails)
+    )
+    start = time.perf_counter()
+    if concurrent:
+        results = await asyncio.gather(*sends)
+    else:
+        results = [await send for send in sends]
+    elapsed = time.perf_counter() - start
+    await provider.aclose()
+    assert all(results)
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--emails", type=int, default=200)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args()
+    logging.getLogger("mail.log").setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = self_signed_cert(directory)
+        server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        server_context.load_cert_chain(cert_path, key_path)
+        client_context = ssl.create_default_context(cafile=cert_path)
+
+    sink = Sink()
+    controller = Controller(
+        sink,
+        hostname="localhost",
+        port=args.port,
+        tls_context=server_context,
+        require_starttls=True,
+        authenticator=lambda *args: AuthResult(success=True),
+    )
+    controller.start()
+    settings = Settings(
+        smtp_host="localhost",
+        smtp_port=args.port,
+        smtp_user="rooster",
+        smtp_password="secret",
+        smtp_use_tls=True,
+        smtp_pool_size=args.pool_size,
+    )
+
+    try:
+        runs = [
+            (
+                "smtplib, new session per email",
+                bench_smtplib(settings, client_context, args.emails),
+            ),
+            (
+                "SMTPProvider, sequential",
+                asyncio.run(bench_pool(settings, client_context, args.emails, False)),
+            ),
+            (
+                f"SMTPProvider, pool of {args.pool_size}",
+                asyncio.run(bench_pool(settings, client_context, args.emails, True)),
+            ),
+        ]
+    finally:
+        controller.stop()
+
+    assert sink.received == 3 * args.emails
+    for label, elapsed in runs:
+        print(f"{label:32} {args.emails / elapsed:8.1f} emails/sec")
+
+
+if __name__ == "__main__":
+    main()
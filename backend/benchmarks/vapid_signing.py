@@ -0,0 +1,70 @@
+"""CPU cost of preparing one Web Push request.
+
+Compares preparing every push from scratch (parse the VAPID key, sign a new
+JWT, encrypt the payload), as ``webpush()`` does, with ``PushTransport``'s
+path, where a ``VapidSigner`` holds the parsed key and reuses one token per
+push service origin. Both sides encrypt, since encryption is inherently per
+subscription. Times are process CPU time, not wall time.
+
+Usage (from backend/):
+    python -m benchmarks.vapid_signing --pushes 2000
+"""
+
+import argparse
+import json
+import time
+from urllib.parse import urlparse
+
+from cryptography.hazmat.primitives.asymmetric import ec
+from py_vapid import Vapid
+from pywebpush import WebPusher
+
+from app.services.push_transport import VapidSigner, _prepare
+from benchmarks.push_fanout import _b64, _subscription
+
+ORIGINS = [
+    "https://fcm.googleapis.com/fcm/send",
+    "https://updates.push.services.mozilla.com/wpush/v2",
+    "https://web.push.apple.com",
+]
+
+
+def prepare_uncached(subscription, data, key, claims):
+    WebPusher(subscription).encode(data.encode(), "aes128gcm")
+    url = urlparse(subscription["endpoint"])
+    audience = f"{url.scheme}://{url.netloc}"
+    Vapid.from_string(private_key=key).sign(
+        {**claims, "aud": audience, "exp": int(time.time()) + 3600}
+    )
+
+
+def cpu_per_push(prepare, subscriptions, *args) -> float:
+    start = time.process_time()
+    for subscription in subscriptions:
+        prepare(subscription, *args)
+    return (time.process_time() - start) / len(subscriptions) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pushes", type=int, default=2000)
+    args = parser.parse_args()
+
+    subscriptions = [
+        _subscription(f"{ORIGINS[i % len(ORIGINS)]}/{i}") for i in range(args.pushes)
+    ]
+    vapid_key = ec.generate_private_key(ec.SECP256R1())
+    key = _b64(vapid_key.private_numbers().private_value.to_bytes(32, "big"))
+    claims = {"sub": "mailto:bench@example.com"}
+    data = json.dumps({"title": "New Assignment", "body": "Sunday Service"})
+    signer = VapidSigner(key, claims)
+
+    uncached = cpu_per_push(prepare_uncached, subscriptions, data, key, claims)
+    cached = cpu_per_push(_prepare, subscriptions, data, signer)
+    print(f"sign every push:        {uncached:7.1f} us CPU/push")
+    print(f"VapidSigner per origin: {cached:7.1f} us CPU/push")
+    print(f"saved:                  {(1 - cached / uncached) * 100:7.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import asyncio
+from contextlib import contextmanager
 from typing import AsyncGenerator
 
 import pytest
@@ -6,7 +7,8 @@ from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from app.core.database import Base, get_db
+from app.core.database import Base, get_db, get_read_db
+from app.core.query_stats import count_queries
 from app.main import app
 
 # Use an in-memory SQLite database for testing with StaticPool for connection sharing
@@ -62,7 +64,13 @@ async def test_client(setup_db) -> AsyncGenerator[AsyncClient, None]:
             yield session
             await session.commit()
 
+    async def override_get_read_db() -> AsyncGenerator[AsyncSession, None]:
+        """Override the read session - tests use a single database."""
+        async with TestingSessionLocal() as session:
+            yield session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_read_db
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
@@ -99,6 +107,30 @@ async def auth_headers(test_client: AsyncClient, test_user):
     return {"Authorization": f"Bearer {token}"}
 
 
+@pytest.fixture
+def assert_max_queries():
+    """Fail if the block issues more than n SQL statements.
+
+    Usage:
+        with assert_max_queries(3):
+            await client.get("/api/notifications", headers=auth_headers)
+    """
+
+    @contextmanager
+    def _assert_max_queries(n: int):
+        with count_queries() as stats:
+            yield stats
+        assert stats.count <= n, (
+            f"Expected at most {n} queries, got {stats.count}:\n"
+            + "\n".join(
+                f"  {count}x {statement}"
+                for statement, count in stats.statements.most_common()
+            )
+        )
+
+    return _assert_max_queries
+
+
 # Alias fixtures for convenience
 @pytest.fixture
 async def client(test_client):
@@ -0,0 +1,560 @@
+"""Tests for date range and recurring unavailability rules."""
+
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.availability import (
+    Unavailability,
+    UnavailabilityRule,
+    UnavailabilityRuleKind,
+)
+from app.models.notification import Notification, NotificationType
+from app.models.organisation import Organisation
+from app.models.outbox import OutboxChannel, OutboxMessage
+from app.models.roster import (
+    AssignmentMode,
+    AssignmentStatus,
+    EventAssignment,
+    RecurrencePattern,
+    Roster,
+    RosterEvent,
+)
+from app.models.team import Team, TeamMember, TeamRole
+from app.models.user import User
+from app.schemas.availability import ConflictResponse
+from app.services.availability import AvailabilityService, rule_covers, rule_occurs_on
+from app.services.dashboard import DashboardService
+from app.services.notification import NotificationService
+from app.services.suggestion import SuggestionService
+
+YEAR_START = date(2026, 1, 1)
+
+
+def _rules(user: User) -> list[UnavailabilityRule]:
+    return [
+        # 1 Jul - 15 Aug
+        UnavailabilityRule(
+            user_id=user.id,
+            kind=UnavailabilityRuleKind.RANGE,
+            start_date=date(2026, 7, 1),
+            end_date=date(2026, 8, 15),
+        ),
+        # Every Wednesday from March
+        UnavailabilityRule(
+            user_id=user.id,
+            kind=UnavailabilityRuleKind.WEEKLY,
+            start_date=date(2026, 3, 1),
+            weekday=2,
+        ),
+        # Every 2nd Sunday
+        UnavailabilityRule(
+            user_id=user.id,
+            kind=UnavailabilityRuleKind.MONTHLY_NTH_WEEKDAY,
+            start_date=YEAR_START,
+            weekday=6,
+            week_number=2,
+        ),
+        # Every last Friday in the first half of the year
+        UnavailabilityRule(
+            user_id=user.id,
+            kind=UnavailabilityRuleKind.MONTHLY_NTH_WEEKDAY,
+            start_date=YEAR_START,
+            end_date=date(2026, 6, 30),
+            weekday=4,
+            week_number=5,
+        ),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_rule_matching_in_sql_and_python_agree(db: AsyncSession, test_user):
+    rules = _rules(test_user)
+    db.add_all(rules)
+    await db.commit()
+
+    for offset in range(365):
+        day = YEAR_START + timedelta(days=offset)
+        result = await db.execute(select(UnavailabilityRule.id).where(rule_covers(day)))
+        in_sql = set(result.scalars().all())
+        in_python = {rule.id for rule in rules if rule_occurs_on(rule, day)}
+        assert in_sql == in_python, day
+
+    second_sundays = [
+        day
+        for day in (YEAR_START + timedelta(days=n) for n in range(365))
+        if rule_occurs_on(rules[2], day)
+    ]
+    assert len(second_sundays) == 12
+    assert all(8 <= day.day <= 14 and day.weekday() == 6 for day in second_sundays)
+    assert rule_occurs_on(rules[3], date(2026, 1, 30))  # Last Friday of January
+    assert not rule_occurs_on(rules[3], date(2026, 1, 23))
+
+
+@pytest.mark.asyncio
+async def test_unavailable_dates_combine_single_dates_and_rules(
+    db: AsyncSession, test_user
+):
+    db.add_all(_rules(test_user))
+    await db.commit()
+
+    service = AvailabilityService(db)
+    days = [date(2026, 2, 8), date(2026, 2, 9), date(2026, 7, 20), date(2026, 9, 2)]
+    assert await service.get_unavailable_dates([test_user.id], days) == {
+        (test_user.id, date(2026, 2, 8)),  # 2nd Sunday
+        (test_user.id, date(2026, 7, 20)),  # Summer break
+        (test_user.id, date(2026, 9, 2)),  # Wednesday
+    }
+    assert (
+        await service.get_unavailable_user_ids([test_user.id], date(2026, 2, 9))
+        == set()
+    )
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_list_and_delete_rules(
+    test_client: AsyncClient, auth_headers
+):
+    response = await test_client.post(
+        "/api/availability/rules",
+        headers=auth_headers,
+        json={
+            "rules": [
+                {
+                    "kind": "range",
+                    "start_date": "2026-07-01",
+                    "end_date": "2026-08-15",
+                    "reason": "Overseas",
+                },
+                {
+                    "kind": "monthly_nth_weekday",
+                    "start_date": "2026-01-01",
+                    "weekday": 0,
+                    "week_number": 2,
+                },
+            ]
+        },
+    )
+    assert response.status_code == 201
+    created = response.json()
+    assert [rule["kind"] for rule in created] == ["range", "monthly_nth_weekday"]
+    # Weekdays are returned as sent (0=Sunday)
+    assert created[1]["weekday"] == 0
+
+    response = await test_client.get(
+        "/api/availability/rules/me",
+        headers=auth_headers,
+        params={"start_date": "2026-09-01", "end_date": "2026-12-31"},
+    )
+    assert [rule["id"] for rule in response.json()] == [created[1]["id"]]
+
+    response = await test_client.delete(
+        f"/api/availability/rules/{created[0]['id']}", headers=auth_headers
+    )
+    assert response.status_code == 204
+    response = await test_client.post(
+        "/api/availability/rules/delete",
+        headers=auth_headers,
+        json={"ids": [rule["id"] for rule in created]},
+    )
+    assert response.json() == {"deleted": 1}
+    response = await test_client.get("/api/availability/rules/me", headers=auth_headers)
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "rule",
+    [
+        {"kind": "range", "start_date": "2026-07-01"},
+        {"kind": "range", "start_date": "2026-07-01", "end_date": "2026-06-01"},
+        {"kind": "weekly", "start_date": "2026-07-01"},
+        {"kind": "monthly_nth_weekday", "start_date": "2026-07-01", "weekday": 0},
+        {"kind": "weekly", "start_date": "2026-07-01", "weekday": 7},
+        {
+            "kind": "range",
+            "start_date": "2026-07-01",
+            "end_date": "2026-08-01",
+            "weekday": 0,
+        },
+        {
+            "kind": "weekly",
+            "start_date": "2026-07-01",
+            "weekday": 0,
+            "week_number": 2,
+        },
+    ],
+)
+async def test_invalid_rules_are_rejected(test_client: AsyncClient, auth_headers, rule):
+    response = await test_client.post(
+        "/api/availability/rules", headers=auth_headers, json={"rules": [rule]}
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_cannot_delete_another_users_rules(
+    test_client: AsyncClient, auth_headers, db: AsyncSession
+):
+    other = User(email="other@example.com", name="Other")
+    db.add(other)
+    await db.flush()
+    rule = UnavailabilityRule(
+        user_id=other.id,
+        kind=UnavailabilityRuleKind.WEEKLY,
+        start_date=YEAR_START,
+        weekday=6,
+    )
+    db.add(rule)
+    await db.commit()
+    rule_id = rule.id
+
+    response = await test_client.delete(
+        f"/api/availability/rules/{rule_id}", headers=auth_headers
+    )
+    assert response.status_code == 404
+    db.expire_all()
+    assert await db.get(UnavailabilityRule, rule_id) is not None
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_skips_another_users_rules(
+    test_client: AsyncClient, auth_headers, test_user: User, db: AsyncSession
+):
+    other = User(email="other@example.com", name="Other")
+    db.add(other)
+    await db.flush()
+    theirs = UnavailabilityRule(
+        user_id=other.id,
+        kind=UnavailabilityRuleKind.WEEKLY,
+        start_date=YEAR_START,
+        weekday=6,
+    )
+    mine = UnavailabilityRule(
+        user_id=test_user.id,
+        kind=UnavailabilityRuleKind.WEEKLY,
+        start_date=YEAR_START,
+        weekday=0,
+    )
+    db.add_all([theirs, mine])
+    await db.commit()
+    theirs_id, mine_id = theirs.id, mine.id
+
+    response = await test_client.post(
+        "/api/availability/rules/delete",
+        headers=auth_headers,
+        json={"ids": [str(theirs_id), str(mine_id), str(uuid.uuid4())]},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"deleted": 1}
+    db.expire_all()
+    assert await db.get(UnavailabilityRule, theirs_id) is not None
+    assert await db.get(UnavailabilityRule, mine_id) is None
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_requires_ids(test_client: AsyncClient, auth_headers):
+    response = await test_client.post(
+        "/api/availability/rules/delete", headers=auth_headers, json={"ids": []}
+    )
+    assert response.status_code == 422
+
+
+async def _team_with_roster(db: AsyncSession, names: list[str]):
+    org = Organisation(name="Rule Church")
+    db.add(org)
+    await db.flush()
+    team = Team(name="Media Team", organisation_id=org.id)
+    db.add(team)
+    await db.flush()
+    users = [User(email=f"{name.lower()}@example.com", name=name) for name in names]
+    db.add_all(users)
+    await db.flush()
+    db.add_all(
+        TeamMember(user_id=user.id, team_id=team.id, role=TeamRole.MEMBER)
+        for user in users
+    )
+    roster = Roster(
+        name="Sunday Service",
+        team_id=team.id,
+        recurrence_pattern=RecurrencePattern.WEEKLY,
+        recurrence_day=6,
+        slots_needed=1,
+        assignment_mode=AssignmentMode.MANUAL,
+        start_date=date.today(),
+    )
+    db.add(roster)
+    await db.flush()
+    return team, roster, users
+
+
+@pytest.mark.asyncio
+async def test_suggestions_skip_members_away_by_rule(db: AsyncSession):
+    team, roster, (away, home) = await _team_with_roster(db, ["Away", "Home"])
+    event_date = date.today() + timedelta(days=30)
+    event = RosterEvent(roster_id=roster.id, date=event_date)
+    db.add(event)
+    db.add(
+        UnavailabilityRule(
+            user_id=away.id,
+            kind=UnavailabilityRuleKind.RANGE,
+            start_date=event_date - timedelta(days=10),
+            end_date=event_date + timedelta(days=10),
+        )
+    )
+    await db.commit()
+
+    suggestions = await SuggestionService(db).get_suggestions(event.id, team.id)
+    assert [s.user_name for s in suggestions] == ["Home"]
+
+
+@pytest.mark.asyncio
+async def test_auto_assign_skips_recurring_unavailability(db: AsyncSession):
+    """A member away every Sunday is never auto-assigned to a Sunday."""
+    team, roster, (sundays_off, other) = await _team_with_roster(
+        db, ["Sundays Off", "Other"]
+    )
+    first_sunday = date.today() + timedelta(days=(6 - date.today().weekday()) % 7 + 7)
+    for week in range(4):
+        db.add(
+            RosterEvent(roster_id=roster.id, date=first_sunday + timedelta(weeks=week))
+        )
+    db.add(
+        UnavailabilityRule(
+            user_id=sundays_off.id,
+            kind=UnavailabilityRuleKind.WEEKLY,
+            start_date=date.today(),
+            weekday=6,
+        )
+    )
+    await db.commit()
+
+    created = await SuggestionService(db).auto_assign_roster(roster.id, team.id)
+    assert len(created) == 4
+    result = await db.execute(select(EventAssignment.user_id))
+    assert set(result.scalars().all()) == {other.id}
+
+
+@pytest.mark.asyncio
+async def test_team_availability_matrix_combines_rules_and_dates(db: AsyncSession):
+    team, _, (ann, ben, cat) = await _team_with_roster(db, ["Ann", "Ben", "Cat"])
+    db.add_all(
+        [
+            # Every Sunday
+            UnavailabilityRule(
+                user_id=ann.id,
+                kind=UnavailabilityRuleKind.WEEKLY,
+                start_date=YEAR_START,
+                weekday=6,
+                reason="Other church",
+            ),
+            # From 10 March on
+            UnavailabilityRule(
+                user_id=ben.id,
+                kind=UnavailabilityRuleKind.RANGE,
+                start_date=date(2026, 3, 10),
+                end_date=date(2026, 4, 30),
+            ),
+            Unavailability(user_id=ben.id, date=date(2026, 3, 2)),
+        ]
+    )
+    await db.commit()
+
+    service = AvailabilityService(db)
+    matrix = await service.get_team_availability_matrix(
+        team.id, date(2026, 3, 1), date(2026, 3, 31)
+    )
+    bits = {user.name: value for user, value in matrix}
+    sundays = [1, 8, 15, 22, 29]
+    assert bits["Ann"] == sum(1 << (day - 1) for day in sundays)
+    assert bits["Ben"] == (1 << 1) | sum(1 << (day - 1) for day in range(10, 32))
+    assert bits["Cat"] == 0
+
+    overview = await DashboardService(db).get_team_availability_overview(
+        team.id, date(2026, 3, 8)
+    )
+    assert [(m["user_name"], m["unavailability_reason"]) for m in overview] == [
+        ("Ann", "Other church"),
+        ("Ben", None),
+        ("Cat", None),
+    ]
+    assert await service.get_team_availability(team.id, date(2026, 3, 2)) == {
+        ann.id: True,
+        ben.id: False,
+        cat.id: True,
+    }
+
+
+@pytest.mark.asyncio
+async def test_conflicts_join_assignments_to_dates_and_rules(
+    test_client: AsyncClient, auth_headers, db: AsyncSession, test_user
+):
+    team, roster, (other,) = await _team_with_roster(db, ["Other"])
+    sunday = date.today() + timedelta(days=(6 - date.today().weekday()) % 7 + 7)
+    events = {
+        days: RosterEvent(roster_id=roster.id, date=sunday + timedelta(days=days))
+        for days in (-14, 0, 1, 7)
+    }
+    db.add_all(events.values())
+    await db.flush()
+    db.add_all(
+        [
+            EventAssignment(event_id=event.id, user_id=test_user.id)
+            for event in events.values()
+        ]
+        + [
+            EventAssignment(
+                event_id=events[7].id,
+                user_id=other.id,
+                status=AssignmentStatus.DECLINED,
+            ),
+            # Every Sunday
+            UnavailabilityRule(
+                user_id=test_user.id,
+                kind=UnavailabilityRuleKind.WEEKLY,
+                start_date=date.today() - timedelta(days=30),
+                weekday=6,
+                reason="Other church",
+            ),
+            Unavailability(user_id=test_user.id, date=sunday + timedelta(days=1)),
+            Unavailability(user_id=other.id, date=sunday + timedelta(days=7)),
+        ]
+    )
+    await db.commit()
+
+    response = await test_client.get(
+        "/api/availability/conflicts", headers=auth_headers
+    )
+    assert response.status_code == 200
+    conflicts = response.json()
+    # The past Sunday is ignored, and so is the declined assignment
+    assert [(c["date"], c["unavailability_kind"]) for c in conflicts] == [
+        (str(sunday), "weekly"),
+        (str(sunday + timedelta(days=1)), "date"),
+        (str(sunday + timedelta(days=7)), "weekly"),
+    ]
+    assert conflicts[0]["reason"] == "Other church"
+    assert conflicts[0]["team_name"] == "Media Team"
+
+    # Only leads see the team's conflicts
+    response = await test_client.get(
+        f"/api/availability/teams/{team.id}/conflicts", headers=auth_headers
+    )
+    assert response.status_code == 403
+    service = AvailabilityService(db)
+    assert await service.check_team_conflicts(team.id) == [
+        ConflictResponse(**c) for c in conflicts
+    ]
+
+
+async def _sunday_assignments(db: AsyncSession, user: User, weeks: int):
+    """Assign user to the roster's next few Sundays."""
+    _, roster, _ = await _team_with_roster(db, [])
+    sunday = date.today() + timedelta(days=(6 - date.today().weekday()) % 7 + 7)
+    events = [
+        RosterEvent(roster_id=roster.id, date=sunday + timedelta(weeks=week))
+        for week in range(weeks)
+    ]
+    db.add_all(events)
+    await db.flush()
+    assignments = [
+        EventAssignment(event_id=event.id, user_id=user.id) for event in events
+    ]
+    db.add_all(assignments)
+    await db.commit()
+    return sunday, [a.id for a in assignments]
+
+
+async def _conflict_notifications(db: AsyncSession) -> list[Notification]:
+    result = await db.execute(
+        select(Notification).where(
+            Notification.type == NotificationType.CONFLICT_DETECTED
+        )
+    )
+    return list(result.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_marking_unavailable_notifies_conflicts_once(
+    test_client: AsyncClient, auth_headers, db: AsyncSession, test_user
+):
+    sunday, [first, _] = await _sunday_assignments(db, test_user, 2)
+
+    for _ in range(2):
+        response = await test_client.post(
+            "/api/availability",
+            headers=auth_headers,
+            json={"date": str(sunday), "reason": "Away"},
+        )
+        assert response.status_code == 201
+
+    [notification] = await _conflict_notifications(db)
+    assert notification.user_id == test_user.id
+    assert notification.reference_id == first
+    assert "Sunday Service" in notification.message
+    result = await db.execute(
+        select(OutboxMessage).where(OutboxMessage.channel == OutboxChannel.PUSH)
+    )
+    assert result.scalar_one().payload["url"] == f"/assignments/{first}"
+
+
+@pytest.mark.asyncio
+async def test_new_rules_notify_all_conflicts_in_a_batch(
+    test_client: AsyncClient,
+    auth_headers,
+    db: AsyncSession,
+    test_user,
+    assert_max_queries,
+):
+    """The check costs the same few statements however many conflicts it finds."""
+    sunday, assignment_ids = await _sunday_assignments(db, test_user, 6)
+
+    with assert_max_queries(8):
+        response = await test_client.post(
+            "/api/availability/rules",
+            headers=auth_headers,
+            json={
+                "rules": [
+                    {
+                        "kind": "weekly",
+                        "start_date": str(sunday),
+                        "weekday": 0,
+                    },
+                    {
+                        "kind": "range",
+                        "start_date": str(sunday),
+                        "end_date": str(sunday + timedelta(days=1)),
+                    },
+                ]
+            },
+        )
+    assert response.status_code == 201
+    notifications = await _conflict_notifications(db)
+    assert sorted(n.reference_id for n in notifications) == sorted(assignment_ids)
+
+
+@pytest.mark.asyncio
+async def test_new_assignment_on_unavailable_date_is_notified(
+    db: AsyncSession, test_user
+):
+    sunday, _ = await _sunday_assignments(db, test_user, 0)
+    _, roster, _ = await _team_with_roster(db, [])
+    db.add(Unavailability(user_id=test_user.id, date=sunday))
+    event = RosterEvent(roster_id=roster.id, date=sunday)
+    other_event = RosterEvent(roster_id=roster.id, date=sunday + timedelta(days=7))
+    db.add_all([event, other_event])
+    await db.flush()
+    assignment = EventAssignment(event_id=event.id, user_id=test_user.id)
+    other = EventAssignment(event_id=other_event.id, user_id=test_user.id)
+    db.add_all([assignment, other])
+    await db.flush()
+
+    service = NotificationService(db)
+    notifications = await service.notify_new_conflicts(
+        assignment_ids=[assignment.id, other.id]
+    )
+    assert [n.reference_id for n in notifications] == [assignment.id]
@@ -0,0 +1,186 @@
+"""Tests for ETag revalidation of the cached read endpoints."""
+
+import subprocess
+import sys
+from datetime import date, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.permissions import TeamPermission
+from app.models.cache import CacheVersion
+from app.models.organisation import Organisation, OrganisationMember, OrganisationRole
+from app.models.roster import AssignmentStatus, EventAssignment, Roster, RosterEvent
+from app.models.team import Team, TeamMember, TeamRole
+from app.models.user import User
+from app.services.cache import etag_matches
+
+
+@pytest.fixture
+async def team(db: AsyncSession, test_user: User):
+    """A team test_user leads, with a roster, an event and an assignment."""
+    org = Organisation(name="Cache Church")
+    db.add(org)
+    await db.flush()
+    db.add(
+        OrganisationMember(
+            user_id=test_user.id, organisation_id=org.id, role=OrganisationRole.ADMIN
+        )
+    )
+    team = Team(name="Media Team", organisation_id=org.id)
+    db.add(team)
+    await db.flush()
+    db.add(
+        TeamMember(
+            user_id=test_user.id,
+            team_id=team.id,
+            role=TeamRole.LEAD,
+            permissions=TeamPermission.ALL.copy(),
+        )
+    )
+    roster = Roster(
+        name="Sunday Service",
+        team_id=team.id,
+        recurrence_day=6,
+        start_date=date.today(),
+    )
+    db.add(roster)
+    await db.flush()
+    event = RosterEvent(roster_id=roster.id, date=date.today() + timedelta(days=7))
+    db.add(event)
+    await db.flush()
+    assignment = EventAssignment(event_id=event.id, user_id=test_user.id)
+    db.add(assignment)
+    await db.commit()
+    return {"team": team, "roster": roster, "event": event, "assignment": assignment}
+
+
+async def _revalidate(client: AsyncClient, url: str, headers: dict, etag: str):
+    return await client.get(url, headers={**headers, "If-None-Match": etag})
+
+
+@pytest.mark.asyncio
+async def test_unchanged_response_is_not_modified(
+    client: AsyncClient, auth_headers, team, assert_max_queries
+):
+    """Revalidating an unchanged response costs auth plus one lookup."""
+    url = f"/api/teams/{team['team'].id}/members"
+    response = await client.get(url, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    etag = response.headers["ETag"]
+
+    with assert_max_queries(2):
+        response = await _revalidate(client, url, auth_headers, etag)
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_writes_change_the_etag(
+    client: AsyncClient, auth_headers, db: AsyncSession, team
+):
+    urls = [
+        f"/api/rosters/{team['roster'].id}/events",
+        f"/api/rosters/team/{team['team'].id}",
+        "/api/dashboard/calendar/events",
+    ]
+    etags = {}
+    for url in urls:
+        response = await client.get(url, headers=auth_headers)
+        assert response.status_code == 200
+        etags[url] = response.headers["ETag"]
+
+    # Reached through event -> roster -> team
+    team["assignment"].status = AssignmentStatus.CONFIRMED
+    await db.commit()
+
+    for url in urls:
+        response = await _revalidate(client, url, auth_headers, etags[url])
+        assert response.status_code == 200, url
+        assert response.headers["ETag"] != etags[url]
+
+
+@pytest.mark.asyncio
+async def test_other_teams_writes_keep_the_etag(
+    client: AsyncClient, auth_headers, db: AsyncSession, team
+):
+    url = f"/api/teams/{team['team'].id}/members"
+    etag = (await client.get(url, headers=auth_headers)).headers["ETag"]
+
+    other = Team(name="Music Team", organisation_id=team["team"].organisation_id)
+    db.add(other)
+    await db.commit()
+    other.name = "Worship Team"
+    await db.commit()
+
+    response = await _revalidate(client, url, auth_headers, etag)
+    assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_losing_access_changes_the_etag(
+    client: AsyncClient, auth_headers, db: AsyncSession, test_user, team
+):
+    """A client that lost access is never told its copy is still valid."""
+    url = f"/api/rosters/team/{team['team'].id}"
+    etag = (await client.get(url, headers=auth_headers)).headers["ETag"]
+
+    membership = await db.scalar(
+        select(OrganisationMember).where(OrganisationMember.user_id == test_user.id)
+    )
+    await db.delete(membership)
+    await db.commit()
+
+    response = await _revalidate(client, url, auth_headers, etag)
+    assert response.status_code == 403
+
+
+async def _team_version(db: AsyncSession, team: Team) -> int:
+    return await db.scalar(
+        select(CacheVersion.version).where(
+            CacheVersion.scope == "team", CacheVersion.scope_id == team.id
+        )
+    )
+
+
+@pytest.mark.asyncio
+async def test_versions_count_each_write(db: AsyncSession, team):
+    before = await _team_version(db, team["team"])
+    for name in ("Evening Service", "Morning Service"):
+        team["roster"].name = name
+        await db.commit()
+
+    assert await _team_version(db, team["team"]) == before + 2
+
+
+def test_etag_matches():
+    etag = 'W/"abc"'
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('W/"xyz", W/"abc"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"xyz"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_version_listener_registered_with_the_models():
+    """Importing any model attaches the listener, without the API or services.
+
+    Runs in a fresh interpreter so imports made by other tests cannot hide a
+    listener that is only attached as a side effect of importing them.
+    """
+    code = (
+        "import sys\n"
+        "from sqlalchemy import event\n"
+        "from sqlalchemy.orm import Session\n"
+        "import app.models.roster\n"
+        "from app.models.cache import bump_versions\n"
+        "assert event.contains(Session, 'before_flush', bump_versions)\n"
+        "assert 'app.services.cache' not in sys.modules\n"
+        "assert 'app.api.deps' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,245 @@
+import sqlite3
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import event, exc, func, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import main
+from app.core import database
+from app.core.config import Settings
+from app.core.database import (
+    POOL_CHECKOUT_WAIT,
+    POOL_IN_USE,
+    Base,
+    InstrumentedAsyncPool,
+    PrimaryPins,
+    _PingOnError,
+    create_engine,
+)
+from app.core.middleware import _request_scope
+from app.core.security import create_access_token, create_stream_ticket
+from app.models.user import User
+
+
+@pytest.mark.asyncio
+async def test_in_use_gauge_tracks_checkouts(tmp_path):
+    """Checked-out connections are reported per route and released on checkin."""
+    engine = create_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", Settings(), label="gauge"
+    )
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            assert POOL_IN_USE.value(pool="gauge", route="background") == 1
+        assert POOL_IN_USE.value(pool="gauge", route="background") == 0
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_instrumented_pool_records_checkout_wait(tmp_path):
+    """Every checkout from the instrumented pool is observed in the histogram."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'wait.db'}",
+        poolclass=InstrumentedAsyncPool,
+    )
+    before = POOL_CHECKOUT_WAIT.count(pool="primary", route="background")
+    try:
+        for _ in range(3):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+    finally:
+        await engine.dispose()
+
+    assert POOL_CHECKOUT_WAIT.count(pool="primary", route="background") == before + 3
+
+
+def test_ping_on_error_only_pings_after_disconnect():
+    """Checkout pings are skipped until a disconnect error arms the window."""
+    pings = []
+
+    def do_ping(dbapi_connection):
+        pings.append(dbapi_connection)
+        raise ConnectionResetError("connection reset")
+
+    engine = SimpleNamespace(
+        dialect=SimpleNamespace(do_ping=do_ping, loaded_dbapi=sqlite3)
+    )
+    pinger = _PingOnError(engine, window=30.0, label="test")
+
+    pinger.on_checkout("conn", None, None)
+    assert pings == []
+
+    pinger.on_error(SimpleNamespace(is_disconnect=False))
+    pinger.on_checkout("conn", None, None)
+    assert pings == []
+
+    pinger.on_error(SimpleNamespace(is_disconnect=True))
+    with pytest.raises(exc.DisconnectionError):
+        pinger.on_checkout("conn", None, None)
+    assert pings == ["conn"]
+
+
+def test_unknown_ping_mode_is_rejected():
+    with pytest.raises(ValidationError):
+        Settings(db_pool_ping_mode="sometimes")
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_renders_pool_metrics(test_client, monkeypatch):
+    """The /metrics endpoint exposes the pool metrics in Prometheus format."""
+    monkeypatch.setattr(main.settings, "metrics_token", "scrape-token")
+    response = await test_client.get(
+        "/metrics", headers={"Authorization": "Bearer scrape-token"}
+    )
+    assert response.status_code == 200
+    assert "# TYPE db_pool_checkout_wait_seconds histogram" in response.text
+    assert "# TYPE db_pool_connections_in_use gauge" in response.text
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_refuses_unauthenticated_requests(
+    test_client, monkeypatch
+):
+    """Scrapes need the metrics token, and nothing is served without one set."""
+    response = await test_client.get("/metrics")
+    assert response.status_code == 404
+
+    monkeypatch.setattr(main.settings, "metrics_token", "scrape-token")
+    for headers in ({}, {"Authorization": "Bearer wrong-token"}):
+        response = await test_client.get("/metrics", headers=headers)
+        assert response.status_code == 401
+        assert "db_pool" not in response.text
+
+
+@pytest.fixture
+async def primary_and_replica(tmp_path, monkeypatch):
+    """Two SQLite files standing in for a primary and a lagging replica."""
+    primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}")
+    replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    for engine in (primary, replica):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    primary_maker = async_sessionmaker(primary, expire_on_commit=False)
+    monkeypatch.setattr(database, "async_session_maker", primary_maker)
+    monkeypatch.setattr(database, "async_primary_read_session_maker", primary_maker)
+    monkeypatch.setattr(
+        database,
+        "async_read_session_maker",
+        async_sessionmaker(replica, expire_on_commit=False),
+    )
+    monkeypatch.setattr(database, "primary_pins", PrimaryPins(ttl=60))
+    yield primary
+    await primary.dispose()
+    await replica.dispose()
+
+
+@asynccontextmanager
+async def _as_user(user_id: str | None, make_token=create_access_token):
+    """Run the block as if serving a request authenticated as user_id."""
+    headers = []
+    if user_id is not None:
+        token = make_token(subject=user_id)
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    reset = _request_scope.set({"type": "http", "headers": headers})
+    try:
+        yield
+    finally:
+        _request_scope.reset(reset)
+
+
+async def _count_users_via_read_db() -> int:
+    async with asynccontextmanager(database.get_read_db)() as session:
+        result = await session.execute(select(func.count()).select_from(User))
+        return result.scalar_one()
+
+
+async def _create_user_via_db(email: str) -> None:
+    async with asynccontextmanager(database.get_db)() as session:
+        session.add(User(email=email, name="Writer"))
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_without_recent_writes(primary_and_replica):
+    """Anonymous writes do not pin, so reads still hit the (empty) replica."""
+    async with _as_user(None):
+        await _create_user_via_db("anon@example.com")
+        assert await _count_users_via_read_db() == 0
+
+
+@pytest.mark.asyncio
+async def test_writer_is_pinned_to_primary(primary_and_replica):
+    """A user who just wrote reads their own write from the primary."""
+    writer = "11111111-1111-1111-1111-111111111111"
+    other = "22222222-2222-2222-2222-222222222222"
+
+    async with _as_user(writer):
+        await _create_user_via_db("writer@example.com")
+        assert await _count_users_via_read_db() == 1
+
+    # Other users are unaffected and keep reading from the replica
+    async with _as_user(other):
+        assert await _count_users_via_read_db() == 0
+
+
+@pytest.mark.asyncio
+async def test_read_only_request_does_not_pin(primary_and_replica):
+    """A get_db session without writes does not pin the user."""
+    reader = "33333333-3333-3333-3333-333333333333"
+    async with _as_user(reader):
+        async with asynccontextmanager(database.get_db)() as session:
+            await session.execute(select(User))
+    assert not database.primary_pins.is_pinned(reader)
+
+
+@pytest.mark.asyncio
+async def test_stream_ticket_does_not_pin(primary_and_replica):
+    """Only access tokens identify the writer; a stream ticket is ignored."""
+    writer = "44444444-4444-4444-4444-444444444444"
+    async with _as_user(writer, make_token=create_stream_ticket):
+        await _create_user_via_db("ticket@example.com")
+        assert await _count_users_via_read_db() == 0
+    assert not database.primary_pins.is_pinned(writer)
+
+
+def test_primary_pin_expires():
+    """Pins lapse after their ttl."""
+    pins = PrimaryPins(ttl=0)
+    pins.pin("user")
+    assert not pins.is_pinned("user")
+
+    pins = PrimaryPins(ttl=60)
+    pins.pin("user")
+    assert pins.is_pinned("user")
+    assert not pins.is_pinned("someone-else")
+
+
+@pytest.mark.asyncio
+async def test_get_db_skips_commit_without_writes(primary_and_replica):
+    """Only sessions that wrote something send COMMIT."""
+    commits = []
+    event.listen(primary_and_replica.sync_engine, "commit", commits.append)
+
+    async with _as_user(None):
+        async with asynccontextmanager(database.get_db)() as session:
+            await session.execute(select(User))
+        assert commits == []
+
+        await _create_user_via_db("commit@example.com")
+        assert len(commits) == 1
+
+
+def test_read_only_applies_to_postgres_only():
+    """Postgres read sessions begin READ ONLY; other dialects are untouched."""
+    pg_engine = create_async_engine("postgresql+asyncpg://localhost/rooster")
+    assert (
+        database.read_only(pg_engine).get_execution_options()["postgresql_readonly"]
+        is True
+    )
+
+    sqlite_engine = create_async_engine("sqlite+aiosqlite://")
+    assert database.read_only(sqlite_engine) is sqlite_engine
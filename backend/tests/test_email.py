@@ -1,6 +1,29 @@
+import asyncio
+import html
+import json
+import re
+import socket
+import timeit
+from datetime import date
+
+import httpx
 import pytest
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
 
-from app.services.email import EmailService
+from app.core.config import Settings
+from app.services.email import (
+    EmailService,
+    OutgoingEmail,
+    ResendProvider,
+    SMTPProvider,
+)
+from app.services.email_templates import (
+    TEMPLATE_DIR,
+    RenderedEmail,
+    TemplateError,
+    get_template,
+)
 
 
 @pytest.mark.asyncio
@@ -28,3 +51,331 @@ async def test_send_invite_email_logs_in_debug(caplog):
         "Would've sent email to recipient@example.com with invite link "
         f"{expected_link} (email disabled)" in caplog.text
     )
+
+
+class _Sink:
+    """aiosmtpd handler recording messages and the sessions they came on."""
+
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope.content.decode())
+        self.sessions.add(id(session))
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _controller(sink: _Sink, port: int) -> Controller:
+    return Controller(
+        sink,
+        hostname="127.0.0.1",
+        port=port,
+        authenticator=lambda *args: AuthResult(success=True),
+        auth_require_tls=False,
+    )
+
+
+@pytest.fixture
+def smtp_server():
+    sink = _Sink()
+    controller = _controller(sink, _free_port())
+    controller.start()
+    yield controller
+    controller.stop()
+
+
+def _smtp_provider(controller: Controller, **overrides) -> SMTPProvider:
+    options = {
+        "smtp_host": controller.hostname,
+        "smtp_port": controller.port,
+        "smtp_user": "rooster",
+        "smtp_password": "secret",
+        "smtp_use_tls": False,
+    }
+    return SMTPProvider(Settings(**{**options, **overrides}))
+
+
+async def _send(provider: SMTPProvider, to_email: str) -> bool:
+    return await provider.send(
+        to_email=to_email,
+        subject="Hello",
+        html_content="<p>Hi</p>",
+        text_content="Hi",
+        from_email="rooster@example.com",
+        from_name="Rooster",
+    )
+
+
+@pytest.mark.asyncio
+async def test_smtp_provider_reuses_authenticated_session(smtp_server):
+    """Consecutive emails go over one SMTP session."""
+    provider = _smtp_provider(smtp_server)
+    for i in range(5):
+        assert await _send(provider, f"user{i}@example.com")
+    await provider.aclose()
+
+    sink = smtp_server.handler
+    assert len(sink.messages) == 5
+    assert len(sink.sessions) == 1
+    assert "To: user4@example.com" in sink.messages[-1]
+
+
+@pytest.mark.asyncio
+async def test_smtp_provider_pool_bounds_sessions(smtp_server):
+    """Concurrent emails share at most smtp_pool_size sessions."""
+    provider = _smtp_provider(smtp_server, smtp_pool_size=2)
+    results = await asyncio.gather(
+        *(_send(provider, f"user{i}@example.com") for i in range(10))
+    )
+    await provider.aclose()
+
+    assert all(results)
+    assert len(smtp_server.handler.messages) == 10
+    assert len(smtp_server.handler.sessions) == 2
+
+
+@pytest.mark.asyncio
+async def test_smtp_provider_reconnects_when_session_dropped():
+    """A pooled session closed by the server is replaced transparently."""
+    sink = _Sink()
+    port = _free_port()
+    controller = _controller(sink, port)
+    controller.start()
+    provider = _smtp_provider(controller)
+    assert await _send(provider, "first@example.com")
+
+    # Restarting the server drops every open session
+    controller.stop()
+    controller = _controller(sink, port)
+    controller.start()
+    try:
+        assert await _send(provider, "second@example.com")
+        await provider.aclose()
+    finally:
+        controller.stop()
+
+    assert len(sink.messages) == 2
+    assert len(sink.sessions) == 2
+
+
+def _resend_provider(handler) -> ResendProvider:
+    return ResendProvider(
+        "re_test_key",
+        base_url="http://resend.test",
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+
+def _emails(n: int) -> list[OutgoingEmail]:
+    return [
+        OutgoingEmail(f"user{i}@example.com", "Hello", "<p>Hi</p>", "Hi")
+        for i in range(n)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_resend_provider_sends_single_email():
+    """One email goes to /emails with the API key as a bearer token."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"id": "email-1"})
+
+    provider = _resend_provider(handler)
+    assert await provider.send(
+        to_email="user@example.com",
+        subject="Hello",
+        html_content="<p>Hi</p>",
+        text_content=None,
+        from_email="rooster@example.com",
+        from_name="Rooster",
+    )
+
+    [request] = requests
+    assert request.url.path == "/emails"
+    assert request.headers["authorization"] == "Bearer re_test_key"
+    assert json.loads(request.content) == {
+        "from": "Rooster <rooster@example.com>",
+        "to": ["user@example.com"],
+        "subject": "Hello",
+        "html": "<p>Hi</p>",
+    }
+
+
+@pytest.mark.asyncio
+async def test_resend_provider_batches_emails(monkeypatch):
+    """Several emails go out through /emails/batch, 100 per request."""
+    monkeypatch.setattr("app.services.email.RESEND_BATCH_LIMIT", 2)
+    batches = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/emails/batch"
+        batch = json.loads(request.content)
+        batches.append([params["to"][0] for params in batch])
+        return httpx.Response(200, json={"data": [{"id": "x"} for _ in batch]})
+
+    provider = _resend_provider(handler)
+    results = await provider.send_many(_emails(4), "rooster@example.com", "Rooster")
+
+    assert results == [True] * 4
+    assert batches == [
+        ["user0@example.com", "user1@example.com"],
+        ["user2@example.com", "user3@example.com"],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_resend_provider_reports_rejected_batch():
+    """Emails a batch was rejected for fail, each retried on its own first."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(422, json={"message": "Invalid `to` field"})
+
+    provider = _resend_provider(handler)
+    results = await provider.send_many(_emails(3), "rooster@example.com", "Rooster")
+    assert results == [False, False, False]
+
+
+@pytest.mark.asyncio
+async def test_resend_provider_isolates_rejected_email():
+    """One invalid address fails alone; the rest of its batch is still sent."""
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        batch = body if isinstance(body, list) else [body]
+        recipients = [params["to"][0] for params in batch]
+        if "user2@example.com" in recipients:
+            return httpx.Response(422, json={"message": "Invalid `to` field"})
+        sent.extend(recipients)
+        return httpx.Response(200, json={"data": [{"id": "x"} for _ in batch]})
+
+    provider = _resend_provider(handler)
+    results = await provider.send_many(_emails(5), "rooster@example.com", "Rooster")
+
+    assert results == [True, True, False, True, True]
+    assert sorted(sent) == [
+        "user0@example.com",
+        "user1@example.com",
+        "user3@example.com",
+        "user4@example.com",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_resend_provider_does_not_split_on_server_error():
+    """A server error fails the batch in one request, to be retried as is."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(503)
+
+    provider = _resend_provider(handler)
+    results = await provider.send_many(_emails(4), "rooster@example.com", "Rooster")
+    assert results == [False] * 4
+    assert len(requests) == 1
+
+
+def test_invite_email_renders_escaped_html():
+    """Recipient values are escaped in the HTML body only."""
+    email = EmailService().invite_email(
+        to_email="new@example.com",
+        invitee_name="<b>Sam</b>",
+        team_name="Media & Worship",
+        inviter_name="Lead",
+        token="abc",
+    )
+
+    assert email.subject == "You've been invited to join Media & Worship on Rooster"
+    assert "Hi &lt;b&gt;Sam&lt;/b&gt;!" in email.html_content
+    assert "<strong>Media &amp; Worship</strong>" in email.html_content
+    assert "/invite/abc" in email.html_content
+    assert "Hi <b>Sam</b>!" in email.text_content
+    assert "{" not in email.html_content + email.text_content
+
+
+def test_templates_are_compiled_once_and_fall_back_to_default_locale():
+    """Unknown locales use the default templates from the same cache."""
+    assert get_template("assignment", "fr") is get_template("assignment")
+    assert get_template("assignment") is get_template("assignment")
+
+    with pytest.raises(TemplateError):
+        get_template("nope")
+    with pytest.raises(TemplateError, match="time_str"):
+        get_template("assignment").render(
+            user_name="Sam",
+            roster_name="Sunday Service",
+            team_name="Media",
+            event_date="November 01, 2026",
+        )
+
+
+def test_template_render_converts_values_and_ignores_extras():
+    """Values are formatted like the f-strings they replaced."""
+    rendered = get_template("assignment").render(
+        user_name="Sam",
+        roster_name="Sunday Service",
+        team_name="Media",
+        event_date=date(2026, 11, 1),
+        time_str="",
+        unused="ignored",
+    )
+    assert "2026-11-01" in rendered.html
+    assert "2026-11-01" in rendered.text
+    assert "ignored" not in rendered.html + rendered.text
+
+
+def _literals(name: str) -> list[str]:
+    source = (TEMPLATE_DIR / "en" / name).read_text(encoding="utf-8")
+    return re.split(r"\{\w+\}", source)
+
+
+_HTML = _literals("assignment.html")
+_TEXT = _literals("assignment.txt")
+
+
+def _fstring_assignment(user_name, roster_name, team_name, event_date, time_str):
+    """The assignment email as hand-written f-strings, escaped like render."""
+    h, t, e = _HTML, _TEXT, html.escape
+    return RenderedEmail(
+        f"New assignment: {roster_name}",
+        f"{h[0]}{e(user_name)}{h[1]}{e(roster_name)}{h[2]}{e(team_name)}{h[3]}"
+        f"{e(event_date)}{h[4]}{e(time_str)}{h[5]}",
+        f"{t[0]}{user_name}{t[1]}{roster_name}{t[2]}{team_name}{t[3]}"
+        f"{event_date}{t[4]}{time_str}{t[5]}",
+    )
+
+
+def _time(render, values: dict, number: int = 2000) -> float:
+    # timeit switches the garbage collector off, as for any microbenchmark
+    timer = timeit.Timer("render(**values)", globals=locals())
+    return timer.timeit(number)
+
+
+def test_template_render_keeps_up_with_fstrings():
+    """Rendering costs no more than f-strings producing the same email."""
+    template = get_template("assignment")
+    values = {
+        "user_name": "Sam <Admin>",
+        "roster_name": "Sunday Service",
+        "team_name": "Media & Worship",
+        "event_date": "November 01, 2026",
+        "time_str": " at 9:30 AM",
+    }
+    assert template.render(**values) == _fstring_assignment(**values)
+
+    rendered, baseline = [], []
+    for _ in range(15):  # Interleaved, so both see the same machine load
+        rendered.append(_time(template.render, values))
+        baseline.append(_time(_fstring_assignment, values))
+    # Headroom for timer noise on shared machines
+    assert min(rendered) <= min(baseline) * 1.2
@@ -0,0 +1,218 @@
+"""Tests for the notification inbox endpoints."""
+
+from datetime import timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import Settings
+from app.models.base import utc_now
+from app.models.notification import Notification, NotificationType
+from app.models.user import User
+from app.services.notification import NotificationRetention
+from tests.conftest import TestingSessionLocal
+
+
+async def _notify(db: AsyncSession, user: User, count: int) -> list[Notification]:
+    """Create notifications, one second apart, newest last."""
+    start = utc_now() - timedelta(seconds=count)
+    notifications = [
+        Notification(
+            user_id=user.id,
+            type=NotificationType.TEAM_JOINED,
+            title="Team Joined",
+            message=f"Notification {n}",
+            created_at=start + timedelta(seconds=n),
+        )
+        for n in range(count)
+    ]
+    db.add_all(notifications)
+    await db.commit()
+    return notifications
+
+
+@pytest.mark.asyncio
+async def test_inbox_pages_with_cursor(
+    test_client: AsyncClient, auth_headers, db_session, test_user, assert_max_queries
+):
+    """The inbox pages newest first until next_cursor runs out."""
+    await _notify(db_session, test_user, 25)
+
+    messages = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+        with assert_max_queries(2):
+            response = await test_client.get(
+                "/api/notifications/inbox", headers=auth_headers, params=params
+            )
+        assert response.status_code == 200
+        page = response.json()
+        messages.extend(item["message"] for item in page["items"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert messages == [f"Notification {n}" for n in range(24, -1, -1)]
+
+
+@pytest.mark.asyncio
+async def test_inbox_rejects_malformed_cursor(test_client: AsyncClient, auth_headers):
+    response = await test_client.get(
+        "/api/notifications/inbox",
+        headers=auth_headers,
+        params={"cursor": "not-a-cursor"},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_list_notifications_is_limited(
+    test_client: AsyncClient, auth_headers, db_session, test_user
+):
+    """The flat list returns only the most recent notifications."""
+    await _notify(db_session, test_user, 5)
+    response = await test_client.get(
+        "/api/notifications", headers=auth_headers, params={"limit": 2}
+    )
+    assert response.status_code == 200
+    assert [n["message"] for n in response.json()] == [
+        "Notification 4",
+        "Notification 3",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_list_notifications_is_unlimited_by_default(
+    test_client: AsyncClient, auth_headers, db_session, test_user
+):
+    await _notify(db_session, test_user, 5)
+    response = await test_client.get("/api/notifications", headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+
+
+@pytest.mark.asyncio
+async def test_unread_count_and_mark_as_read(
+    test_client: AsyncClient, auth_headers, db_session, test_user
+):
+    notifications = await _notify(db_session, test_user, 3)
+
+    response = await test_client.get(
+        "/api/notifications/unread-count", headers=auth_headers
+    )
+    assert response.json() == {"count": 3}
+
+    response = await test_client.patch(
+        f"/api/notifications/{notifications[0].id}/read", headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["read_at"] is not None
+
+    response = await test_client.get(
+        "/api/notifications/unread-count", headers=auth_headers
+    )
+    assert response.json() == {"count": 2}
+
+
+@pytest.mark.asyncio
+async def test_cannot_touch_another_users_notification(
+    test_client: AsyncClient, auth_headers, db_session
+):
+    """Someone else's notification is indistinguishable from a missing one."""
+    other = User(email="other@example.com", name="Other")
+    db_session.add(other)
+    await db_session.commit()
+    [notification] = await _notify(db_session, other, 1)
+    notification_id = notification.id
+
+    response = await test_client.patch(
+        f"/api/notifications/{notification_id}/read", headers=auth_headers
+    )
+    assert response.status_code == 404
+    response = await test_client.delete(
+        f"/api/notifications/{notification_id}", headers=auth_headers
+    )
+    assert response.status_code == 404
+
+    db_session.expire_all()
+    result = await db_session.execute(
+        select(Notification).where(Notification.id == notification_id)
+    )
+    assert result.scalar_one().read_at is None
+
+
+@pytest.mark.asyncio
+async def test_delete_own_notification(
+    test_client: AsyncClient, auth_headers, db_session, test_user
+):
+    [notification] = await _notify(db_session, test_user, 1)
+
+    response = await test_client.delete(
+        f"/api/notifications/{notification.id}", headers=auth_headers
+    )
+    assert response.status_code == 204
+    response = await test_client.get(
+        "/api/notifications/unread-count", headers=auth_headers
+    )
+    assert response.json() == {"count": 0}
+
+
+@pytest.mark.asyncio
+async def test_mark_all_as_read_is_one_statement(
+    test_client: AsyncClient, auth_headers, db_session, test_user, assert_max_queries
+):
+    await _notify(db_session, test_user, 30)
+
+    with assert_max_queries(2):
+        response = await test_client.patch(
+            "/api/notifications/read-all", headers=auth_headers
+        )
+    assert response.json() == {"marked_read": 30}
+
+    response = await test_client.patch(
+        "/api/notifications/read-all", headers=auth_headers
+    )
+    assert response.json() == {"marked_read": 0}
+
+
+@pytest.mark.asyncio
+async def test_retention_deletes_old_read_notifications(db_session, test_user):
+    """Only read notifications past the retention age are deleted."""
+    old = utc_now() - timedelta(days=200)
+    db_session.add_all(
+        [
+            Notification(
+                user_id=test_user.id,
+                type=NotificationType.TEAM_JOINED,
+                title="Team Joined",
+                message=message,
+                created_at=created_at,
+                read_at=read_at,
+            )
+            for message, created_at, read_at in [
+                ("old read 1", old, old),
+                ("old read 2", old, old),
+                ("old read 3", old, old),
+                ("old unread", old, None),
+                ("recent read", utc_now(), utc_now()),
+            ]
+        ]
+    )
+    await db_session.commit()
+
+    retention = NotificationRetention(
+        session_maker=TestingSessionLocal,
+        settings=Settings(
+            notification_retention_days=180, notification_retention_batch_size=2
+        ),
+    )
+    assert await retention.run_once() == 3
+
+    result = await db_session.execute(select(Notification.message))
+    assert sorted(result.scalars().all()) == ["old unread", "recent read"]
@@ -0,0 +1,519 @@
+"""
+Tests for the transactional outbox and its dispatcher.
+
+Email is delivered to a local fake SMTP server and push to a stub push
+service endpoint, so the whole path from queued row to wire is exercised.
+"""
+
+import base64
+import json
+import os
+import socketserver
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import Settings, get_settings
+from app.models.base import utc_now
+from app.models.notification import Notification, NotificationType
+from app.models.outbox import OutboxChannel, OutboxMessage, OutboxStatus
+from app.models.push_subscription import PushSubscription
+from app.models.user import User
+from app.services.digest import push_digest
+from app.services.email import EmailService, ResendProvider
+from app.services.notification import NotificationService
+from app.services.outbox import OutboxDispatcher, OutboxService
+from tests.conftest import TestingSessionLocal
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO, AUTH PLAIN, MAIL, RCPT, DATA."""
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self._reply("220 sink ready")
+        in_data = False
+        lines: list[str] = []
+        for raw in self.rfile:
+            line = raw.decode().rstrip("\r\n")
+            if in_data:
+                if line == ".":
+                    self.server.messages.append("\n".join(lines))
+                    in_data, lines = False, []
+                    self._reply("250 queued")
+                else:
+                    lines.append(line[1:] if line.startswith("..") else line)
+                continue
+
+            verb = line[:4].upper()
+            if verb == "EHLO":
+                self._reply("250-sink")
+                self._reply("250 AUTH PLAIN")
+            elif verb == "AUTH":
+                self._reply("235 authenticated")
+            elif verb == "DATA":
+                in_data = True
+                self._reply("354 end with <CRLF>.<CRLF>")
+            elif verb == "QUIT":
+                self._reply("221 bye")
+                return
+            else:
+                self._reply("250 ok")
+
+
+class _PushHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append((self.path, self.headers, body))
+        self.send_response(201)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def smtp_sink():
+    """A local fake SMTP server collecting received messages."""
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPHandler)
+    server.daemon_threads = True
+    server.messages = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def push_endpoint():
+    """A stub push service accepting every message with 201 Created."""
+    server = HTTPServer(("127.0.0.1", 0), _PushHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _email_service(port: int, **overrides) -> EmailService:
+    options = {
+        "email_enabled": True,
+        "email_provider": "smtp",
+        "smtp_host": "127.0.0.1",
+        "smtp_port": port,
+        "smtp_user": "rooster",
+        "smtp_password": "secret",
+        "smtp_use_tls": False,
+        "smtp_from_email": "rooster@example.com",
+    }
+    service = EmailService()
+    service.settings = Settings(**{**options, **overrides})
+    return service
+
+
+def _dispatcher(email_service: EmailService, **settings) -> OutboxDispatcher:
+    return OutboxDispatcher(
+        session_maker=TestingSessionLocal,
+        email_service=email_service,
+        settings=Settings(**settings),
+    )
+
+
+def _configure_vapid(monkeypatch) -> None:
+    vapid_key = ec.generate_private_key(ec.SECP256R1())
+    private_value = vapid_key.private_numbers().private_value.to_bytes(32, "big")
+    settings = get_settings()
+    monkeypatch.setattr(settings, "vapid_private_key", _b64(private_value))
+    monkeypatch.setattr(settings, "vapid_public_key", "configured")
+
+
+def _subscription(user: User, push_endpoint) -> PushSubscription:
+    client_key = ec.generate_private_key(ec.SECP256R1()).public_key()
+    p256dh = client_key.public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+    )
+    host, port = push_endpoint.server_address
+    return PushSubscription(
+        user_id=user.id,
+        endpoint=f"http://{host}:{port}/push/abc",
+        p256dh_key=_b64(p256dh),
+        auth_key=_b64(os.urandom(16)),
+    )
+
+
+async def _messages(db: AsyncSession) -> list[OutboxMessage]:
+    db.expire_all()
+    result = await db.execute(select(OutboxMessage).order_by(OutboxMessage.created_at))
+    return list(result.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_assignment_notification_is_queued_not_sent(
+    db_session: AsyncSession, test_user: User
+):
+    """Creating an assignment notification only writes outbox rows."""
+    user_email = test_user.email
+    service = NotificationService(db_session)
+    await service.notify_assignment_created_with_email(
+        assignment_id=test_user.id,
+        user_id=test_user.id,
+        user_name=test_user.name,
+        user_email=test_user.email,
+        roster_name="Sunday Service",
+        team_name="Media Team",
+        event_date=date(2026, 11, 1),
+    )
+    await db_session.commit()
+
+    messages = await _messages(db_session)
+    assert {m.channel for m in messages} == {OutboxChannel.EMAIL, OutboxChannel.PUSH}
+    assert all(m.status == OutboxStatus.PENDING for m in messages)
+
+    email = next(m for m in messages if m.channel == OutboxChannel.EMAIL)
+    assert email.payload["template"] == "assignment"
+    assert email.payload["to_email"] == user_email
+    assert email.payload["params"]["event_date"] == "November 01, 2026"
+
+
+@pytest.mark.asyncio
+async def test_lead_notifications_are_written_in_bulk(
+    db_session: AsyncSession, assert_max_queries
+):
+    """Notifying many leads costs one INSERT per table, not one per lead."""
+    leads = [User(email=f"lead{i}@example.com", name=f"Lead {i}") for i in range(25)]
+    db_session.add_all(leads)
+    await db_session.flush()
+    lead_ids = [lead.id for lead in leads]
+
+    service = NotificationService(db_session)
+    with assert_max_queries(2):
+        notifications = await service.notify_assignment_confirmed(
+            user_name="Volunteer",
+            roster_name="Sunday Service",
+            event_date=date(2026, 11, 1),
+            team_lead_ids=lead_ids,
+            assignment_id=lead_ids[0],
+        )
+        await db_session.flush()
+
+    assert [n.user_id for n in notifications] == lead_ids
+    assert all(n.type == NotificationType.ASSIGNMENT_CONFIRMED for n in notifications)
+    result = await db_session.execute(select(Notification))
+    assert len(result.scalars().all()) == 25
+    messages = await _messages(db_session)
+    assert {m.user_id for m in messages} == set(lead_ids)
+    assert all(m.payload["title"] == "Volunteer accepted" for m in messages)
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_request_queues_nothing(
+    db_session: AsyncSession, test_user: User
+):
+    """Messages share the fate of the transaction that queued them."""
+    OutboxService(db_session).enqueue_push(
+        user_id=test_user.id, title="Hello", body="World"
+    )
+    await db_session.rollback()
+    assert await _messages(db_session) == []
+
+
+def test_unknown_email_template_is_rejected(db_session: AsyncSession):
+    """Typos in template names fail at enqueue time, not in the worker."""
+    with pytest.raises(ValueError):
+        OutboxService(db_session).enqueue_email("nope", to_email="a@example.com")
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_sends_email_over_smtp(
+    db_session: AsyncSession, test_user: User, smtp_sink
+):
+    """Queued email is delivered to the SMTP server and marked sent."""
+    OutboxService(db_session).enqueue_email(
+        "assignment",
+        to_email="volunteer@example.com",
+        user_id=test_user.id,
+        user_name="Volunteer",
+        roster_name="Sunday Service",
+        team_name="Media Team",
+        event_date="November 01, 2026",
+        event_time=None,
+    )
+    await db_session.commit()
+
+    dispatcher = _dispatcher(_email_service(smtp_sink.server_address[1]))
+    assert await dispatcher.drain_once() == 1
+
+    assert len(smtp_sink.messages) == 1
+    assert "Subject: New assignment: Sunday Service" in smtp_sink.messages[0]
+    assert "To: volunteer@example.com" in smtp_sink.messages[0]
+
+    [message] = await _messages(db_session)
+    assert message.status == OutboxStatus.SENT
+    assert message.attempts == 1
+    assert message.sent_at is not None
+
+    # Nothing left to do
+    assert await dispatcher.drain_once() == 0
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_batches_emails_through_resend(db_session: AsyncSession):
+    """Emails claimed together reach Resend as one batch request."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"data": []})
+
+    email_service = EmailService()
+    email_service.settings = Settings(
+        email_enabled=True,
+        email_provider="resend",
+        resend_api_key="re_test_key",
+        smtp_from_email="rooster@example.com",
+    )
+    email_service._provider = ResendProvider(
+        "re_test_key",
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    for i in range(3):
+        OutboxService(db_session).enqueue_email(
+            "invite",
+            to_email=f"new{i}@example.com",
+            invitee_name="New",
+            team_name="Media Team",
+            inviter_name="Lead",
+            token=f"token{i}",
+        )
+    await db_session.commit()
+
+    assert await _dispatcher(email_service).drain_once() == 3
+
+    [request] = requests
+    assert request.url.path == "/emails/batch"
+    assert sorted(e["to"][0] for e in json.loads(request.content)) == [
+        "new0@example.com",
+        "new1@example.com",
+        "new2@example.com",
+    ]
+    messages = await _messages(db_session)
+    assert all(m.status == OutboxStatus.SENT for m in messages)
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_sends_push_to_subscriptions(
+    db_session: AsyncSession, test_user: User, push_endpoint, monkeypatch
+):
+    """Queued push is encrypted, VAPID-signed and posted to the endpoint."""
+    _configure_vapid(monkeypatch)
+    db_session.add(_subscription(test_user, push_endpoint))
+    OutboxService(db_session).enqueue_push(
+        user_id=test_user.id, title="Team Joined", body="You've joined Media Team"
+    )
+    await db_session.commit()
+
+    assert await _dispatcher(EmailService()).drain_once() == 1
+
+    [(path, headers, body)] = push_endpoint.requests
+    assert path == "/push/abc"
+    assert headers["Authorization"].startswith("vapid ")
+    assert headers["Content-Encoding"] == "aes128gcm"
+    assert body
+
+    [message] = await _messages(db_session)
+    assert message.status == OutboxStatus.SENT
+
+
+@pytest.mark.asyncio
+async def test_assignment_notifications_are_sent_as_a_digest(
+    db_session: AsyncSession, test_user: User, smtp_sink, push_endpoint, monkeypatch
+):
+    """A burst of assignments reaches the user as one push and one email."""
+    _configure_vapid(monkeypatch)
+    monkeypatch.setattr(
+        get_settings(), "notification_digest_windows", "assignment_created:120"
+    )
+    db_session.add(_subscription(test_user, push_endpoint))
+    service = NotificationService(db_session)
+    for day in range(1, 7):
+        await service.notify_assignment_created_with_email(
+            assignment_id=test_user.id,
+            user_id=test_user.id,
+            user_name=test_user.name,
+            user_email="volunteer@example.com",
+            roster_name="Sunday Service",
+            team_name="Media Team",
+            event_date=date(2027, 3, day),
+        )
+    await db_session.commit()
+
+    messages = await _messages(db_session)
+    assert len(messages) == 12
+    assert all(m.digest_key == "assignment_created" for m in messages)
+    # Held until the digest window closes
+    dispatcher = _dispatcher(
+        _email_service(smtp_sink.server_address[1]), outbox_batch_size=4
+    )
+    assert await dispatcher.drain_once() == 0
+
+    await db_session.execute(
+        update(OutboxMessage).values(next_attempt_at=utc_now() - timedelta(seconds=1))
+    )
+    await db_session.commit()
+    # The batch size cuts through the digest, but the rest is claimed with it
+    assert await dispatcher.drain_once() == 12
+
+    assert len(push_endpoint.requests) == 1
+    [email] = smtp_sink.messages
+    assert "Subject: 6 new assignments in March" in email
+    assert "March 06, 2027" in email
+    messages = await _messages(db_session)
+    assert all(m.status == OutboxStatus.SENT for m in messages)
+    assert await dispatcher.drain_once() == 0
+
+
+@pytest.mark.asyncio
+async def test_digests_are_off_by_default(db_session: AsyncSession, test_user: User):
+    """Without configured windows every notification is sent on its own."""
+    await NotificationService(db_session).notify_assignment_created_with_email(
+        assignment_id=test_user.id,
+        user_id=test_user.id,
+        user_name=test_user.name,
+        user_email="volunteer@example.com",
+        roster_name="Sunday Service",
+        team_name="Media Team",
+        event_date=date(2027, 3, 1),
+    )
+    await db_session.commit()
+
+    messages = await _messages(db_session)
+    assert messages
+    assert all(m.digest_key is None for m in messages)
+
+
+def test_push_digest_summarises_assignments():
+    """Assignment digests count the events and say when they are."""
+    payloads = [
+        {"title": "New Assignment", "body": "...", "digest": {"event_date": day}}
+        for day in ("2027-03-07", "2027-03-14", "2027-04-04")
+    ]
+    digest = push_digest("assignment_created", payloads)
+    assert digest["body"] == (
+        "You've been assigned to 3 events between March 7 and April 4"
+    )
+    assert "digest" not in digest
+
+    digest = push_digest("team_joined", [{"title": "A"}, {"title": "B"}])
+    assert digest == {"title": "2 new notifications", "body": "A, B", "url": "/"}
+
+
+@pytest.mark.asyncio
+async def test_failed_delivery_backs_off_then_dead_letters(
+    db_session: AsyncSession, test_user: User
+):
+    """Failures are retried later and dead-lettered after max attempts."""
+    # Nothing listens on port 1, so every SMTP attempt fails
+    dispatcher = _dispatcher(_email_service(1), outbox_max_attempts=2)
+    OutboxService(db_session).enqueue_email(
+        "invite",
+        to_email="new@example.com",
+        invitee_name="New",
+        team_name="Media Team",
+        inviter_name="Lead",
+        token="token",
+    )
+    await db_session.commit()
+
+    assert await dispatcher.drain_once() == 1
+    [message] = await _messages(db_session)
+    assert message.status == OutboxStatus.PENDING
+    assert message.attempts == 1
+    assert message.last_error.startswith("DeliveryError")
+    retry_at = message.next_attempt_at.replace(tzinfo=None)
+    assert retry_at > utc_now().replace(tzinfo=None) + timedelta(seconds=25)
+
+    # Not due yet
+    assert await dispatcher.drain_once() == 0
+
+    await db_session.execute(
+        update(OutboxMessage).values(next_attempt_at=utc_now() - timedelta(seconds=1))
+    )
+    await db_session.commit()
+    assert await dispatcher.drain_once() == 1
+
+    [message] = await _messages(db_session)
+    assert message.status == OutboxStatus.DEAD
+    assert message.attempts == 2
+    assert await dispatcher.drain_once() == 0
+
+
+@pytest.mark.asyncio
+async def test_malformed_email_fails_alone(db_session: AsyncSession, smtp_sink):
+    """An email that cannot be rendered does not hold up the rest of its batch."""
+    service = OutboxService(db_session)
+    for to_email, params in (
+        ("good@example.com", {"token": "token"}),
+        ("bad@example.com", {}),
+    ):
+        service.enqueue_email(
+            "invite",
+            to_email=to_email,
+            invitee_name="New",
+            team_name="Media Team",
+            inviter_name="Lead",
+            **params,
+        )
+    await db_session.commit()
+
+    assert (
+        await _dispatcher(_email_service(smtp_sink.server_address[1])).drain_once() == 2
+    )
+
+    assert len(smtp_sink.messages) == 1
+    messages = {m.payload["to_email"]: m for m in await _messages(db_session)}
+    assert messages["good@example.com"].status == OutboxStatus.SENT
+    assert messages["bad@example.com"].status == OutboxStatus.PENDING
+    assert messages["bad@example.com"].last_error.startswith("TypeError")
+
+
+@pytest.mark.asyncio
+async def test_disabled_email_is_not_retried(db_session: AsyncSession):
+    """With email disabled, messages are dropped rather than retried."""
+    dispatcher = _dispatcher(_email_service(1, email_enabled=False))
+    OutboxService(db_session).enqueue_email(
+        "invite",
+        to_email="new@example.com",
+        invitee_name="New",
+        team_name="Media Team",
+        inviter_name="Lead",
+        token="token",
+    )
+    await db_session.commit()
+
+    assert await dispatcher.drain_once() == 1
+    [message] = await _messages(db_session)
+    assert message.status == OutboxStatus.SENT
+
+
+def test_retry_delay_is_exponential_and_capped():
+    """Backoff doubles per attempt up to the configured maximum."""
+    dispatcher = _dispatcher(
+        EmailService(), outbox_retry_base_seconds=10, outbox_retry_max_seconds=60
+    )
+    delays = [dispatcher.retry_delay(n).total_seconds() for n in range(1, 6)]
+    assert delays == [10, 20, 40, 60, 60]
@@ -1,8 +1,34 @@
+import asyncio
+import base64
 import json
+import os
+from datetime import timedelta
+
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
+
+import httpx
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from app.core.config import Settings, get_settings
+from app.models.base import utc_now
+from app.models.push_subscription import PushSubscription
+from app.services.push import (
+    PUSH_SUBSCRIPTIONS,
+    PUSH_SUBSCRIPTIONS_PER_USER,
+    PushService,
+    PushSubscriptionPruner,
+)
+from app.services.push_transport import PushResponse, PushTransport, VapidSigner
+from tests.conftest import TestingSessionLocal
 
-from app.services.push import PushService
+
+def _fake_transport(status_code: int = 201) -> MagicMock:
+    """A transport that answers every push with the given status."""
+    transport = MagicMock()
+    transport.send = AsyncMock(return_value=PushResponse(status_code=status_code))
+    return transport
 
 
 @pytest.mark.asyncio
@@ -244,7 +270,8 @@ async def test_push_service_send_to_user_not_configured(db_session, test_user):
 @pytest.mark.asyncio
 async def test_push_service_send_payload_includes_tag_and_url(db_session, test_user):
     """Test that send_to_user passes tag and url in the push payload."""
-    service = PushService(db_session)
+    transport = _fake_transport()
+    service = PushService(db_session, transport=transport)
 
     # Add a subscription
     await service.subscribe(
@@ -254,10 +281,7 @@ async def test_push_service_send_payload_includes_tag_and_url(db_session, test_u
         auth_key="test-auth",
     )
 
-    with (
-        patch.object(service, "settings") as mock_settings,
-        patch("app.services.push.webpush") as mock_webpush,
-    ):
+    with patch.object(service, "settings") as mock_settings:
         mock_settings.vapid_public_key = "test-pub"
         mock_settings.vapid_private_key = "test-priv"
         mock_settings.vapid_subject = "mailto:test@example.com"
@@ -271,8 +295,8 @@ async def test_push_service_send_payload_includes_tag_and_url(db_session, test_u
         )
 
         assert sent == 1
-        mock_webpush.assert_called_once()
-        payload = json.loads(mock_webpush.call_args.kwargs["data"])
+        transport.send.assert_called_once()
+        payload = json.loads(transport.send.call_args.kwargs["data"])
         assert payload["title"] == "New Assignment"
         assert payload["body"] == "You've been assigned"
         assert payload["url"] == "/?focus=action-required"
@@ -284,7 +308,8 @@ async def test_push_service_send_payload_includes_tag_and_url(db_session, test_u
 @pytest.mark.asyncio
 async def test_push_service_send_without_tag(db_session, test_user):
     """Test that send_to_user omits tag from payload when not provided."""
-    service = PushService(db_session)
+    transport = _fake_transport()
+    service = PushService(db_session, transport=transport)
 
     await service.subscribe(
         user_id=test_user.id,
@@ -293,10 +318,7 @@ async def test_push_service_send_without_tag(db_session, test_user):
         auth_key="test-auth",
     )
 
-    with (
-        patch.object(service, "settings") as mock_settings,
-        patch("app.services.push.webpush") as mock_webpush,
-    ):
+    with patch.object(service, "settings") as mock_settings:
         mock_settings.vapid_public_key = "test-pub"
         mock_settings.vapid_private_key = "test-priv"
         mock_settings.vapid_subject = "mailto:test@example.com"
@@ -309,7 +331,315 @@ async def test_push_service_send_without_tag(db_session, test_user):
         )
 
         assert sent == 1
-        payload = json.loads(mock_webpush.call_args.kwargs["data"])
+        payload = json.loads(transport.send.call_args.kwargs["data"])
         assert payload["title"] == "Team Joined"
         assert payload["url"] == "/teams/123"
         assert "tag" not in payload
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _vapid_private_key() -> str:
+    key = ec.generate_private_key(ec.SECP256R1())
+    return _b64(key.private_numbers().private_value.to_bytes(32, "big"))
+
+
+def _subscription_info(endpoint: str) -> dict:
+    client_key = ec.generate_private_key(ec.SECP256R1()).public_key()
+    p256dh = client_key.public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+    )
+    return {
+        "endpoint": endpoint,
+        "keys": {"p256dh": _b64(p256dh), "auth": _b64(os.urandom(16))},
+    }
+
+
+@pytest.mark.asyncio
+async def test_push_transport_encrypts_and_signs():
+    """The transport posts an aes128gcm body with a VAPID Authorization header."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(201)
+
+    transport = PushTransport(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    response = await transport.send(
+        subscription_info=_subscription_info("https://push.example.com/send/abc"),
+        data=json.dumps({"title": "Hi"}),
+        vapid_private_key=_vapid_private_key(),
+        vapid_claims={"sub": "mailto:test@example.com"},
+        ttl=60,
+    )
+
+    assert response.ok
+    [request] = requests
+    assert str(request.url) == "https://push.example.com/send/abc"
+    assert request.headers["authorization"].startswith("vapid t=")
+    assert request.headers["content-encoding"] == "aes128gcm"
+    assert request.headers["ttl"] == "60"
+    assert b"Hi" not in request.content
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "keys", [{}, {"p256dh": "AAAA", "auth": "AAAA"}, {"p256dh": "!!!", "auth": "a"}]
+)
+async def test_push_transport_reports_unusable_keys(keys):
+    """A subscription that cannot be encrypted to is invalid, not an error."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise AssertionError("nothing should be sent")
+
+    transport = PushTransport(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    response = await transport.send(
+        subscription_info={
+            "endpoint": "https://push.example.com/send/abc",
+            "keys": keys,
+        },
+        data=json.dumps({"title": "Hi"}),
+        vapid_private_key=_vapid_private_key(),
+        vapid_claims={"sub": "mailto:test@example.com"},
+        ttl=60,
+    )
+
+    assert response.invalid
+    assert response.error.startswith("Cannot encrypt")
+
+
+def _jwt_claims(headers: dict) -> dict:
+    token = headers["Authorization"].split("t=")[1].split(",")[0]
+    payload = token.split(".")[1]
+    return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+
+
+def test_vapid_signer_caches_per_origin():
+    """One token per push service origin, re-signed shortly before expiry."""
+    signer = VapidSigner(
+        _vapid_private_key(),
+        {"sub": "mailto:test@example.com"},
+        lifetime=3600,
+        refresh=600,
+    )
+    fcm = signer.headers("https://fcm.googleapis.com/fcm/send/a", now=1000)
+    assert signer.headers("https://fcm.googleapis.com/fcm/send/b", now=2000) == fcm
+    claims = _jwt_claims(fcm)
+    assert claims["aud"] == "https://fcm.googleapis.com"
+    assert claims["exp"] == 4600
+    assert claims["sub"] == "mailto:test@example.com"
+
+    mozilla = signer.headers("https://updates.push.services.mozilla.com/wpush/v2/x")
+    assert _jwt_claims(mozilla)["aud"] == "https://updates.push.services.mozilla.com"
+
+    # Within the refresh margin of expiry a new token is signed
+    renewed = signer.headers("https://fcm.googleapis.com/fcm/send/a", now=4000)
+    assert renewed != fcm
+    assert _jwt_claims(renewed)["exp"] == 7600
+
+
+@pytest.mark.asyncio
+async def test_push_transport_bounds_concurrency():
+    """No more than max_concurrency pushes are in flight at once."""
+    in_flight = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(201)
+
+    transport = PushTransport(
+        max_concurrency=3,
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    key = _vapid_private_key()
+    subscription = _subscription_info("https://push.example.com/send/abc")
+    responses = await asyncio.gather(
+        *(
+            transport.send(subscription, "{}", key, {"sub": "mailto:a@example.com"})
+            for _ in range(10)
+        )
+    )
+
+    assert all(r.ok for r in responses)
+    assert peak == 3
+
+
+def test_push_response_classification():
+    """Responses are sorted into sent, gone, retryable and permanent failures."""
+    assert PushResponse(status_code=201).ok
+    assert PushResponse(status_code=410).gone
+    assert PushResponse(status_code=404).gone
+    assert PushResponse(status_code=503).retryable
+    assert PushResponse(status_code=429).retryable
+    assert PushResponse(error="ConnectError").retryable
+    assert not PushResponse(status_code=400).retryable
+    assert not PushResponse(error="Cannot encrypt", invalid=True).retryable
+
+
+@pytest.mark.asyncio
+async def test_send_many_fans_out_and_removes_expired(db_session, test_user):
+    """All recipients' subscriptions are sent to concurrently; 410s are deleted."""
+    from app.models.user import User
+
+    other = User(email="other@example.com", name="Other")
+    db_session.add(other)
+    await db_session.flush()
+
+    in_flight = 0
+    peak = 0
+
+    async def send(subscription_info, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        status_code = 410 if "expired" in subscription_info["endpoint"] else 201
+        return PushResponse(status_code=status_code)
+
+    transport = MagicMock()
+    transport.send = AsyncMock(side_effect=send)
+    service = PushService(db_session, transport=transport)
+    for user, endpoint in [
+        (test_user, "https://push.example.com/a"),
+        (test_user, "https://push.example.com/expired"),
+        (other, "https://push.example.com/b"),
+    ]:
+        await service.subscribe(
+            user_id=user.id, endpoint=endpoint, p256dh_key="k", auth_key="a"
+        )
+
+    with patch.object(service, "settings") as mock_settings:
+        mock_settings.vapid_public_key = "test-pub"
+        mock_settings.vapid_private_key = "test-priv"
+        mock_settings.vapid_subject = "mailto:test@example.com"
+
+        outcomes = await service.send_many(
+            [
+                (test_user.id, {"title": "One", "body": "1"}),
+                (other.id, {"title": "Two", "body": "2"}),
+            ]
+        )
+
+    assert [(o.sent, o.gone) for o in outcomes] == [(1, 1), (1, 0)]
+    assert peak == 3
+    remaining = await service.get_user_subscriptions(test_user.id)
+    assert [s.endpoint for s in remaining] == ["https://push.example.com/a"]
+
+
+def _configure_vapid(monkeypatch) -> None:
+    settings = get_settings()
+    monkeypatch.setattr(settings, "vapid_public_key", "test-pub")
+    monkeypatch.setattr(settings, "vapid_private_key", "test-priv")
+
+
+@pytest.mark.asyncio
+async def test_push_service_subscribe_unchanged_skips_write(
+    db_session, test_user, assert_max_queries
+):
+    """Re-subscribing on app launch with the same keys does not write."""
+    service = PushService(db_session)
+    args = dict(
+        user_id=test_user.id,
+        endpoint="https://fcm.googleapis.com/fcm/send/same",
+        p256dh_key="key",
+        auth_key="auth",
+    )
+    first = await service.subscribe(**args)
+
+    with assert_max_queries(1):
+        again = await service.subscribe(**args)
+    assert again.id == first.id
+
+
+@pytest.mark.asyncio
+async def test_failing_endpoint_backs_off_then_recovers(
+    db_session, test_user, monkeypatch
+):
+    """Failing endpoints are skipped until their backoff ends."""
+    _configure_vapid(monkeypatch)
+    transport = _fake_transport(status_code=503)
+    service = PushService(db_session, transport=transport)
+    subscription = await service.subscribe(
+        user_id=test_user.id,
+        endpoint="https://push.example.com/flaky",
+        p256dh_key="k",
+        auth_key="a",
+    )
+    notification = [(test_user.id, {"title": "One", "body": "1"})]
+
+    [outcome] = await service.send_many(notification)
+    assert (outcome.failed, outcome.deferred) == (1, 0)
+    assert subscription.failure_count == 1
+    assert subscription.retry_after > subscription.last_failure_at
+    await db_session.flush()
+
+    # Backing off: no network call at all
+    [outcome] = await service.send_many(notification)
+    assert (outcome.failed, outcome.deferred) == (0, 1)
+    assert transport.send.await_count == 1
+
+    subscription.retry_after = utc_now() - timedelta(seconds=1)
+    await db_session.flush()
+    transport.send.return_value = PushResponse(status_code=201)
+    [outcome] = await service.send_many(notification)
+    assert outcome.sent == 1
+    assert subscription.failure_count == 0
+    assert subscription.retry_after is None
+    assert subscription.last_success_at is not None
+
+
+@pytest.mark.asyncio
+async def test_pruner_removes_failing_subscriptions(db_session, test_user):
+    """Endpoints that keep failing or went stale are pruned in batches."""
+    long_ago = utc_now() - timedelta(days=90)
+    db_session.add_all(
+        [
+            PushSubscription(
+                user_id=test_user.id,
+                endpoint="https://push.example.com/healthy",
+                p256dh_key="k",
+                auth_key="a",
+                last_success_at=utc_now(),
+            ),
+            PushSubscription(
+                user_id=test_user.id,
+                endpoint="https://push.example.com/broken",
+                p256dh_key="k",
+                auth_key="a",
+                failure_count=10,
+            ),
+            PushSubscription(
+                user_id=test_user.id,
+                endpoint="https://push.example.com/stale",
+                p256dh_key="k",
+                auth_key="a",
+                failure_count=1,
+                last_success_at=long_ago,
+            ),
+        ]
+    )
+    await db_session.commit()
+
+    pruner = PushSubscriptionPruner(
+        session_maker=TestingSessionLocal,
+        settings=Settings(push_prune_batch_size=1),
+    )
+    assert await pruner.run_once() == 2
+
+    remaining = await PushService(db_session).get_user_subscriptions(test_user.id)
+    assert [s.endpoint for s in remaining] == ["https://push.example.com/healthy"]
+    assert PUSH_SUBSCRIPTIONS.value(state="healthy") == 1
+    assert PUSH_SUBSCRIPTIONS.value(state="failing") == 0
+    assert PUSH_SUBSCRIPTIONS_PER_USER.value(subscriptions="1") == 1
@@ -0,0 +1,376 @@
+"""
+Query budgets for the read endpoints.
+
+Each test seeds a team with several members, events and assignments and
+locks in how many SQL statements the endpoint may issue. The budgets must
+not grow with the amount of data, so a new N+1 loop fails here instead of
+showing up as a slow page in production.
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.config import get_settings
+from app.core.middleware import (
+    REPEATED_STATEMENTS,
+    REQUEST_QUERIES,
+    RequestContextMiddleware,
+)
+from app.core.permissions import TeamPermission
+from app.core.query_stats import QueryStats, count_queries
+from app.models.availability import Unavailability
+from app.models.invite import Invite
+from app.models.notification import Notification, NotificationType
+from app.models.organisation import Organisation, OrganisationMember, OrganisationRole
+from app.models.roster import EventAssignment, Roster, RosterEvent
+from app.models.team import Team, TeamMember, TeamRole
+from app.models.user import User
+from tests.conftest import engine
+
+MEMBERS = 6
+EVENTS = 5
+
+
+@pytest.fixture
+async def busy_team(db: AsyncSession, test_user: User):
+    """A team led by test_user with members, events and assignments."""
+    org = Organisation(name="Budget Church")
+    db.add(org)
+    await db.flush()
+    db.add(
+        OrganisationMember(
+            user_id=test_user.id, organisation_id=org.id, role=OrganisationRole.ADMIN
+        )
+    )
+
+    team = Team(name="Media Team", organisation_id=org.id)
+    db.add(team)
+    await db.flush()
+    db.add(
+        TeamMember(
+            user_id=test_user.id,
+            team_id=team.id,
+            role=TeamRole.LEAD,
+            permissions=TeamPermission.ALL.copy(),
+        )
+    )
+
+    members = [
+        User(email=f"member{i}@example.com", name=f"Member {i}") for i in range(MEMBERS)
+    ]
+    db.add_all(members)
+    await db.flush()
+    for member in members:
+        db.add(TeamMember(user_id=member.id, team_id=team.id, permissions=[]))
+        db.add(Unavailability(user_id=member.id, date=date.today() + timedelta(days=7)))
+
+    roster = Roster(
+        name="Sunday Service",
+        team_id=team.id,
+        recurrence_day=6,
+        slots_needed=2,
+        start_date=date.today(),
+    )
+    db.add(roster)
+    await db.flush()
+
+    events = [
+        RosterEvent(
+            roster_id=roster.id, date=date.today() + timedelta(days=7 * (i + 1))
+        )
+        for i in range(EVENTS)
+    ]
+    db.add_all(events)
+    await db.flush()
+    for i, event in enumerate(events):
+        db.add(EventAssignment(event_id=event.id, user_id=test_user.id))
+        db.add(EventAssignment(event_id=event.id, user_id=members[i % MEMBERS].id))
+
+    for i in range(5):
+        db.add(
+            Notification(
+                user_id=test_user.id,
+                type=NotificationType.ASSIGNMENT_CREATED,
+                title="New Assignment",
+                message=f"Assignment {i}",
+            )
+        )
+    await db.commit()
+
+    return {"team": team, "roster": roster, "events": events}
+
+
+def test_query_stats_flags_repeated_statements():
+    """QueryStats totals statements and finds the repeated ones."""
+    stats = QueryStats()
+    stats.record("SELECT 1", 0.5)
+    stats.record("SELECT 1", 0.25)
+    assert stats.count == 2
+    assert stats.duration == 0.75
+    assert stats.repeated(2) == [("SELECT 1", 2)]
+    assert stats.repeated(3) == []
+
+
+@pytest.mark.asyncio
+async def test_count_queries_is_scoped_to_block(client: AsyncClient, auth_headers):
+    """Statements run after the block are not counted."""
+    with count_queries() as stats:
+        await client.get("/api/auth/me", headers=auth_headers)
+    assert stats.count >= 1
+
+    seen = stats.count
+    await client.get("/api/auth/me", headers=auth_headers)
+    assert stats.count == seen
+
+
+@pytest.mark.asyncio
+async def test_list_notifications_budget(
+    client: AsyncClient, auth_headers, busy_team, assert_max_queries
+):
+    with assert_max_queries(2):
+        response = await client.get("/api/notifications", headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+
+
+@pytest.mark.asyncio
+async def test_list_team_members_budget(
+    client: AsyncClient, auth_headers, busy_team, assert_max_queries
+):
+    team = busy_team["team"]
+    with assert_max_queries(7):
+        response = await client.get(
+            f"/api/teams/{team.id}/members", headers=auth_headers
+        )
+    assert response.status_code == 200
+    assert len(response.json()) == MEMBERS + 1
+
+
+@pytest.mark.asyncio
+async def test_list_roster_events_budget(
+    client: AsyncClient, auth_headers, busy_team, assert_max_queries
+):
+    roster = busy_team["roster"]
+    with assert_max_queries(9):
+        response = await client.get(
+            f"/api/rosters/{roster.id}/events", headers=auth_headers
+        )
+    assert response.status_code == 200
+    assert len(response.json()) == EVENTS
+
+
+@pytest.mark.asyncio
+async def test_list_my_event_assignments_budget(
+    client: AsyncClient, auth_headers, busy_team, assert_max_queries
+):
+    with assert_max_queries(6):
+        response = await client.get(
+            "/api/rosters/event-assignments/my", headers=auth_headers
+        )
+    assert response.status_code == 200
+    assert len(response.json()) == EVENTS
+
+
+@pytest.mark.asyncio
+async def test_list_my_teams_budget(
+    client: AsyncClient, auth_headers, busy_team, assert_max_queries
+):
+    with assert_max_queries(4):
+        response = await client.get("/api/teams", headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+
+
+@pytest.mark.asyncio
+async def test_team_availability_budget(
+    client: AsyncClient, auth_headers, busy_team, assert_max_queries
+):
+    """Members and their unavailability load in one query, not one per member."""
+    team = busy_team["team"]
+    with assert_max_queries(4):
+        response = await client.get(
+            f"/api/dashboard/teams/{team.id}/availability",
+            headers=auth_headers,
+            params={"target_date": str(date.today() + timedelta(days=7))},
+        )
+    assert response.status_code == 200
+    assert sorted(m["is_available"] for m in response.json()) == [False] * MEMBERS + [
+        True
+    ]
+
+
+@pytest.mark.asyncio
+async def test_team_availability_matrix_budget(
+    client: AsyncClient, auth_headers, busy_team, assert_max_queries
+):
+    team = busy_team["team"]
+    with assert_max_queries(4):
+        response = await client.get(
+            f"/api/dashboard/teams/{team.id}/availability/matrix",
+            headers=auth_headers,
+            params={
+                "start_date": str(date.today()),
+                "end_date": str(date.today() + timedelta(days=30)),
+            },
+        )
+    assert response.status_code == 200
+    rows = {m["user_name"]: m["unavailable"] for m in response.json()["members"]}
+    # Every member is away on day 7 of the range; the lead never is
+    assert rows.pop("Test User") == "0"
+    assert set(rows.values()) == {f"{1 << 7:x}"}
+
+
+@pytest.mark.asyncio
+async def test_team_conflicts_budget(
+    client: AsyncClient, auth_headers, busy_team, assert_max_queries
+):
+    team = busy_team["team"]
+    with assert_max_queries(4):
+        response = await client.get(
+            f"/api/availability/teams/{team.id}/conflicts", headers=auth_headers
+        )
+    assert response.status_code == 200
+    # Member 0 is assigned to the first event, on the day every member is away
+    assert [c["user_name"] for c in response.json()] == ["Member 0"]
+
+
+@pytest.mark.asyncio
+async def test_event_calendar_budget(
+    client: AsyncClient, auth_headers, busy_team, assert_max_queries
+):
+    """A year of calendar is one query and lists only the busy days."""
+    params = {
+        "start_date": str(date.today()),
+        "end_date": str(date.today() + timedelta(days=365)),
+    }
+    with assert_max_queries(3):
+        response = await client.get(
+            "/api/dashboard/calendar/events", headers=auth_headers, params=params
+        )
+    assert response.status_code == 200
+    days = response.json()["days"]
+    assert sorted(days) == [str(event.date) for event in busy_team["events"]]
+    assert all(
+        entry["roster_name"] == "Sunday Service"
+        and entry["organisation_name"] == "Budget Church"
+        for entries in days.values()
+        for entry in entries
+    )
+
+    params["end_date"] = str(date.today() + timedelta(days=366))
+    response = await client.get(
+        "/api/dashboard/calendar/events", headers=auth_headers, params=params
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_home_budget(
+    client: AsyncClient,
+    auth_headers,
+    db: AsyncSession,
+    test_user: User,
+    busy_team,
+    assert_max_queries,
+    monkeypatch,
+):
+    """The home aggregate costs the same however many teams the user leads."""
+    org_id = busy_team["team"].organisation_id
+    for n in range(3):
+        team = Team(name=f"Team {n}", organisation_id=org_id)
+        db.add(team)
+        await db.flush()
+        db.add(TeamMember(user_id=test_user.id, team_id=team.id, role=TeamRole.LEAD))
+        roster = Roster(
+            name=f"Roster {n}",
+            team_id=team.id,
+            recurrence_day=6,
+            start_date=date.today(),
+        )
+        db.add(roster)
+        await db.flush()
+        db.add(RosterEvent(roster_id=roster.id, date=date.today() + timedelta(days=3)))
+    db.add(
+        Invite(
+            team_id=busy_team["team"].id, user_id=test_user.id, email=test_user.email
+        )
+    )
+    await db.commit()
+
+    monkeypatch.setattr(get_settings(), "debug", True)
+    with assert_max_queries(9):
+        response = await client.get("/api/dashboard/home", headers=auth_headers)
+    assert response.status_code == 200
+    home = response.json()
+
+    assert len(home["teams"]) == 4
+    assert len(home["assignments"]) == EVENTS
+    # busy_team's events are full; the new teams' events have nobody yet
+    assert [e["roster_name"] for e in home["unfilled_events"]] == [
+        "Roster 0",
+        "Roster 1",
+        "Roster 2",
+    ]
+    assert home["unread_count"] == 5
+    assert len(home["notifications"]) == 5
+    assert [i["team_name"] for i in home["pending_invites"]] == ["Media Team"]
+
+    sections = [
+        entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")
+    ]
+    assert sections == ["teams", "assignments", "unfilled", "notifications", "invites"]
+
+
+def _middleware_app(repeat: int, **options) -> RequestContextMiddleware:
+    """A bare app whose only route runs ``SELECT 1`` ``repeat`` times."""
+
+    async def endpoint(request):
+        async with engine.connect() as conn:
+            for _ in range(repeat):
+                await conn.execute(text("SELECT 1"))
+        return PlainTextResponse("ok")
+
+    return RequestContextMiddleware(
+        Starlette(routes=[Route("/probe", endpoint)]), **options
+    )
+
+
+@pytest.mark.asyncio
+async def test_query_headers_only_in_debug_mode():
+    """Query totals are returned as headers only when asked for."""
+    for query_headers in (True, False):
+        app = _middleware_app(repeat=3, query_headers=query_headers)
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            response = await client.get("/probe")
+
+        if query_headers:
+            assert response.headers["X-DB-Query-Count"] == "3"
+            assert float(response.headers["X-DB-Query-Time-Ms"]) >= 0
+        else:
+            assert "X-DB-Query-Count" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_repeated_statements_are_reported(caplog):
+    """Requests that loop over the same statement are counted and logged."""
+    app = _middleware_app(repeat=4, repeated_statement_threshold=4)
+    before_requests = REQUEST_QUERIES.count(route="/probe")
+    before_repeats = REPEATED_STATEMENTS.value(route="/probe")
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        await client.get("/probe")
+
+    assert REQUEST_QUERIES.count(route="/probe") == before_requests + 1
+    assert REPEATED_STATEMENTS.value(route="/probe") == before_repeats + 1
+    assert "Possible N+1 on /probe" in caplog.text
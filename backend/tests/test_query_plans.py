@@ -0,0 +1,266 @@
+"""Index coverage regression test.
+
+Runs the hot service queries against seeded data, captures every SELECT they
+issue and EXPLAINs it. The test fails when a table holding at least
+SEQ_SCAN_ROW_THRESHOLD rows is read with a full scan, which means a filter
+the services rely on has no usable index.
+
+The SQLite run always happens. Set TEST_POSTGRES_URL (an empty scratch
+database, e.g. postgresql+asyncpg://localhost:5433/rooster_plans) to also
+check the plans Postgres picks; sequential scans are disabled for the
+EXPLAIN so any remaining Seq Scan means no index could serve the query.
+"""
+
+import json
+import os
+import re
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.models.availability import Unavailability
+from app.models.invite import Invite
+from app.models.notification import Notification, NotificationType
+from app.models.organisation import Organisation
+from app.models.roster import EventAssignment, Roster, RosterEvent
+from app.models.team import Team, TeamMember
+from app.models.user import User
+from app.services.availability import AvailabilityService
+from app.services.dashboard import DashboardService
+from app.services.notification import NotificationService
+from app.services.reminder import ReminderService
+from app.services.roster import RosterService
+from app.services.team import TeamService
+from tests.conftest import engine as sqlite_engine
+
+SEQ_SCAN_ROW_THRESHOLD = 50
+START = date(2026, 1, 4)
+
+
+async def _seed(db: AsyncSession) -> dict:
+    """Create enough rows that every hot table crosses the threshold."""
+    org = Organisation(name="Plans Org")
+    db.add(org)
+    await db.flush()
+
+    teams = [Team(name=f"Team {i}", organisation_id=org.id) for i in range(4)]
+    users = [User(email=f"user{i}@example.com", name=f"User {i}") for i in range(40)]
+    db.add_all(teams + users)
+    await db.flush()
+
+    for i, user in enumerate(users):
+        for team in (teams[i % 4], teams[(i + 1) % 4]):
+            db.add(TeamMember(user_id=user.id, team_id=team.id, permissions=[]))
+        for d in range(5):
+            db.add(Unavailability(user_id=user.id, date=START + timedelta(days=7 * d)))
+        for n in range(10):
+            db.add(
+                Notification(
+                    user_id=user.id,
+                    type=NotificationType.ASSIGNMENT_CREATED,
+                    title="New Assignment",
+                    message=f"Assignment {n}",
+                )
+            )
+        db.add(Invite(team_id=teams[i % 4].id, user_id=user.id, email=user.email))
+        db.add(Invite(team_id=teams[(i + 2) % 4].id, user_id=user.id, email=user.email))
+
+    rosters = [
+        Roster(
+            name=f"Roster {t}-{r}", team_id=team.id, recurrence_day=0, start_date=START
+        )
+        for t, team in enumerate(teams)
+        for r in range(15)
+    ]
+    db.add_all(rosters)
+    await db.flush()
+
+    events = [
+        RosterEvent(roster_id=roster.id, date=START + timedelta(days=7 * e))
+        for roster in rosters
+        for e in range(5)
+    ]
+    db.add_all(events)
+    await db.flush()
+
+    for i, ev in enumerate(events):
+        for offset in (0, 1):
+            db.add(EventAssignment(event_id=ev.id, user_id=users[(i + offset) % 40].id))
+
+    # An upcoming assignment on a date its member is unavailable, so the
+    # conflict checks find something to notify
+    upcoming = RosterEvent(
+        roster_id=rosters[0].id, date=date.today() + timedelta(days=7)
+    )
+    db.add(upcoming)
+    await db.flush()
+    db.add(EventAssignment(event_id=upcoming.id, user_id=users[0].id))
+    db.add(Unavailability(user_id=users[0].id, date=upcoming.date))
+    await db.commit()
+
+    return {
+        "user_id": users[0].id,
+        "team_id": teams[0].id,
+        "roster_id": rosters[0].id,
+        "event_id": events[0].id,
+    }
+
+
+async def _run_service_queries(db: AsyncSession, ids: dict) -> None:
+    """Call the service methods whose queries must stay index-backed."""
+    user_id: uuid.UUID = ids["user_id"]
+    team_id: uuid.UUID = ids["team_id"]
+    end = START + timedelta(days=60)
+
+    notifications = NotificationService(db)
+    await notifications.get_user_notifications(user_id)
+    await notifications.get_user_notifications(user_id, unread_only=True)
+    _, cursor = await notifications.get_inbox(user_id, 3)
+    await notifications.get_inbox(user_id, 3, cursor=cursor)
+    await notifications.count_unread(user_id)
+
+    rosters = RosterService(db)
+    await rosters.get_team_rosters(team_id)
+    await rosters.get_roster_events(ids["roster_id"], START, end)
+    await rosters.get_user_event_assignments(user_id, START, end)
+    await rosters.get_event_assignment_with_invite_status(ids["event_id"])
+
+    availability = AvailabilityService(db)
+    await availability.get_user_unavailabilities(user_id, START, end)
+    await availability.get_team_availability_matrix(team_id, START, end)
+    await availability.check_user_conflicts(user_id)
+    await availability.check_team_conflicts(team_id)
+    upcoming = [(user_id, date.today(), None)]
+    assert await availability.find_conflicts(unavailable=upcoming)
+    await notifications.notify_new_conflicts(unavailable=upcoming)
+
+    dashboard = DashboardService(db)
+    await dashboard.get_event_calendar(user_id, START, end)
+    user = await db.get(User, user_id)
+    home_teams = await dashboard.get_home_teams(user_id)
+    await dashboard.get_home_assignments(user, START)
+    await dashboard.get_home_unfilled_events(home_teams, START, end)
+    await rosters.get_unfilled_events_for_teams([team_id], START, end)
+    await dashboard.get_home_invites(user.email)
+
+    await ReminderService(db, [3, 1]).find_due(START + timedelta(days=5), 500)
+
+    teams = TeamService(db)
+    await teams.has_active_invite(user_id, team_id)
+    members = await teams.get_members(team_id)
+    await teams.get_member_invite_status(members, team_id)
+
+
+async def _capture_selects(engine, session_maker, ids) -> list[tuple[str, tuple]]:
+    statements: list[tuple[str, tuple]] = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, tuple(parameters or ())))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _capture)
+    try:
+        async with session_maker() as db:
+            await _run_service_queries(db, ids)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _capture)
+    return statements
+
+
+def _alias_map(statement: str) -> dict[str, str]:
+    """Map SQL aliases (``roster_events AS roster_events_1``) to table names."""
+    aliases = {name: name for name in Base.metadata.tables}
+    for table, alias in re.findall(r"(\w+) AS (\w+)", statement):
+        if table in Base.metadata.tables:
+            aliases[alias] = table
+    return aliases
+
+
+async def _table_sizes(conn) -> dict[str, int]:
+    sizes = {}
+    for table in Base.metadata.sorted_tables:
+        result = await conn.execute(select(func.count()).select_from(table))
+        sizes[table.name] = result.scalar_one()
+    return sizes
+
+
+async def _sqlite_full_scans(conn, statement, params) -> list[str]:
+    result = await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, params)
+    aliases = _alias_map(statement)
+    scanned = []
+    for row in result.all():
+        detail = row[-1]
+        match = re.match(r"SCAN (\w+)$", detail)
+        if match:
+            scanned.append(aliases.get(match.group(1), match.group(1)))
+    return scanned
+
+
+async def _postgres_full_scans(conn, statement, params) -> list[str]:
+    result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, params)
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    scanned = []
+
+    def walk(node: dict) -> None:
+        if node.get("Node Type") == "Seq Scan":
+            scanned.append(node["Relation Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return scanned
+
+
+async def _assert_no_large_full_scans(engine, session_maker, explain) -> None:
+    async with session_maker() as db:
+        ids = await _seed(db)
+
+    statements = await _capture_selects(engine, session_maker, ids)
+    assert statements, "no queries were captured"
+
+    async with engine.connect() as conn:
+        sizes = await _table_sizes(conn)
+        if engine.dialect.name == "postgresql":
+            await conn.execute(text("ANALYZE"))
+            await conn.execute(text("SET enable_seqscan = off"))
+
+        offenders = []
+        for statement, params in statements:
+            for table in await explain(conn, statement, params):
+                if sizes.get(table, 0) >= SEQ_SCAN_ROW_THRESHOLD:
+                    offenders.append(f"{table} ({sizes[table]} rows): {statement}")
+
+    assert not offenders, "Full table scans found:\n" + "\n\n".join(offenders)
+
+
+@pytest.mark.asyncio
+async def test_service_queries_use_indexes_sqlite():
+    """Hot service queries never fully scan a large table on SQLite."""
+    session_maker = async_sessionmaker(sqlite_engine, expire_on_commit=False)
+    await _assert_no_large_full_scans(sqlite_engine, session_maker, _sqlite_full_scans)
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(
+    not os.environ.get("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set"
+)
+async def test_service_queries_use_indexes_postgres():
+    """Hot service queries never need a Seq Scan on a large Postgres table."""
+    engine = create_async_engine(os.environ["TEST_POSTGRES_URL"])
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        await _assert_no_large_full_scans(engine, session_maker, _postgres_full_scans)
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
@@ -0,0 +1,149 @@
+"""
+Tests for the assignment reminder scheduler.
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import Settings
+from app.models.notification import Notification, NotificationType
+from app.models.organisation import Organisation
+from app.models.outbox import OutboxChannel, OutboxMessage
+from app.models.reminder import AssignmentReminder
+from app.models.roster import AssignmentStatus, EventAssignment, Roster, RosterEvent
+from app.models.team import Team
+from app.models.user import User
+from app.services.reminder import ReminderScheduler, parse_lead_days
+from tests.conftest import TestingSessionLocal
+
+TODAY = date(2026, 11, 2)
+
+
+async def _seed(db: AsyncSession, test_user: User) -> dict[int, EventAssignment]:
+    """Assign test_user to events 1, 2, 3 and 5 days out, plus some noise."""
+    org = Organisation(name="Reminder Church")
+    other = User(email="other@example.com", name="Other")
+    db.add_all([org, other])
+    await db.flush()
+    team = Team(name="Media Team", organisation_id=org.id)
+    db.add(team)
+    await db.flush()
+    roster = Roster(
+        name="Sunday Service", team_id=team.id, recurrence_day=6, start_date=TODAY
+    )
+    db.add(roster)
+    await db.flush()
+
+    assignments = {}
+    for days in (-1, 1, 2, 3, 5):
+        event = RosterEvent(roster_id=roster.id, date=TODAY + timedelta(days=days))
+        db.add(event)
+        await db.flush()
+        assignments[days] = EventAssignment(event_id=event.id, user_id=test_user.id)
+        db.add(assignments[days])
+        # Declined assignments are never reminded
+        db.add(
+            EventAssignment(
+                event_id=event.id, user_id=other.id, status=AssignmentStatus.DECLINED
+            )
+        )
+
+    cancelled = RosterEvent(
+        roster_id=roster.id, date=TODAY + timedelta(days=1), is_cancelled=True
+    )
+    db.add(cancelled)
+    await db.flush()
+    db.add(EventAssignment(event_id=cancelled.id, user_id=test_user.id))
+    await db.commit()
+    return assignments
+
+
+def _scheduler(**settings) -> ReminderScheduler:
+    return ReminderScheduler(
+        session_maker=TestingSessionLocal, settings=Settings(**settings)
+    )
+
+
+async def _count(db: AsyncSession, model) -> int:
+    result = await db.execute(select(func.count()).select_from(model))
+    return result.scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_due_reminders_are_queued_once(db_session: AsyncSession, test_user):
+    """Events within the lead times get one reminder each, never twice."""
+    assignments = await _seed(db_session, test_user)
+    scheduler = _scheduler()
+
+    assert await scheduler.run_once(TODAY) == 3
+    assert await scheduler.run_once(TODAY) == 0
+
+    result = await db_session.execute(
+        select(Notification).order_by(Notification.message)
+    )
+    notifications = result.scalars().all()
+    assert {n.type for n in notifications} == {NotificationType.ASSIGNMENT_REMINDER}
+    assert {n.reference_id for n in notifications} == {
+        assignments[d].id for d in (1, 2, 3)
+    }
+    assert notifications[-1].title == "Reminder: Sunday Service"
+    assert notifications[-1].message == "You're serving tomorrow (Tuesday, November 03)"
+
+    result = await db_session.execute(select(OutboxMessage))
+    pushes = result.scalars().all()
+    assert len(pushes) == 3
+    assert all(m.channel == OutboxChannel.PUSH for m in pushes)
+
+    result = await db_session.execute(
+        select(AssignmentReminder.event_assignment_id, AssignmentReminder.lead_days)
+    )
+    assert set(result.all()) == {
+        (assignments[1].id, 1),
+        (assignments[2].id, 3),
+        (assignments[3].id, 3),
+    }
+
+
+@pytest.mark.asyncio
+async def test_next_lead_time_sends_a_second_reminder(
+    db_session: AsyncSession, test_user
+):
+    """The day before an event it gets its 1-day reminder as well."""
+    assignments = await _seed(db_session, test_user)
+    scheduler = _scheduler()
+    await scheduler.run_once(TODAY)
+
+    # Tomorrow, the event 2 days out becomes a 1-day reminder; the one
+    # 3 days out is still in the 3-day window it was already reminded for
+    assert await scheduler.run_once(TODAY + timedelta(days=1)) == 1
+    result = await db_session.execute(
+        select(AssignmentReminder.lead_days).where(
+            AssignmentReminder.event_assignment_id == assignments[2].id
+        )
+    )
+    assert sorted(result.scalars().all()) == [1, 3]
+
+
+@pytest.mark.asyncio
+async def test_reminders_are_written_in_batches(
+    db_session: AsyncSession, test_user, assert_max_queries
+):
+    """Each batch costs a fixed number of statements, however large."""
+    await _seed(db_session, test_user)
+    scheduler = _scheduler(reminder_batch_size=2)
+
+    # Two batches (2 + 1): per batch one SELECT and an INSERT each into the
+    # ledger, notifications and outbox
+    with assert_max_queries(8):
+        assert await scheduler.run_once(TODAY) == 3
+    assert await _count(db_session, AssignmentReminder) == 3
+
+
+def test_parse_lead_days():
+    assert parse_lead_days("1, 3") == [3, 1]
+    assert parse_lead_days("7,3,3,1") == [7, 3, 1]
+    with pytest.raises(ValueError):
+        parse_lead_days("0")
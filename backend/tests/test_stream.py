@@ -0,0 +1,305 @@
+"""Tests for the real-time notification stream."""
+
+import asyncio
+import json
+import uuid
+from datetime import date
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import create_access_token, create_stream_ticket
+from app.main import app
+from app.models.notification import Notification, NotificationType
+from app.models.organisation import Organisation
+from app.models.roster import AssignmentStatus, EventAssignment, Roster, RosterEvent
+from app.models.team import Team
+from app.models.user import User
+from app.schemas.notification import NotificationCreate
+from app.services import stream
+from app.services.notification import NotificationService
+from app.services.stream import (
+    PostgresFanout,
+    StreamBroker,
+    StreamEvent,
+    event_stream,
+    get_broker,
+)
+
+
+def _notification(user: User, message: str = "Welcome") -> Notification:
+    return Notification(
+        user_id=user.id,
+        type=NotificationType.TEAM_JOINED,
+        title="Team Joined",
+        message=message,
+    )
+
+
+@pytest.mark.asyncio
+async def test_committed_notification_is_published(db_session, test_user):
+    with get_broker().subscribe(test_user.id) as subscription:
+        db_session.add(_notification(test_user))
+        await db_session.flush()
+        assert subscription.queue.empty()
+
+        await db_session.commit()
+        stream_event = subscription.queue.get_nowait()
+
+    assert stream_event.type == "notification"
+    assert stream_event.data["message"] == "Welcome"
+    assert stream_event.data["user_id"] == str(test_user.id)
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_notification_is_not_published(db_session, test_user):
+    with get_broker().subscribe(test_user.id) as subscription:
+        db_session.add(_notification(test_user))
+        await db_session.flush()
+        await db_session.rollback()
+
+    assert subscription.queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_bulk_created_notifications_are_published(db_session, test_user):
+    """create_notification_batch bypasses the flush, but still publishes."""
+    items = [
+        NotificationCreate(
+            user_id=test_user.id,
+            type=NotificationType.TEAM_JOINED,
+            title="Team Joined",
+            message=f"Notification {n}",
+        )
+        for n in range(3)
+    ]
+    with get_broker().subscribe(test_user.id) as subscription:
+        await NotificationService(db_session).create_notification_batch(items)
+        await db_session.commit()
+        messages = [subscription.queue.get_nowait().data["message"] for _ in range(3)]
+
+    assert messages == ["Notification 0", "Notification 1", "Notification 2"]
+
+
+@pytest.mark.asyncio
+async def test_assignment_status_change_is_published(db_session, test_user):
+    org = Organisation(name="Stream Church")
+    db_session.add(org)
+    await db_session.flush()
+    team = Team(name="Media Team", organisation_id=org.id)
+    db_session.add(team)
+    await db_session.flush()
+    roster = Roster(
+        name="Sunday Service",
+        team_id=team.id,
+        recurrence_day=6,
+        start_date=date(2026, 11, 1),
+    )
+    db_session.add(roster)
+    await db_session.flush()
+    event = RosterEvent(roster_id=roster.id, date=date(2026, 11, 1))
+    db_session.add(event)
+    await db_session.flush()
+    assignment = EventAssignment(event_id=event.id, user_id=test_user.id)
+    db_session.add(assignment)
+    await db_session.commit()
+
+    with get_broker().subscribe(test_user.id) as subscription:
+        # Unrelated changes are not announced
+        event.notes = "Bring a jacket"
+        await db_session.commit()
+        assert subscription.queue.empty()
+
+        assignment.status = AssignmentStatus.CONFIRMED
+        await db_session.commit()
+        stream_event = subscription.queue.get_nowait()
+
+    assert stream_event.type == "assignment"
+    assert stream_event.data == {
+        "id": str(assignment.id),
+        "event_id": str(event.id),
+        "status": "confirmed",
+    }
+
+
+@pytest.mark.asyncio
+async def test_event_stream_heartbeat_and_resync():
+    broker = StreamBroker(queue_size=2)
+    user_id = uuid.uuid4()
+    stream = event_stream(user_id, heartbeat=0.01, broker=broker)
+
+    assert "event: ready" in await anext(stream)
+    assert await anext(stream) == ": keepalive\n\n"
+
+    # A client that falls behind gets what was buffered, then a resync
+    broker.publish([StreamEvent(user_id, "notification", {"n": n}) for n in range(3)])
+    assert await anext(stream) == 'event: notification\ndata: {"n": 0}\n\n'
+    assert await anext(stream) == 'event: notification\ndata: {"n": 1}\n\n'
+    assert await anext(stream) == "event: resync\ndata: {}\n\n"
+    with pytest.raises(StopAsyncIteration):
+        await anext(stream)
+    assert not broker._subscribers
+
+
+async def _open_stream(query_string: bytes):
+    """Drive the ASGI app directly; httpx's transport buffers whole bodies."""
+    disconnect = asyncio.Event()
+    messages: asyncio.Queue = asyncio.Queue()
+
+    async def receive():
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/notifications/stream",
+        "raw_path": b"/api/notifications/stream",
+        "query_string": query_string,
+        "root_path": "",
+        "headers": [(b"host", b"test")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+    task = asyncio.create_task(app(scope, receive, messages.put))
+    return task, disconnect, messages
+
+
+@pytest.mark.asyncio
+async def test_stream_endpoint_delivers_notifications(
+    test_client: AsyncClient, db_session: AsyncSession, test_user
+):
+    response = await test_client.post(
+        "/api/notifications/stream/ticket",
+        headers={"Authorization": f"Bearer {create_access_token(str(test_user.id))}"},
+    )
+    ticket = response.json()["ticket"]
+    task, disconnect, messages = await _open_stream(f"ticket={ticket}".encode())
+    try:
+        start = await asyncio.wait_for(messages.get(), 5)
+        assert start["status"] == 200
+        assert (b"content-type", b"text/event-stream; charset=utf-8") in start[
+            "headers"
+        ]
+        ready = await asyncio.wait_for(messages.get(), 5)
+        assert b"event: ready" in ready["body"]
+
+        db_session.add(_notification(test_user, "Streamed"))
+        await db_session.commit()
+
+        body = (await asyncio.wait_for(messages.get(), 5))["body"].decode()
+        assert body.startswith("event: notification\n")
+        assert json.loads(body.split("data: ", 1)[1])["message"] == "Streamed"
+    finally:
+        disconnect.set()
+        await asyncio.wait_for(task, 5)
+
+
+@pytest.mark.asyncio
+async def test_stream_requires_authentication(test_client: AsyncClient):
+    response = await test_client.get("/api/notifications/stream")
+    assert response.status_code == 401
+    response = await test_client.get(
+        "/api/notifications/stream", params={"ticket": "not-a-ticket"}
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_tickets_and_access_tokens_are_not_interchangeable(
+    test_client: AsyncClient, test_user
+):
+    """Access tokens stay out of URLs, and tickets only open the stream."""
+    access_token = create_access_token(str(test_user.id))
+    response = await test_client.get(
+        "/api/notifications/stream", params={"ticket": access_token}
+    )
+    assert response.status_code == 401
+
+    ticket = create_stream_ticket(str(test_user.id))
+    response = await test_client.get(
+        "/api/notifications", headers={"Authorization": f"Bearer {ticket}"}
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_fanout_relays_other_workers_events():
+    broker = StreamBroker()
+    fanout = PostgresFanout("postgresql://unused", broker)
+    user_id = uuid.uuid4()
+    events = [
+        StreamEvent(user_id, "notification", {"message": "x" * 1000}) for _ in range(20)
+    ]
+
+    payloads = fanout.payloads(events)
+    assert len(payloads) > 1
+    # Postgres rejects payloads of 8000 bytes or more
+    assert all(len(payload.encode()) < 8000 for payload in payloads)
+
+    with broker.subscribe(user_id) as subscription:
+        # Our own notifications were already delivered locally
+        for payload in payloads:
+            fanout._on_notify(None, 1, "rooster_stream", payload)
+        assert subscription.queue.empty()
+
+        other = PostgresFanout("postgresql://unused", StreamBroker())
+        for payload in other.payloads(events):
+            fanout._on_notify(None, 1, "rooster_stream", payload)
+        assert subscription.queue.qsize() == 20
+
+
+class _FakeConnection:
+    """Just enough of an asyncpg connection for the fan-out."""
+
+    def __init__(self):
+        self.listeners = []
+        self.on_terminate = None
+
+    def add_termination_listener(self, callback):
+        self.on_terminate = callback
+
+    async def add_listener(self, channel, callback):
+        self.listeners.append(channel)
+
+    async def execute(self, *args):
+        pass
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_fanout_reconnects_and_listens_again(monkeypatch):
+    """A dropped connection is replaced and local clients told to resync."""
+    monkeypatch.setattr(stream, "FANOUT_RECONNECT_MIN_DELAY", 0)
+    connections = []
+    attempts = 0
+
+    async def connect(dsn):
+        nonlocal attempts
+        attempts += 1
+        if attempts == 2:
+            raise ConnectionRefusedError("database restarting")
+        connections.append(_FakeConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(stream.asyncpg, "connect", connect)
+    broker = StreamBroker()
+    fanout = PostgresFanout("postgresql://unused", broker)
+    await fanout.start()
+    user_id = uuid.uuid4()
+    try:
+        with broker.subscribe(user_id) as subscription:
+            connections[0].on_terminate(connections[0])
+            stream_event = await asyncio.wait_for(subscription.queue.get(), 5)
+    finally:
+        await fanout.aclose()
+
+    assert stream_event.type == "resync"
+    assert attempts == 3
+    assert connections[1].listeners == ["rooster_stream"]